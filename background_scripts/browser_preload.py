@@ -0,0 +1,131 @@
+"""Preloading of browser source URLs in hidden duplicates."""
+
+from background_scripts.logger import logger
+
+PRELOAD_SUFFIX = " (next)"
+
+
+class BrowserPreloader:
+    """
+    Loads a browser source's next URL in a hidden duplicate and swaps it in.
+
+    The duplicate sits right above the original in every scene that shows
+    it, with the same transform, so the swap is a single batch that shows
+    the duplicate, hides the original and exchanges their names. Graphics
+    built on the source name keep working, and the page is already rendered
+    when it goes on air.
+    """
+
+    def __init__(self, obs_controller, scene_index):
+        """Initialize the preloader with a controller and its scene item index."""
+        self.obs_controller = obs_controller
+        self.scene_index = scene_index
+
+    @staticmethod
+    def preload_name(input_name):
+        return f"{input_name}{PRELOAD_SUFFIX}"
+
+    def _ok(self, results):
+        return results is not None and all(result["requestStatus"]["result"] for result in results)
+
+    def preload(self, input_name, url) -> bool:
+        """Load url into the hidden duplicate of a browser source."""
+        duplicate = self.preload_name(input_name)
+        if self.obs_controller.source_exists(duplicate):
+            return self._ok(self.obs_controller.send_batch([{
+                "requestType": "SetInputSettings",
+                "requestData": {"inputName": duplicate, "inputSettings": {"url": str(url)}, "overlay": True},
+            }]))
+
+        settings = self.obs_controller.get_input_settings(input_name)
+        if settings is None:
+            logger.error(f"Browser source '{input_name}' does not exist")
+            return False
+        items = self.scene_index.items_for(input_name)
+        if not items:
+            self.scene_index.build()  # Not built yet, or built before the source was created
+            items = self.scene_index.items_for(input_name)
+        if not items:
+            logger.error(f"Browser source '{input_name}' is not in any scene")
+            return False
+
+        # Read where the original sits, so the duplicate can be placed on top of it
+        results = self.obs_controller.send_batch([
+            request
+            for scene, item_id in items
+            for request in (
+                {"requestType": "GetSceneItemTransform",
+                 "requestData": {"sceneName": scene, "sceneItemId": item_id}},
+                {"requestType": "GetSceneItemIndex",
+                 "requestData": {"sceneName": scene, "sceneItemId": item_id}},
+            )
+        ])
+        if not self._ok(results):
+            return False
+
+        first_scene = items[0][0]
+        created = self.obs_controller.send_batch([{
+            "requestType": "CreateInput",
+            "requestData": {
+                "sceneName": first_scene,
+                "inputName": duplicate,
+                "inputKind": "browser_source",
+                "inputSettings": dict(settings, url=str(url)),
+                "sceneItemEnabled": False,
+            },
+        }] + [{
+            "requestType": "CreateSceneItem",
+            "requestData": {"sceneName": scene, "sourceName": duplicate, "sceneItemEnabled": False},
+        } for scene, _ in items[1:]])
+        if not self._ok(created):
+            return False
+
+        placement = []
+        for (scene, _), result, index in zip(items, created, range(0, len(results), 2)):
+            item_id = result["responseData"]["sceneItemId"]
+            transform = {key: value for key, value in results[index]["responseData"]["sceneItemTransform"].items()
+                         if key not in ("sourceWidth", "sourceHeight", "width", "height")}
+            placement.append({"requestType": "SetSceneItemTransform",
+                              "requestData": {"sceneName": scene, "sceneItemId": item_id,
+                                              "sceneItemTransform": transform}})
+            placement.append({"requestType": "SetSceneItemIndex",
+                              "requestData": {"sceneName": scene, "sceneItemId": item_id,
+                                              "sceneItemIndex": results[index + 1]["responseData"]["sceneItemIndex"] + 1}})
+
+        logger.info(f"Preloading '{url}' for browser source '{input_name}'")
+        return self._ok(self.obs_controller.send_batch(placement))
+
+    def swap(self, input_name) -> bool:
+        """Show the preloaded duplicate in place of the original, in one batch."""
+        duplicate = self.preload_name(input_name)
+        if not self.scene_index.items_for(duplicate):
+            self.scene_index.build()  # Events for the new items may not have arrived yet
+        originals = self.scene_index.items_for(input_name)
+        duplicates = self.scene_index.items_for(duplicate)
+        if not duplicates:
+            logger.error(f"Nothing preloaded for browser source '{input_name}'")
+            return False
+
+        swap_name = f"{input_name} (swap)"
+        requests = [
+            {"requestType": "SetSceneItemEnabled",
+             "requestData": {"sceneName": scene, "sceneItemId": item_id, "sceneItemEnabled": True}}
+            for scene, item_id in duplicates
+        ] + [
+            {"requestType": "SetSceneItemEnabled",
+             "requestData": {"sceneName": scene, "sceneItemId": item_id, "sceneItemEnabled": False}}
+            for scene, item_id in originals
+        ] + [
+            {"requestType": "SetInputName", "requestData": {"inputName": input_name, "newInputName": swap_name}},
+            {"requestType": "SetInputName", "requestData": {"inputName": duplicate, "newInputName": input_name}},
+            {"requestType": "SetInputName", "requestData": {"inputName": swap_name, "newInputName": duplicate}},
+        ]
+        if not self._ok(self.obs_controller.send_batch(requests, halt_on_failure=True)):
+            return False
+
+        if not self.scene_index.subscribed:
+            self.scene_index.build()  # No rename events to keep the index current
+        # The live source now has the preloaded settings, forget the cached ones
+        self.obs_controller.forget_sent_settings(input_name, duplicate)
+        logger.info(f"Swapped preloaded page into browser source '{input_name}'")
+        return True
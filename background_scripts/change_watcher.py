@@ -0,0 +1,86 @@
+"""Background polling of the data file for changes."""
+
+import threading
+from background_scripts.logger import logger
+from background_scripts.config import UPDATE_INTERVAL
+from background_scripts.metrics import metrics
+
+
+class ChangeWatcher:
+    """
+    Checks the data file every interval and reads it when it changed.
+
+    Reading updates the handler's source store, which tells its listeners
+    (the GUI) which sources changed. Checking an unchanged file costs a
+    stat call, see CSVHandler.has_changes().
+    """
+
+    def __init__(self, get_csv_handler, interval=UPDATE_INTERVAL, on_data_changed=None):
+        """
+        Initialize the watcher.
+
+        Args:
+            get_csv_handler (callable): Returns the current CSVHandler (it is replaced when another file is opened)
+            interval (float): Seconds between checks
+            on_data_changed (callable): Called with no arguments when the data or the live row
+                changed, even if none of the mapped values did (other mapping profiles read it)
+        """
+        self.get_csv_handler = get_csv_handler
+        self.interval = float(interval)
+        self.on_data_changed = on_data_changed
+        self._data_state = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._missing = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def check_once(self) -> bool:
+        """Read the data if it changed, returning whether it did."""
+        handler = self.get_csv_handler()
+        if not handler.column_mapping:
+            return False  # Nothing to read until the mapping is configured
+        if not handler.fetch() or handler.file_version() is None:  # Pull sources are fetched here only
+            if not self._missing:
+                logger.warning(f"Data file not available, waiting for it: {handler.csv_path}")
+                self._missing = True
+            return False
+        self._missing = False
+
+        data_state = (handler, handler.file_version(), handler.key_column, handler.selected_key)
+        if data_state != self._data_state:
+            self._data_state = data_state
+            if self.on_data_changed is not None:
+                self.on_data_changed()
+
+        if not handler.has_changes():
+            return False
+        handler.read_csv()
+        metrics.incr("csv_changes")
+        return True
+
+    def start(self):
+        """Start checking in a background thread."""
+        if self.running or self.interval <= 0:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ChangeWatcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching the data file for changes every {self.interval} seconds")
+
+    def stop(self):
+        """Stop the background checks."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        """Worker loop."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check_once()
+            except Exception as e:
+                logger.error(f"Error checking the data file for changes: {str(e)}")
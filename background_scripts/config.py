@@ -14,6 +14,9 @@ OBS_PORT = 4455
 # Set to None or empty string for non-authenticated connections
 OBS_PASSWORD = None
 
+# Scene that new sources are created in (mapping profiles can name their own scenes)
+SOURCES_SCENE = "Sources"
+
 # Connection retry settings
 MAX_RETRIES = 3
 RETRY_DELAY = 5  # seconds
@@ -21,9 +24,48 @@ RETRY_DELAY = 5  # seconds
 # CSV settings
 DEFAULT_CSV_PATH = os.path.join(BASE_DIR, "data.csv")
 CSV_ENCODING = "utf-8"
+# Input format: "csv", "json", "ndjson", "arrow" or "parquet".
+# None picks the format from the file extension.
+INPUT_FORMAT = None
+# Rows shown in tail mode (append-only CSVs). More than 1 numbers the sources "Name #1".."Name #N"
+TAIL_ROWS = 1
+
+# HTTP pull source settings (pull CSV/JSON straight from a URL instead of a local file)
+PULL_URL = None  # e.g. "http://127.0.0.1:8000/scores.csv"
+PULL_INTERVAL = 1.0  # seconds between conditional requests
+PULL_TIMEOUT = 5  # seconds
 
 # Update settings
-UPDATE_INTERVAL = 1.0  # seconds
+UPDATE_INTERVAL = 1.0  # seconds between checks of the data file for changes (0 disables)
+ROTATION_INTERVAL = 8.0  # seconds each row stays on air in rotation mode
+BROWSER_PRELOAD = False  # rotation loads the next row's browser pages in hidden copies "<name> (next)" and swaps them in
+RECONCILE_INTERVAL = 10.0  # seconds between checks that OBS still shows the values last sent (0 disables)
+
+# Mapping profiles (named mappings tied to scenes), saved from the GUI
+PROFILES_FILE = os.path.join(BASE_DIR, "profiles.json")
+
+# Pre-flight checks run on every update set before it is pushed
+# "best_effort" pushes the updates that passed, "all_or_nothing" pushes nothing if any update failed
+PUSH_POLICY = "best_effort"
+PREFLIGHT_WORKERS = 8  # threads checking media files (helps on network drives)
+
+# Local control API (HTTP + WebSocket) for pushing values without editing the CSV
+CONTROL_HOST = "127.0.0.1"  # Only reachable from this machine
+CONTROL_PORT = None  # e.g. 4460 to start the control server with the GUI
+CONTROL_WRITE_BACK = False  # Also write values sent to the API into the CSV (in the background)
+
+# Timeline recording: every detected CSV change is appended here (replay it with benchmarks/replay.py)
+TIMELINE_FILE = None  # e.g. os.path.join(BASE_DIR, "timeline.ndjson")
+
+# Previews in the source list (color swatches, image thumbnails)
+THUMBNAIL_SIZE = 20  # pixels
+THUMBNAIL_CACHE_MB = 16  # decoded thumbnails kept in memory
+
+# Live updates of the source list: changed rows are redrawn at most once per frame
+GUI_FRAME_MS = 33  # ~30 redraws per second
+GUI_FRAME_BUDGET_MS = 8  # time per frame spent updating rows, the rest is left to Tk
+HIGHLIGHT_MS = 1500  # how long a changed row stays highlighted
+HIGHLIGHT_COLOR = "#FFF2A8"
 
 # Logging settings
 LOG_FILE = os.path.join(BASE_DIR, "obs_csv_updater.log")
@@ -0,0 +1,363 @@
+"""Local control API: push source values over HTTP or WebSocket."""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+from background_scripts.logger import logger
+from background_scripts.config import CONTROL_HOST, CONTROL_PORT, CONTROL_WRITE_BACK, PUSH_POLICY
+from background_scripts.metrics import metrics
+from background_scripts.obs_controller import RELOADING_KINDS, get_input_kind
+from background_scripts.preflight import Preflight
+from background_scripts.websocket_frames import OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, accept_key, recv_frame, send_frame
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def parse_updates(message):
+    """
+    Read the source -> value updates out of a request body.
+
+    Accepted forms:
+        {"updates": {"Source": "value", ...}, "write_back": true, "reload": true}
+        {"source": "Source", "value": "value"}
+        {"Source": "value", ...}
+
+    Returns:
+        tuple: (updates dict with string values, write_back flag or None, reload flag)
+    """
+    if not isinstance(message, dict):
+        raise ValueError("Expected a JSON object")
+
+    write_back = message.get("write_back") if "updates" in message or "source" in message else None
+    reload = bool(message.get("reload")) if "updates" in message or "source" in message else False
+    if "updates" in message:
+        updates = message["updates"]
+    elif "source" in message:
+        updates = {message["source"]: message.get("value")}
+    else:
+        updates = message
+    if not isinstance(updates, dict) or not updates:
+        raise ValueError("No updates given")
+
+    values = {}
+    for source_name, value in updates.items():
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"Value for '{source_name}' must be a string or number")
+        values[str(source_name)] = "" if value is None else str(value)
+    return values, write_back, reload
+
+
+def host_allowed(host, local_addresses=()):
+    """
+    Only allow requests addressed to this machine by a local name or an IP address it listens on.
+
+    A page whose DNS name was rebound to 127.0.0.1 still sends its own name
+    in the Host header, so it is turned away here.
+    """
+    if host is None:
+        return True  # Not sent by browsers, which always send it
+    hostname = urlparse(f"//{host}").hostname
+    return hostname in LOCAL_HOSTS or hostname in local_addresses
+
+
+def origin_allowed(origin):
+    """Only allow requests without an Origin header (local tools) or from pages served by this machine."""
+    return origin is None or urlparse(origin).hostname in LOCAL_HOSTS
+
+
+class ControlServer:
+    """
+    Local HTTP/WebSocket server that pushes source values sent by other tools.
+
+    Updates take the same path as CSV changes: each value is processed like
+    the CSV column it is mapped to (paths resolved, colors converted), the
+    update is checked as a whole (see Preflight) and then sent to OBS as one
+    request batch, and the reply goes out once OBS answered, so a request
+    costs a single OBS round trip. Writing the values back into the CSV, when
+    enabled, happens afterwards on a background thread.
+
+    HTTP:
+        GET  /sources          Current source values, and the settings last sent to OBS ("on_air")
+        POST /sources          Batched update, see parse_updates()
+        PUT  /sources/<name>   Single update, body {"value": ...}
+    WebSocket (/ws): every text message is a batched update, optionally with
+    an "id" that is echoed back in the reply.
+    """
+
+    def __init__(self, get_csv_handler, obs_controller, host=CONTROL_HOST, port=CONTROL_PORT,
+                 write_back=CONTROL_WRITE_BACK, preflight=None, policy=PUSH_POLICY):
+        """
+        Initialize the server.
+
+        Args:
+            get_csv_handler (callable): Returns the current CSVHandler (it is replaced when another file is opened)
+            obs_controller (OBSController): Connected controller
+            host (str): Address to listen on
+            port (int): Port to listen on, 0 picks a free one
+            write_back (bool): Default for writing received values into the CSV
+            preflight (Preflight): Shared pre-flight checks (one without OBS's input list by default)
+            policy (str): Push policy for updates with invalid values, see PreflightReport.sendable()
+        """
+        self.get_csv_handler = get_csv_handler
+        self.obs_controller = obs_controller
+        self.host = host
+        self.requested_port = port or 0
+        self.write_back = write_back
+        self.preflight = preflight or Preflight(obs_controller)
+        self.policy = policy
+        self._server = None
+        self._thread = None
+        self._writer = None
+        self._lock = threading.Lock()  # Keeps OBS and the source store in the same order as the requests
+        self._websockets = set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def port(self):
+        return self._server.server_address[1] if self._server else None
+
+    def apply_updates(self, updates, write_back=None, reload=False):
+        """
+        Process and push a set of source values.
+
+        Args:
+            updates (dict): Source name -> raw value
+            write_back (bool): Write the values into the CSV, None uses the server default
+            reload (bool): Refresh browser/media sources whose URL/file did not change
+                (changed ones reload anyway when they are set)
+
+        Returns:
+            dict: ok, the sources sent, the sources rejected as invalid, the sources reloaded,
+                the pre-flight report and the latency in ms
+        """
+        start = time.perf_counter()
+        handler = self.get_csv_handler()
+        processed, columns = handler.process_values(updates)
+        report = self.preflight.check_values(processed, updates, os.path.dirname(handler.csv_path))
+        prepared = self.obs_controller.prepare_settings_requests(
+            {name: processed[name] for name in report.sendable(processed, self.policy)})
+        sent = [request["requestData"]["inputName"] for request in prepared]
+        rejected = [source_name for source_name in processed if source_name not in sent]
+
+        ok = True
+        reloaded = []
+        with self._lock:
+            if reload:
+                # Left out of the batch as unchanged, so they are refreshed instead
+                last_sent = self.obs_controller.sent_settings()
+                reloaded = [request["requestData"]["inputName"] for request in prepared
+                            if get_input_kind(request["requestData"]["inputName"]) in RELOADING_KINDS
+                            and last_sent.get(request["requestData"]["inputName"])
+                            == request["requestData"]["inputSettings"]]
+            if prepared:
+                ok = self.obs_controller.send_prepared_settings(prepared)
+                if not ok:
+                    # Usually sources that do not exist yet, update_source creates them
+                    ok = self.obs_controller.bulk_update_sources({name: processed[name] for name in sent})
+            for source_name in reloaded:
+                ok = self.obs_controller.reload_source(source_name) and ok
+            if ok and sent:
+                # Keep the API values as the desired state until the CSV changes again
+                handler.store.update({name: processed[name] for name in sent}, {name: updates[name] for name in sent})
+
+        if write_back is None:
+            write_back = self.write_back
+        columns = {columns[name]: updates[name] for name in sent if name in columns}
+        if ok and write_back and columns and self._writer is not None:
+            if handler.tail_reader is not None:
+                logger.warning("Not writing control API values back to an append-only CSV")
+            else:
+                self._writer.submit(self._write_back, handler, columns)
+
+        latency = time.perf_counter() - start
+        metrics.incr("control_updates", len(sent))
+        metrics.observe("control_update_latency", latency)
+        logger.info(f"Control API update of {len(sent)} sources in {latency * 1000:.1f} ms")
+        return {"ok": bool(ok) and not rejected, "sent": sent, "rejected": rejected, "reloaded": reloaded,
+                "preflight": report.to_dict(), "latency_ms": round(latency * 1000, 3)}
+
+    def _write_back(self, handler, columns):
+        """Write values into the CSV (writer thread)."""
+        if not handler.write_values(columns):
+            logger.error(f"Failed to write control API values back to the CSV: {columns}")
+
+    def start(self) -> bool:
+        """Start serving in a background thread."""
+        if self.running:
+            return True
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.requested_port), _ControlRequestHandler)
+        except OSError as e:
+            logger.error(f"Failed to start the control API on {self.host}:{self.requested_port}: {str(e)}")
+            self._server = None
+            return False
+
+        self._server.daemon_threads = True
+        self._server.control = self
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ControlWriteBack")
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ControlServer", daemon=True)
+        self._thread.start()
+        logger.info(f"Control API listening on http://{self.host}:{self.port} (WebSocket: /ws)")
+        return True
+
+    def stop(self):
+        """Stop serving, close open WebSockets and finish pending CSV writes."""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        for sock in list(self._websockets):
+            try:
+                send_frame(sock, b"\x03\xe9", OP_CLOSE)  # 1001 going away
+            except OSError:
+                pass
+        self._server.server_close()
+        self._thread.join(timeout=5)
+        self._writer.shutdown(wait=True)
+        self._server = self._thread = self._writer = None
+        logger.info("Control API stopped")
+
+
+class _ControlRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so each update costs no new connection
+
+    @property
+    def control(self) -> ControlServer:
+        return self.server.control
+
+    def log_message(self, format, *args):
+        logger.debug(f"Control API {self.address_string()}: {format % args}")
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        """Read the whole request body, so the connection stays usable even when the request is refused."""
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _check_request(self, needs_json_body):
+        """Reject cross-site requests from browsers, returning False if the request was answered."""
+        if not host_allowed(self.headers.get("Host"), (self.control.host, self.connection.getsockname()[0])):
+            self._send_json(403, {"error": "Requests for other host names are not allowed"})
+            return False
+        if not origin_allowed(self.headers.get("Origin")):
+            self._send_json(403, {"error": "Requests from other sites are not allowed"})
+            return False
+        # A JSON content type cannot be sent cross-site without a CORS preflight, which is never granted
+        if needs_json_body and not (self.headers.get("Content-Type") or "").startswith("application/json"):
+            self._send_json(415, {"error": "Content-Type must be application/json"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._check_request(False):
+            return
+        path = urlparse(self.path).path.rstrip("/")
+        if path == "/ws":
+            self._serve_websocket()
+        elif path == "/sources":
+            self._send_json(200, {"sources": dict(self.control.get_csv_handler().store.snapshot().values),
+                                  "on_air": self.control.obs_controller.sent_settings()})
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_POST(self):
+        body = self._read_body()
+        if not self._check_request(True):
+            return
+        if urlparse(self.path).path.rstrip("/") != "/sources":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            updates, write_back, reload = parse_updates(json.loads(body or b"null"))
+        except ValueError as e:  # json.JSONDecodeError is a ValueError too
+            self._send_json(400, {"error": str(e)})
+            return
+        self._respond(updates, write_back, reload)
+
+    def do_PUT(self):
+        body = self._read_body()
+        if not self._check_request(True):
+            return
+        path = urlparse(self.path).path
+        if not path.startswith("/sources/") or len(path) == len("/sources/"):
+            self._send_json(404, {"error": f"Unknown path {path}"})
+            return
+        try:
+            body = json.loads(body or b"null")
+            if not isinstance(body, dict):
+                body = {"value": body}  # A bare JSON value
+            updates, write_back, reload = parse_updates({"source": unquote(path[len("/sources/"):]),
+                                                         "value": body.get("value"),
+                                                         "write_back": body.get("write_back"),
+                                                         "reload": body.get("reload")})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._respond(updates, write_back, reload)
+
+    def _respond(self, updates, write_back, reload):
+        try:
+            result = self.control.apply_updates(updates, write_back, reload)
+        except Exception as e:
+            logger.error(f"Control API update failed: {str(e)}")
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send_json(200 if result["ok"] else 502 if not result["rejected"] else 422, result)
+
+    def _serve_websocket(self):
+        key = self.headers.get("Sec-WebSocket-Key")
+        if not key or (self.headers.get("Upgrade") or "").lower() != "websocket":
+            self._send_json(400, {"error": "Expected a WebSocket upgrade"})
+            return
+
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept_key(key))
+        self.end_headers()
+        self.close_connection = True
+
+        sock = self.connection
+        self.control._websockets.add(sock)
+        try:
+            while True:
+                opcode, payload = recv_frame(sock)
+                if opcode == OP_CLOSE:
+                    send_frame(sock, payload[:2], OP_CLOSE)
+                    return
+                if opcode == OP_PING:
+                    send_frame(sock, payload, OP_PONG)
+                    continue
+                if opcode != OP_TEXT:
+                    continue
+
+                request_id = None
+                try:
+                    message = json.loads(payload)
+                    if isinstance(message, dict):
+                        request_id = message.pop("id", None)
+                    reply = self.control.apply_updates(*parse_updates(message))
+                except ValueError as e:
+                    reply = {"ok": False, "error": str(e)}
+                except Exception as e:
+                    logger.error(f"Control API update failed: {str(e)}")
+                    reply = {"ok": False, "error": str(e)}
+                if request_id is not None:
+                    reply["id"] = request_id
+                send_frame(sock, json.dumps(reply).encode())
+        except (ConnectionError, OSError):
+            return
+        finally:
+            self.control._websockets.discard(sock)
@@ -1,40 +1,287 @@
 """CSV handler module for the OBS CSV Updater plugin."""
 
 import pandas as pd
+import csv
+import hashlib
 import os
-from typing import Dict, Optional, Union
+import threading
+from typing import Dict, List, Optional, Tuple, Union
 from background_scripts.logger import logger
-from background_scripts.config import CSV_ENCODING
+from background_scripts.config import CSV_ENCODING, INPUT_FORMAT
 from background_scripts.hex_converter import validate_hex_color  # Importing standalone hex validator
+from background_scripts.readers import get_reader
+from background_scripts.source_store import SourceStore
+from background_scripts.tail_reader import CSVTailReader
 
 class CSVHandler:
-    def __init__(self, csv_path):
-        """Initialize the CSV handler with the path to the CSV file."""
+    def __init__(self, csv_path, input_format=INPUT_FORMAT):
+        """
+        Initialize the CSV handler with the path to the data file.
+
+        Args:
+            csv_path (str): Path to a CSV, JSON/NDJSON, Arrow IPC or Parquet file
+            input_format (str): Explicit format name, or None to detect it from the extension
+        """
         self.csv_path = csv_path
-        self.last_data = None
+        self.input_format = input_format
+        self.reader = get_reader(csv_path, input_format)
+        self.store = SourceStore()  # Values of the last read, see last_data
         self.column_mapping = {}  # Maps CSV columns to OBS source names
-        logger.info(f"Initialized CSV handler for: {csv_path}")
+
+        # Row selection: the live row is picked by its value in key_column
+        self.key_column = None
+        self.selected_key = None
+
+        # Parsed file and key index, kept for one file version
+        self._frame = None
+        self._frame_version = None
+        self._row_index = None  # Maps key value -> row offset
+        self._content_hash = None  # blake2b digest of the bytes _frame was parsed from
+
+        # Change detection, see has_changes()
+        self._cells = {}  # source name -> (column, raw cell, processed value) of the last read
+        self._pending = None  # (state, values, raws, missing files) of the last read, reused while nothing changed
+        self._last_read = None  # Values the store was last set to from the file, see has_changes()
+        # The change watcher, rotation and control API threads share the handler: every method
+        # that reads or resets the frame, row index, caches or readers holds this lock
+        self._read_lock = threading.RLock()
+        self._missing_files = set()  # Picture files found missing, warned about once
+
+        # Tail mode for append-only files, see set_tail_mode()
+        self.tail_reader = None
+
+        # Remote data pulled over HTTP instead of the local file, see set_pull_source()
+        self.pull_source = None
+
+        # Records every detected change when set, see set_recorder()
+        self.recorder = None
+        logger.info(f"Initialized CSV handler for: {csv_path} (format: {self.reader.format_name})")
 
     def set_csv_path(self, new_path: str) -> bool:
         """Update the CSV file path and reset the last data."""
-        try:
-            if os.path.exists(new_path):
-                self.csv_path = new_path
-                self.last_data = None  # Reset last data to force update
-                logger.info(f"Updated CSV path to: {new_path}")
-                return True
-            else:
-                logger.error(f"CSV file not found: {new_path}")
+        with self._read_lock:
+            try:
+                if os.path.exists(new_path):
+                    self.csv_path = new_path
+                    self.reader = get_reader(new_path, self.input_format)
+                    self.store.clear()  # Reset last data to force update
+                    self._last_read = None
+                    self._frame = None
+                    self._frame_version = None
+                    self._row_index = None
+                    self._cells = {}  # Relative picture paths resolve against the new folder
+                    self._pending = None
+                    if self.tail_reader is not None:
+                        self.tail_reader = CSVTailReader(new_path, self.tail_reader.max_rows)
+                    logger.info(f"Updated CSV path to: {new_path}")
+                    return True
+                else:
+                    logger.error(f"CSV file not found: {new_path}")
+                    return False
+            except Exception as e:
+                logger.error(f"Error updating CSV path: {str(e)}")
                 return False
-        except Exception as e:
-            logger.error(f"Error updating CSV path: {str(e)}")
-            return False
 
     def set_column_mapping(self, mapping: Dict[str, str]):
         """Set the mapping between CSV columns and OBS source names."""
-        self.column_mapping = mapping
+        with self._read_lock:
+            self.column_mapping = mapping
         logger.info(f"Updated column mapping: {mapping}")
 
+    def set_pull_source(self, source):
+        """
+        Read data from a pull source (see HTTPPullSource) instead of the local file.
+
+        Args:
+            source: An HTTPPullSource, or None to go back to the local file
+        """
+        with self._read_lock:
+            if self.pull_source is not None and self.pull_source is not source:
+                self.pull_source.close()
+            self.pull_source = source
+            self.tail_reader = None
+            self.store.clear()
+            self._last_read = None
+            self._frame = None
+            self._frame_version = None
+            self._row_index = None
+            self._cells = {}
+            self._pending = None
+            logger.info(f"Reading data from: {source.url if source else self.csv_path}")
+
+    def close(self):
+        """Release the pull connection and cached data, for a handler that is being replaced."""
+        with self._read_lock:
+            if self.pull_source is not None:
+                self.pull_source.close()
+                self.pull_source = None
+            self.tail_reader = None
+            self.store.clear()
+            self._last_read = None
+            self._frame = None
+            self._frame_version = None
+            self._row_index = None
+            self._content_hash = None
+            self._cells = {}
+            self._pending = None
+
+    @property
+    def last_data(self) -> Optional[Dict[str, Union[str, int]]]:
+        """Processed values of the last read (and control API updates) from the store, or None before the first read."""
+        values = self.store.snapshot().values
+        return dict(values) if values else None
+
+    def set_recorder(self, recorder):
+        """Record every change read_csv detects to a TimelineRecorder (None stops recording)."""
+        self.recorder = recorder
+
+    def content_hash(self) -> Optional[str]:
+        """Return a blake2b hex digest of the raw data, or None if it cannot be read."""
+        if self.pull_source is not None:
+            return self.pull_source.content_hash.hex() if self.pull_source.content_hash else None
+        if self._content_hash is not None and self._frame_version == self.file_version():
+            return self._content_hash.hex()  # Hashed when the frame was parsed
+
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(self.csv_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def fetch(self, force: bool = False) -> bool:
+        """
+        Fetch the pull source if its poll interval has passed, returning whether it has data.
+
+        The change watcher calls this from its own thread on every check; every
+        other reader only sees what was fetched last (see file_version()), so
+        no network request runs under the read lock or on the Tk thread.
+        Local files need no fetching.
+        """
+        source = self.pull_source
+        if source is None:
+            return True
+        return source.poll(force) is not None
+
+    def file_version(self) -> Optional[Tuple[int, int, int]]:
+        """Return a cheap signature (size, mtime_ns, inode) of the data file, or None if it is missing."""
+        if self.pull_source is not None:
+            version, frame = self.pull_source.latest()  # What the last fetch() got, no request
+            return None if frame is None else (0, version, 0)
+
+        try:
+            st = os.stat(self.csv_path)
+            return (st.st_size, st.st_mtime_ns, st.st_ino)
+        except OSError:
+            return None
+
+    def load_frame(self) -> pd.DataFrame:
+        """Return the parsed data file, re-reading it only when the file version changed."""
+        with self._read_lock:
+            if self.pull_source is not None:
+                pulled_version, pulled_frame = self.pull_source.latest()
+                version = None if pulled_frame is None else (0, pulled_version, 0)
+            else:
+                version = self.file_version()
+            if version is None:
+                raise FileNotFoundError(self.csv_path)
+
+            if self._frame is None or version != self._frame_version:
+                if self.pull_source is not None:
+                    self._frame = pulled_frame  # Already parsed when it was fetched, with this version
+                elif self.reader.parse_from_bytes:
+                    with open(self.csv_path, 'rb') as f:
+                        data = f.read()
+                    digest = hashlib.blake2b(data, digest_size=16).digest()
+                    if self._frame is not None and digest == self._content_hash:
+                        # Touched or saved without changes, the parsed frame is still right
+                        self._frame_version = version
+                        return self._frame
+                    self._frame = self.reader.read_buffer(data)
+                    self._content_hash = digest
+                else:
+                    self._frame = self.reader.read(self.csv_path)
+                    self._content_hash = None
+                self._frame_version = version
+                self._row_index = None  # Rebuilt lazily for the new version
+                logger.debug(f"Parsed {len(self._frame)} rows from {self.csv_path}")
+            return self._frame
+
+    def set_key_column(self, column: Optional[str]):
+        """Select the column used to look up the live row (None goes back to the first row)."""
+        with self._read_lock:
+            self.key_column = column or None
+            self.selected_key = None
+            self._row_index = None
+            logger.info(f"Row key column set to: {self.key_column}")
+
+    def get_row_index(self) -> Dict[str, int]:
+        """Return the key -> row offset index, building it once per file version."""
+        with self._read_lock:
+            df = self.load_frame()
+            if self._row_index is None:
+                self._row_index = self._build_row_index(df, self.key_column)
+            return self._row_index
+
+    @staticmethod
+    def _build_row_index(df: pd.DataFrame, column: Optional[str]) -> Dict[str, int]:
+        """Map every value of column to the offset of its first row."""
+        index = {}
+        if column in df.columns:
+            for offset, key in enumerate(df[column].astype(str)):
+                index.setdefault(key.strip(), offset)  # First occurrence wins
+            if len(index) < len(df):
+                logger.warning(f"Key column '{column}' has duplicate values, using first match")
+        elif column:
+            logger.warning(f"Key column '{column}' not found in CSV")
+        return index
+
+    def get_row_keys(self, column: Optional[str] = None) -> List[str]:
+        """
+        Return the available key values in file order.
+
+        Args:
+            column (str): Key column to list, without making it the live one;
+                defaults to the current key column
+        """
+        with self._read_lock:
+            try:
+                if column is not None and column != self.key_column:
+                    return list(self._build_row_index(self.load_frame(), column))
+                return list(self.get_row_index())
+            except Exception as e:
+                logger.error(f"Error reading row keys: {str(e)}")
+                return []
+
+    def select_row(self, key: Optional[str]) -> bool:
+        """Make the row whose key column equals key the live row."""
+        with self._read_lock:
+            if key is None:
+                self.selected_key = None
+                return True
+
+            key = str(key).strip()
+            try:
+                if key not in self.get_row_index():
+                    logger.error(f"No row with {self.key_column} = '{key}'")
+                    return False
+            except Exception as e:
+                logger.error(f"Error selecting row: {str(e)}")
+                return False
+
+            self.selected_key = key
+            logger.info(f"Selected row {self.key_column} = '{key}'")
+            return True
+
+    def selected_row_offset(self) -> Optional[int]:
+        """Return the offset of the live row, or None if the selected key is gone."""
+        with self._read_lock:
+            if not self.key_column or self.selected_key is None:
+                return 0
+            return self.get_row_index().get(self.selected_key)
+
     def validate_file_path(self, path: str) -> str:
         """Validate and normalize file path."""
         if not path:
@@ -46,13 +293,18 @@ class CSVHandler:
 
         # Verify file exists
         if not os.path.exists(path):
-            logger.warning(f"File not found: {path}")
+            if path not in self._missing_files:  # Looked for again on every read, warn once
+                logger.warning(f"File not found: {path}")
+                self._missing_files.add(path)
             return ""
 
+        self._missing_files.discard(path)
         return path
 
     def process_special_columns(self, value: str, column_name: str) -> Union[str, int]:
         """Process special column types (file paths, hex colors)."""
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            value = ""  # Missing cells (JSON null, Arrow null)
         value = str(value).strip()  # Ensure value is a string and remove whitespace
 
         # Skip empty values
@@ -66,87 +318,321 @@ class CSVHandler:
             color = validate_hex_color(value)
             if color is None:
                 logger.warning(f"Invalid hex color: {value}")
-                return 0  # Return default color (black) if invalid
+                return 0xFF000000  # Return default color (opaque black) if invalid
             return color  # Return the ARGB decimal value
         return value
 
-    def read_csv(self, update_last=True) -> Optional[Dict[str, Union[str, int]]]:
-        """Read and parse the CSV file using column mappings."""
-        try:
-            logger.debug(f"Reading CSV file: {self.csv_path}")
-            df = pd.read_csv(self.csv_path, encoding=CSV_ENCODING)
+    def process_values(self, values: Dict[str, str]) -> Tuple[Dict[str, Union[str, int]], Dict[str, str]]:
+        """
+        Process values sent for sources like the columns the sources are mapped to.
 
-            if df.empty:
-                logger.error("CSV file is empty")
-                return None
+        The mapping is read once, under the read lock, so a mapping switched
+        meanwhile (GUI, profiles) cannot apply to only part of the values.
 
-            if not self.column_mapping:
-                logger.info("No column mapping set. Please configure mapping in the GUI.")
-                return {}
+        Returns:
+            tuple: (source name -> processed value, source name -> mapped column for mapped sources)
+        """
+        with self._read_lock:
+            mapping = self.column_mapping
+            processed = {source_name: self.process_special_columns(value, mapping.get(source_name, source_name))
+                         for source_name, value in values.items()}
+            return processed, {source_name: mapping[source_name] for source_name in values if source_name in mapping}
 
-            source_updates = {}
-            for source_name, csv_column in self.column_mapping.items():
-                if csv_column in df.columns:
-                    try:
-                        value = df[csv_column].iloc[0]
-                        processed_value = self.process_special_columns(value, csv_column)
-                        source_updates[source_name] = processed_value
-                        logger.debug(f"Processed column '{csv_column}' with value: {processed_value}")
-                    except Exception as e:
-                        logger.error(f"Error processing column '{csv_column}': {str(e)}")
-                else:
-                    logger.warning(f"Mapped column '{csv_column}' not found in CSV")
+    def set_tail_mode(self, enabled: bool, rows: int = 1):
+        """
+        Follow an append-only CSV, reading only the rows added since the last read.
+
+        Args:
+            enabled (bool): Turn tail mode on or off
+            rows (int): Number of newest rows shown. With more than one row, source
+                names get a " #1" (newest) to " #N" suffix.
+        """
+        with self._read_lock:
+            if enabled and (self.reader.format_name != "csv" or self.pull_source is not None):
+                logger.error("Tail mode only supports local CSV files")
+                return False
 
-            if update_last and source_updates:
-                self.last_data = source_updates.copy()
-                logger.debug(f"Updated last_data with new values: {source_updates}")
+            self.tail_reader = CSVTailReader(self.csv_path, rows) if enabled else None
+            self.store.clear()
+            self._last_read = None
+            self._pending = None
+            logger.info(f"Tail mode {'enabled' if enabled else 'disabled'} for: {self.csv_path}")
+            return True
 
-            return source_updates
+    def _read_tail(self, mapping=None) -> Optional[Tuple[Dict[str, Union[str, int]], Dict[str, str]]]:
+        """Map the newest rows of an append-only CSV to (source values, raw cells)."""
+        if self.tail_reader.read() is None:
+            return None
 
-        except FileNotFoundError:
-            logger.error(f"CSV file not found: {self.csv_path}")
+        rows = self.tail_reader.latest()
+        if not rows:
+            # A log that has only its header so far: no data yet, checked again on every tick
+            logger.debug(f"No rows in {self.csv_path} yet")
             return None
-        except pd.errors.EmptyDataError:
-            logger.error(f"CSV file is empty: {self.csv_path}")
+
+        source_updates = {}
+        raws = {}
+        numbered = self.tail_reader.max_rows > 1
+        for source_name, csv_column in (self.column_mapping if mapping is None else mapping).items():
+            if csv_column not in self.tail_reader.header:
+                logger.warning(f"Mapped column '{csv_column}' not found in CSV")
+                continue
+            for number, row in enumerate(rows, start=1):
+                name = f"{source_name} #{number}" if numbered else source_name
+                raws[name] = row.get(csv_column, "")
+                source_updates[name] = self.process_special_columns(raws[name], csv_column)
+        return source_updates, raws
+
+    def _read_selected_row(self, mapping=None) -> Optional[Tuple[Dict[str, Union[str, int]], Dict[str, str]]]:
+        """
+        Map the selected row of the parsed file to (source values, raw cells).
+
+        With a mapping other than column_mapping the processed-cell cache is
+        neither used nor replaced.
+        """
+        df = self.load_frame()
+
+        if df.empty:
+            logger.error("CSV file is empty")
             return None
-        except Exception as e:
-            logger.error(f"Error reading CSV file: {str(e)}")
+
+        row = self.selected_row_offset()
+        if row is None:
+            logger.error(f"Selected row {self.key_column} = '{self.selected_key}' no longer exists")
             return None
 
+        row_values = df.iloc[row]
+        source_updates = {}
+        cells = {}
+        previous = self._cells if mapping is None else {}
+        for source_name, csv_column in (self.column_mapping if mapping is None else mapping).items():
+            if csv_column in df.columns:
+                try:
+                    value = row_values[csv_column]
+                    cached = previous.get(source_name)
+                    if cached is not None and cached[0] == csv_column and isinstance(value, str) \
+                            and cached[1] == value and (cached[2] != "" or not value.strip()):
+                        # Cell unchanged, skip path/color validation (a missing file is looked for again)
+                        processed_value = cached[2]
+                    else:
+                        processed_value = self.process_special_columns(value, csv_column)
+                        logger.debug(f"Processed column '{csv_column}' with value: {processed_value}")
+                    source_updates[source_name] = processed_value
+                    cells[source_name] = (csv_column, value, processed_value)
+                except Exception as e:
+                    logger.error(f"Error processing column '{csv_column}': {str(e)}")
+            else:
+                logger.warning(f"Mapped column '{csv_column}' not found in CSV")
+        if mapping is None:
+            self._cells = cells
+        return source_updates, {source_name: cell[1] for source_name, cell in cells.items()}
+
+    @staticmethod
+    def _has_missing_files(values, raws) -> bool:
+        """Check for cells that processed to "" although they were not empty (a picture file that was missing)."""
+        return any(value == "" and isinstance(raws.get(name), str) and raws[name].strip()
+                   for name, value in values.items())
+
+    def _detection_state(self):
+        """Everything the values depend on: the data version (one stat call) and the read settings."""
+        return (self.file_version(), self.key_column, self.selected_key, tuple(self.column_mapping.items()),
+                self.tail_reader.max_rows if self.tail_reader is not None else None)
+
+    def read_csv(self, update_last=True) -> Optional[Dict[str, Union[str, int]]]:
+        """Read and parse the CSV file using column mappings."""
+        with self._read_lock:
+            try:
+                logger.debug(f"Reading CSV file: {self.csv_path}")
+                if not self.column_mapping:
+                    logger.info("No column mapping set. Please configure mapping in the GUI.")
+                    return {}
+
+                state = self._detection_state()
+                # Reused while nothing changed, unless a picture file was missing: it may be there now
+                if self._pending is not None and self._pending[0] == state and not self._pending[3]:
+                    _, source_updates, raws, _ = self._pending  # Read by has_changes(), nothing changed since
+                    source_updates = dict(source_updates)
+                else:
+                    result = self._read_tail() if self.tail_reader is not None else self._read_selected_row()
+                    if result is None:
+                        return None
+                    source_updates, raws = result
+                    self._pending = (state, dict(source_updates), raws, self._has_missing_files(source_updates, raws))
+
+                # Only a change of the data replaces the store, so values pushed through the control
+                # API or edited in the GUI stay until the file really changes
+                if update_last and source_updates and source_updates != self._last_read:
+                    self._last_read = dict(source_updates)
+                    changed = self.store.replace(source_updates, raws)
+                    if changed:
+                        if self.recorder is not None:
+                            self.recorder.record(source_updates, self.content_hash())
+                        logger.debug(f"Updated sources {changed} with new values: {source_updates}")
+
+                return source_updates
+
+            except FileNotFoundError:
+                logger.error(f"CSV file not found: {self.csv_path}")
+                return None
+            except pd.errors.EmptyDataError:
+                logger.error(f"CSV file is empty: {self.csv_path}")
+                return None
+            except Exception as e:
+                logger.error(f"Error reading CSV file: {str(e)}")
+                return None
+
+
+    def read_values(self, mapping: Dict[str, str]) -> Optional[Tuple[Dict[str, Union[str, int]], Dict[str, str]]]:
+        """
+        Map the live row (the newest rows in tail mode) with another mapping, leaving the store as it is.
+
+        Returns:
+            tuple: (source values, raw cells), or None if the data cannot be read
+        """
+        with self._read_lock:
+            try:
+                return self._read_tail(mapping) if self.tail_reader is not None else self._read_selected_row(mapping)
+            except Exception as e:
+                logger.error(f"Error reading values for mapping {mapping}: {str(e)}")
+                return None
+
+    def read_rows(self) -> Optional[List[Dict[str, Union[str, int]]]]:
+        """Read every row of the file as mapped source values, processing each distinct value once."""
+        with self._read_lock:
+            try:
+                df = self.load_frame()
+                if df.empty or not self.column_mapping:
+                    return []
+
+                rows = [{} for _ in range(len(df))]
+                for source_name, csv_column in self.column_mapping.items():
+                    if csv_column not in df.columns:
+                        logger.warning(f"Mapped column '{csv_column}' not found in CSV")
+                        continue
+
+                    processed = {}  # Logos and colors repeat across rows, validate them once
+                    for offset, value in enumerate(df[csv_column]):
+                        key = value if isinstance(value, str) else str(value)
+                        if key not in processed:
+                            processed[key] = self.process_special_columns(value, csv_column)
+                        rows[offset][source_name] = processed[key]
+                return rows
+
+            except Exception as e:
+                logger.error(f"Error reading CSV rows: {str(e)}")
+                return None
 
     def has_changes(self) -> bool:
-        """Check if the CSV file has changed since last read."""
+        """
+        Check if the data changed since the last read.
+
+        The checks are layered from cheap to expensive: an unchanged stat
+        signature (size, mtime_ns, inode) and read settings cost one stat call;
+        a changed signature with identical bytes (file touched or saved as is)
+        costs a read and a hash but no parse; otherwise the file is parsed and
+        only the mapped cells that differ from the last read are processed
+        again. The values found are kept for the read_csv() that follows.
+
+        The values are compared with the last ones read from the file, not
+        with the store, which also holds control API updates and GUI edits.
+        """
         current_data = self.read_csv(update_last=False)
         if current_data is None:
             return False
 
-        has_changed = (self.last_data != current_data)
+        has_changed = (self._last_read != current_data)
         if has_changed:
-            logger.debug(f"Detected changes in CSV data. Old: {self.last_data}, New: {current_data}")
+            logger.debug(f"Detected changes in CSV data. Old: {self._last_read}, New: {current_data}")
 
         return has_changed
 
     def get_available_columns(self) -> list:
         """Get list of available columns in the CSV file."""
-        try:
-            logger.info(f"Reading CSV file for columns: {self.csv_path}")
-            df = pd.read_csv(self.csv_path, encoding=CSV_ENCODING)
+        with self._read_lock:
+            try:
+                logger.info(f"Reading CSV file for columns: {self.csv_path}")
+                if self.tail_reader is not None:
+                    self.tail_reader.read()
+                    return list(self.tail_reader.header or [])
 
-            if df.empty:
-                logger.warning("CSV file is empty")
-                return []
+                df = self.load_frame()
+
+                if df.empty:
+                    logger.warning("CSV file is empty")
+                    return []
 
-            columns = list(df.columns)
-            if not columns:
-                logger.warning("No columns found in CSV file")
+                columns = list(df.columns)
+                if not columns:
+                    logger.warning("No columns found in CSV file")
+                    return []
+
+                logger.info(f"Found {len(columns)} columns in CSV: {columns}")
+                return columns
+
+            except pd.errors.EmptyDataError:
+                logger.error(f"CSV file is empty: {self.csv_path}")
+                return []
+            except Exception as e:
+                logger.error(f"Error getting CSV columns: {str(e)}")
                 return []
 
-            logger.info(f"Found {len(columns)} columns in CSV: {columns}")
-            return columns
+    def write_value(self, column_name: str, new_value: str) -> bool:
+        """Write a value into the live row of the CSV file."""
+        return self.write_values({column_name: new_value})
 
-        except pd.errors.EmptyDataError:
-            logger.error(f"CSV file is empty: {self.csv_path}")
-            return []
-        except Exception as e:
-            logger.error(f"Error getting CSV columns: {str(e)}")
-            return []
\ No newline at end of file
+    def write_values(self, values: Dict[str, str]) -> bool:
+        """
+        Write several column values into the live row of the CSV file, rewriting it once.
+
+        In tail mode the live row is the newest one, the last row of the file.
+        """
+        with self._read_lock:
+            if self.pull_source is not None:
+                logger.warning(f"Cannot write values back to {self.pull_source.url}")
+                return False
+            if self.reader.format_name != "csv":
+                logger.warning(f"Writing values back is only supported for CSV files, not {self.reader.format_name}")
+                return False
+
+            try:
+                row_offset = None if self.tail_reader is not None else self.selected_row_offset()
+                if row_offset is None and self.tail_reader is None:
+                    logger.error(f"Selected row {self.key_column} = '{self.selected_key}' no longer exists")
+                    return False
+
+                # Read CSV into a list
+                with open(self.csv_path, 'r', newline='', encoding=CSV_ENCODING) as f:
+                    reader = csv.reader(f)
+                    header = next(reader)  # Read header row
+                    rows = [row for row in reader if row]  # pandas skips blank lines too
+
+                if row_offset is None:
+                    row_offset = len(rows) - 1  # Tail mode: the newest row is on air
+                if not 0 <= row_offset < len(rows):
+                    logger.error("CSV file has no row to write to")
+                    return False
+
+                missing = [column_name for column_name in values if column_name not in header]
+                if missing:
+                    logger.warning(f"Columns {missing} not found in CSV header!")
+                    return False
+
+                row = rows[row_offset]
+                logger.info(f"Original row from CSV: {row}")
+                for column_name, new_value in values.items():
+                    column_index = header.index(column_name)
+                    row.extend([""] * (column_index + 1 - len(row)))  # Pad short rows
+                    row[column_index] = new_value
+
+                # Write the updated data back to the CSV
+                with open(self.csv_path, 'w', newline='', encoding=CSV_ENCODING) as f:
+                    writer = csv.writer(f)
+                    writer.writerow(header)
+                    writer.writerows(rows)
+
+                logger.info(f"Updated columns with new values: {values}")
+                return True
+
+            except Exception as e:
+                logger.error(f"Error updating CSV: {str(e)}")
+                return False
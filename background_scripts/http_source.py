@@ -0,0 +1,168 @@
+"""HTTP pull source for the OBS CSV Updater plugin."""
+
+import gzip
+import hashlib
+import http.client
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+from background_scripts.logger import logger
+from background_scripts.config import PULL_INTERVAL, PULL_TIMEOUT
+from background_scripts.readers import detect_format, get_reader
+
+CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/vnd.apache.arrow.file": "arrow",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+}
+
+
+class HTTPPullSource:
+    """
+    Polls a CSV/JSON/Arrow URL and parses it only when the content changed.
+
+    The connection is kept alive between polls, and every request carries the
+    last ETag/Last-Modified, so unchanged data costs a 304 with no body. A
+    body that comes back identical (servers without validators) is detected
+    by hash and not parsed again.
+
+    poll() may be called from several threads: one fetch runs at a time on
+    the shared connection, and the parsed data is published with its
+    version in one step, see latest().
+    """
+
+    def __init__(self, url, input_format=None, interval=PULL_INTERVAL, timeout=PULL_TIMEOUT):
+        """Initialize the pull source for a URL."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+
+        self.url = url
+        self.input_format = input_format
+        self.interval = interval
+        self.timeout = timeout
+        self._scheme = parts.scheme
+        self._netloc = parts.netloc
+        self._path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._conn = None
+
+        self.etag = None
+        self.last_modified = None
+        self.content_hash = None
+        self._latest = (0, None)  # (version, frame), the version is bumped every time new content is parsed
+        self._poll_lock = threading.RLock()  # http.client connections are not thread-safe
+        self.last_poll = 0.0
+        logger.info(f"Initialized HTTP pull source for: {url}")
+
+    @property
+    def frame(self):
+        return self._latest[1]
+
+    @property
+    def version(self):
+        return self._latest[0]
+
+    def latest(self):
+        """Return (version, frame) of the last parsed content without fetching; frame is None before the first."""
+        return self._latest
+
+    def _connection(self):
+        """Return the kept-alive connection, opening it if needed."""
+        if self._conn is None:
+            conn_class = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            self._conn = conn_class(self._netloc, timeout=self.timeout)
+        return self._conn
+
+    def _request(self):
+        """Send a conditional GET, reconnecting once if the server closed the idle connection."""
+        headers = {"Accept-Encoding": "gzip", "Connection": "keep-alive"}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.request("GET", self._path, headers=headers)
+                response = conn.getresponse()
+                return response, response.read()
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    http.client.BadStatusLine, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+    def _reader(self, content_type):
+        """Pick the reader from the configured format, the URL extension or the Content-Type."""
+        input_format = self.input_format
+        if not input_format:
+            if os.path.splitext(urlsplit(self.url).path)[1]:
+                input_format = detect_format(urlsplit(self.url).path)
+            else:
+                input_format = CONTENT_TYPES.get((content_type or "").split(";")[0].strip().lower(), "csv")
+        return get_reader(self.url, input_format)
+
+    def poll(self, force=False) -> Optional[int]:
+        """
+        Fetch the URL if the poll interval has passed.
+
+        Returns:
+            int: The content version (changes only when new data was parsed),
+                 or None if no data could be fetched yet
+        """
+        with self._poll_lock:
+            return self._poll(force)
+
+    def _poll(self, force):
+        now = time.monotonic()
+        if not force and self.frame is not None and now - self.last_poll < self.interval:
+            return self.version
+        self.last_poll = now
+
+        try:
+            response, body = self._request()
+            if response.status == 304:
+                logger.debug(f"{self.url} not modified")
+                return self.version
+            if response.status != 200:
+                logger.error(f"HTTP {response.status} fetching {self.url}")
+                return self.version if self.frame is not None else None
+
+            if response.getheader("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+            self.etag = response.getheader("ETag")
+            self.last_modified = response.getheader("Last-Modified")
+
+            content_hash = hashlib.blake2b(body, digest_size=16).digest()
+            if content_hash == self.content_hash:
+                logger.debug(f"{self.url} returned unchanged content")
+                return self.version
+
+            frame = self._reader(response.getheader("Content-Type")).read_buffer(body)
+            self.content_hash = content_hash
+            self._latest = (self.version + 1, frame)
+            logger.info(f"Fetched new data from {self.url} ({len(self.frame)} rows)")
+            return self.version
+
+        except Exception as e:
+            self.close()
+            logger.error(f"Error fetching {self.url}: {str(e)}")
+            return self.version if self.frame is not None else None
+
+    def close(self):
+        """Close the kept-alive connection."""
+        with self._poll_lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
@@ -8,6 +8,9 @@ def setup_logger():
     """Configure and return the logger instance."""
     logger = logging.getLogger('OBSCSVUpdater')
     logger.setLevel(getattr(logging, LOG_LEVEL))
+    if logger.handlers:
+        return logger  # Already set up, more handlers would duplicate lines and open files
+
 
     # Create handlers
     file_handler = RotatingFileHandler(
@@ -0,0 +1,37 @@
+"""Lightweight in-process metrics for the OBS CSV Updater plugin."""
+
+import threading
+
+
+class Metrics:
+    """Thread-safe counters and timing summaries."""
+
+    def __init__(self):
+        """Initialize empty counters and timings."""
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.timings = {}
+
+    def incr(self, name, amount=1):
+        """Add amount to the counter called name."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """Record one measurement (for example a latency in seconds) under name."""
+        with self._lock:
+            stats = self.timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["total"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def snapshot(self):
+        """Return a copy of all counters and timings."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "timings": {name: dict(stats) for name, stats in self.timings.items()},
+            }
+
+
+metrics = Metrics()
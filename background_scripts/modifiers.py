@@ -0,0 +1,160 @@
+"""Global modifiers applied to a source across every scene."""
+
+from background_scripts.logger import logger
+
+OPACITY_FILTER_NAME = "CSV Global Opacity"
+TRANSFORM_KEYS = (
+    "positionX", "positionY", "rotation", "scaleX", "scaleY",
+    "alignment", "boundsType", "boundsAlignment", "boundsWidth", "boundsHeight",
+    "cropLeft", "cropRight", "cropTop", "cropBottom",
+)
+
+
+class GlobalModifiers:
+    """
+    Applies transform, visibility and opacity changes to one source in every
+    scene that shows it, as a single request batch per change.
+    """
+
+    def __init__(self, obs_controller, scene_index):
+        """Initialize the modifiers with a controller and its scene item index."""
+        self.obs_controller = obs_controller
+        self.scene_index = scene_index
+        self._opacity_filters = {}  # Input name -> whether it has the opacity filter, once known
+
+    def _items(self, input_name):
+        """Return the scene items of an input, building the index on first use."""
+        if not self.scene_index.built:
+            self.scene_index.build()
+        items = self.scene_index.items_for(input_name)
+        if not items:
+            logger.warning(f"Source '{input_name}' is not in any scene")
+        return items
+
+    def _send(self, requests, description):
+        """Send a batch and report whether every request succeeded."""
+        results = self.obs_controller.send_batch(requests)
+        if results is None:
+            return False
+        success = all(result["requestStatus"]["result"] for result in results)
+        if success:
+            logger.info(f"Applied {description}")
+        return success
+
+    def _filter_opacity(self, input_name):
+        """Return the opacity set by the input's opacity filter, 1.0 without one, or None if it cannot be read."""
+        results = self.obs_controller.send_batch([
+            {"requestType": "GetSourceFilterList", "requestData": {"sourceName": input_name}},
+        ])
+        if not results or not results[0]["requestStatus"]["result"]:
+            return None
+        for source_filter in results[0]["responseData"]["filters"]:
+            if source_filter["filterName"] == OPACITY_FILTER_NAME:
+                self._opacity_filters[input_name] = True
+                return float(source_filter.get("filterSettings", {}).get("opacity", 1.0))
+        self._opacity_filters[input_name] = False
+        return 1.0
+
+    def read_state(self, input_name):
+        """
+        Read a source's current visibility, opacity and rotation (from the first scene that shows it).
+
+        Returns:
+            dict: {"visible": bool, "opacity": float, "rotation": float}, or None if it cannot be read
+        """
+        items = self._items(input_name)
+        if not items:
+            return None
+        scene, item_id = items[0]
+        item = {"sceneName": scene, "sceneItemId": item_id}
+        results = self.obs_controller.send_batch([
+            {"requestType": "GetSceneItemEnabled", "requestData": item},
+            {"requestType": "GetSceneItemTransform", "requestData": item},
+        ])
+        if not results or not all(result["requestStatus"]["result"] for result in results):
+            return None
+        opacity = self._filter_opacity(input_name)
+        if opacity is None:
+            return None
+        return {
+            "visible": bool(results[0]["responseData"]["sceneItemEnabled"]),
+            "opacity": opacity,
+            "rotation": float(results[1]["responseData"]["sceneItemTransform"].get("rotation", 0.0)),
+        }
+
+    def apply_transform(self, input_name, **transform):
+        """
+        Set transform values (positionX, rotation, scaleX, ...) on every scene item of a source.
+
+        Example:
+            modifiers.apply_transform("Player 1 Picture", rotation=15.0, scaleX=0.5, scaleY=0.5)
+        """
+        unknown = set(transform) - set(TRANSFORM_KEYS)
+        if unknown:
+            logger.error(f"Unknown transform settings: {sorted(unknown)}")
+            return False
+
+        items = self._items(input_name)
+        return bool(items) and self._send([
+            {
+                "requestType": "SetSceneItemTransform",
+                "requestData": {"sceneName": scene, "sceneItemId": item_id, "sceneItemTransform": transform},
+            }
+            for scene, item_id in items
+        ], f"transform {transform} to '{input_name}' in {len(items)} scene items")
+
+    def set_visible(self, input_name, visible):
+        """Show or hide a source in every scene."""
+        items = self._items(input_name)
+        return bool(items) and self._send([
+            {
+                "requestType": "SetSceneItemEnabled",
+                "requestData": {"sceneName": scene, "sceneItemId": item_id, "sceneItemEnabled": bool(visible)},
+            }
+            for scene, item_id in items
+        ], f"visibility {bool(visible)} to '{input_name}' in {len(items)} scene items")
+
+    def set_opacity(self, input_name, opacity):
+        """
+        Set a source's opacity (0.0 - 1.0) everywhere it is shown.
+
+        Opacity is a color correction filter on the input itself, so one filter
+        covers every scene. It is only added once the opacity goes below 100%.
+        """
+        opacity = min(max(float(opacity), 0.0), 1.0)
+        has_filter = self._opacity_filters.get(input_name)
+        if has_filter is None:
+            if self._filter_opacity(input_name) is None:
+                return False
+            has_filter = self._opacity_filters[input_name]
+        if not has_filter and opacity >= 1.0:
+            logger.debug(f"'{input_name}' is fully opaque already, no opacity filter needed")
+            return True
+
+        if has_filter:
+            request = {
+                "requestType": "SetSourceFilterSettings",
+                "requestData": {
+                    "sourceName": input_name,
+                    "filterName": OPACITY_FILTER_NAME,
+                    "filterSettings": {"opacity": opacity},
+                },
+            }
+        else:
+            request = {
+                "requestType": "CreateSourceFilter",
+                "requestData": {
+                    "sourceName": input_name,
+                    "filterName": OPACITY_FILTER_NAME,
+                    "filterKind": "color_filter_v2",
+                    "filterSettings": {"opacity": opacity},
+                },
+            }
+
+        results = self.obs_controller.send_batch([request])
+        if not results or not results[0]["requestStatus"]["result"]:
+            self._opacity_filters.pop(input_name, None)  # Removed or added by hand, read it again next time
+            return False
+        self._opacity_filters[input_name] = True
+        logger.info(f"Applied opacity {opacity} to '{input_name}'")
+        return True
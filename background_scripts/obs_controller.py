@@ -1,9 +1,60 @@
+import json
+import threading
 import time
+import uuid
 import obsws_python as obs
 from background_scripts.logger import logger
-from background_scripts.config import MAX_RETRIES, RETRY_DELAY
+from background_scripts.config import MAX_RETRIES, RETRY_DELAY, SOURCES_SCENE
 from background_scripts.hex_converter import validate_hex_color  # Import the hex converter function
 
+
+def get_input_kind(source_name):
+    """Pick the OBS input kind from the markers in a source name."""
+    name = source_name.lower()
+    if "picture" in name:
+        return "image_source"
+    elif "color" in name:
+        return "color_source_v3"
+    elif "browser" in name:
+        return "browser_source"
+    elif "media" in name:
+        return "ffmpeg_source"
+    return "text_ft2_source_v2"  # Default to text source
+
+
+# Input kinds that reload (page reload, ffmpeg restart) whenever their URL/file is set
+RELOADING_KINDS = ("browser_source", "ffmpeg_source")
+
+
+def build_input_settings(source_name, value, input_kind=None):
+    """
+    Build the input settings dict sent to OBS for a source value.
+
+    Args:
+        input_kind (str): OBS input kind, derived from the source name if not given
+        value: The value as text, or a color already converted to a BGRA int
+
+    Returns:
+        dict: Settings for SetInputSettings/CreateInput, or None if the value is invalid
+    """
+    input_kind = input_kind or get_input_kind(source_name)
+    if input_kind == "image_source":
+        return {"file": str(value)}
+    elif input_kind == "color_source_v3":
+        if isinstance(value, int) and 0 <= value <= 0xFFFFFFFF:
+            return {"color": value}  # Converted when it was read, as text it would be parsed as hex again
+        color = validate_hex_color(str(value))
+        if not color:
+            logger.error(f"Invalid color format for source '{source_name}' with value '{value}'")
+            return None
+        return {"color": color}
+    elif input_kind == "browser_source":
+        return {"url": str(value)}
+    elif input_kind == "ffmpeg_source":
+        return {"local_file": str(value)}
+    return {"text": str(value)}
+
+
 class OBSController:
     def __init__(self, host, port, password=None):
         """Initialize the OBS WebSocket connection."""
@@ -11,6 +62,9 @@ class OBSController:
         self.port = port
         self.password = password if password else None  # Convert empty string to None
         self.client = None
+        self.events = None  # Event connection, opened by subscribe()
+        self._sent_settings = {}  # Last settings pushed per input, see sent_settings()
+        self._request_lock = threading.RLock()  # One request/response exchange on the socket at a time
         logger.info(f"Initializing OBS Controller with host={host}, port={port}, using authentication: {bool(self.password)}")
 
     def connect(self):
@@ -18,6 +72,9 @@ class OBSController:
         Establish connection to OBS WebSocket server with retry mechanism.
         Returns True if connection successful, False otherwise.
         """
+        # Reconnecting replaces the clients, close the old sockets (and the event thread) first
+        self.disconnect()
+
         for attempt in range(MAX_RETRIES):
             try:
                 logger.info(f"Attempting to connect to OBS WebSocket (attempt {attempt + 1}/{MAX_RETRIES})")
@@ -44,6 +101,7 @@ class OBSController:
                 logger.error(f"Error details: {str(e)}")
                 logger.error(f"Error type: {type(e).__name__}")
 
+            self._close_client()
             if attempt < MAX_RETRIES - 1:
                 logger.info(f"Retrying in {RETRY_DELAY} seconds...")
                 time.sleep(RETRY_DELAY)
@@ -59,71 +117,68 @@ class OBSController:
         )
         return False
 
-    def source_exists(self, source_name):
-        """Check if a source exists in OBS."""
+    def get_input_settings(self, source_name):
+        """Return the current settings of an input, or None if it does not exist."""
         if not self.client:
             logger.error("Not connected to OBS")
-            return False
+            return None
 
         try:
-            self.client.get_input_settings(source_name)
-            return True
+            with self._request_lock:
+                return self.client.get_input_settings(source_name).input_settings
         except Exception as e:
             logger.debug(f"Source '{source_name}' does not exist: {str(e)}")
-            return False
+            return None
+
+    def source_exists(self, source_name):
+        """Check if a source exists in OBS."""
+        return self.get_input_settings(source_name) is not None
 
-    def create_text_source(self, source_name, initial_text=""):
-        """Create a new text source in OBS, ensuring 'Sources' scene exists."""
+    def create_text_source(self, source_name, initial_text="", scene_name=SOURCES_SCENE):
+        """
+        Create a new source in OBS, ensuring the scene it goes into ('Sources' by default) exists.
+
+        The input kind comes from the source name and initial_text is its first
+        value, as build_input_settings() takes it (text, or a color int).
+        """
         if not self.client:
             logger.error("Not connected to OBS")
             return False
 
         try:
             # Get the list of scenes
-            scenes_response = self.client.get_scene_list()
-            scene_name = "Sources"
+            with self._request_lock:
+                scenes_response = self.client.get_scene_list()
 
-            # Check if "Sources" scene exists
+            # Check if the scene exists
             scene_exists = any(scene['sceneName'] == scene_name for scene in scenes_response.scenes)
 
-            # Create the "Sources" scene if it does not exist
+            # Create the scene if it does not exist
             if not scene_exists:
                 try:
-                    self.client.create_scene(scene_name)
+                    with self._request_lock:
+                        self.client.create_scene(scene_name)
                     logger.info(f"Created new scene: {scene_name}")
                 except Exception as e:
                     logger.error(f"Failed to create scene '{scene_name}': {str(e)}")
                     return False
 
             # Determine input kind based on source name
-            input_kind = "text_ft2_source_v2"  # Default to text source
-            input_settings = {"text": str(initial_text)}
-
-            if "picture" in source_name.lower():
-                input_kind = "image_source"
-                input_settings = {"file": str(initial_text)}
-            elif "color" in source_name.lower():
-                input_kind = "color_source_v3"
-                color = validate_hex_color(str(initial_text))
-                if not color:
-                    logger.error(f"Invalid color format for source '{source_name}' with value '{initial_text}'")
-                    return False
-                input_settings = {"color": color}
-            elif "browser" in source_name.lower():
-                input_kind = "browser_source"
-                input_settings = {"url": str(initial_text)}
-            elif "media" in source_name.lower():
-                input_kind = "ffmpeg_source"
-                input_settings = {"local_file": str(initial_text)}
-
-            # Create the source in the "Sources" scene
-            self.client.create_input(
-                sceneName=scene_name,
-                inputName=source_name,
-                inputKind=input_kind,
-                inputSettings=input_settings,
-                sceneItemEnabled=True
-            )
+            input_kind = get_input_kind(source_name)
+            input_settings = build_input_settings(source_name, initial_text)
+            if input_settings is None:
+                return False
+
+            # Create the source in the scene
+            with self._request_lock:
+                self.client.create_input(
+                    sceneName=scene_name,
+                    inputName=source_name,
+                    inputKind=input_kind,
+                    inputSettings=input_settings,
+                    sceneItemEnabled=True
+                )
+            self._sent_settings[source_name] = input_settings
 
             logger.info(f"Created new source '{source_name}' in scene '{scene_name}'")
             return True
@@ -132,37 +187,42 @@ class OBSController:
             logger.error(f"Failed to create text source '{source_name}': {str(e)}")
             return False
     
-    def update_source(self, source_name, value):
-        """Update an OBS text source with new value. Create if doesn't exist."""
+    def update_source(self, source_name, value, reload=False, scene_name=SOURCES_SCENE):
+        """
+        Update an OBS text source with new value. Create if doesn't exist (in scene_name).
+
+        Browser and media sources are only re-set when their URL/file changed,
+        since setting it makes OBS reload the page or restart ffmpeg. With
+        reload=True an unchanged browser/media source is refreshed instead.
+        """
         if not self.client:
             logger.error("Not connected to OBS")
             return False
 
         try:
             # Check if source exists, create if it doesn't
-            if not self.source_exists(source_name):
+            current_settings = self.get_input_settings(source_name)
+            if current_settings is None:
                 logger.info(f"Source '{source_name}' doesn't exist, creating it...")
-                if not self.create_text_source(source_name, str(value)):
+                if not self.create_text_source(source_name, value, scene_name):
                     return False
 
             # Determine settings based on source name
-            new_settings = {"text": str(value)}  # default
-
-            if "picture" in source_name.lower():
-                new_settings = {"file": str(value)}
-            elif "color" in source_name.lower():
-                # Use validate_hex_color for color validation
-                color = validate_hex_color(str(value))
-                if not color:
-                    logger.error(f"Invalid color format for source '{source_name}' with value '{value}'")
-                    return False  # Return false if color is invalid
-                new_settings = {"color": color}
-            elif "browser" in source_name.lower():
-                new_settings = {"url": str(value)}
-            elif "media" in source_name.lower():
-                new_settings = {"local_file": str(value)}
-
-            self.client.set_input_settings(source_name, new_settings, True)
+            new_settings = build_input_settings(source_name, value)
+            if new_settings is None:
+                return False  # Return false if color is invalid
+
+            if get_input_kind(source_name) in RELOADING_KINDS and current_settings is not None \
+                    and all(current_settings.get(key) == val for key, val in new_settings.items()):
+                self._sent_settings[source_name] = new_settings
+                if reload:
+                    return self.reload_source(source_name)
+                logger.debug(f"Source '{source_name}' unchanged, not reloading it")
+                return True
+
+            with self._request_lock:
+                self.client.set_input_settings(source_name, new_settings, True)
+            self._sent_settings[source_name] = new_settings
 
             logger.info(f"Updated source '{source_name}' with value: {value}")
             return True
@@ -170,12 +230,13 @@ class OBSController:
             logger.error(f"Failed to update source '{source_name}': {str(e)}")
             return False
 
-    def bulk_update_sources(self, updates):
+    def bulk_update_sources(self, updates, scene_name=SOURCES_SCENE):
         """
         Update multiple OBS sources at once. Create any that don't exist.
 
         Args:
             updates (dict): Dictionary of source names and their new values
+            scene_name (str): Scene that new sources are created in
         """
         if not self.client:
             logger.error("Not connected to OBS")
@@ -183,15 +244,201 @@ class OBSController:
 
         success = True
         for source_name, value in updates.items():
-            if not self.update_source(source_name, value):
+            if not self.update_source(source_name, value, scene_name=scene_name):
                 success = False
         return success
 
+    def send_batch(self, requests, halt_on_failure=False):
+        """
+        Send several requests to OBS in one RequestBatch message.
+
+        Args:
+            requests (list): Request dicts with "requestType" and optional "requestData"
+            halt_on_failure (bool): Stop executing the batch at the first failed request
+
+        Returns:
+            list: One result dict per executed request, or None if the batch could not be sent
+        """
+        if not self.client:
+            logger.error("Not connected to OBS")
+            return None
+        if not requests:
+            return []
+
+        payload = {
+            "op": 8,  # RequestBatch
+            "d": {
+                "requestId": str(uuid.uuid4()),
+                "haltOnFailure": halt_on_failure,
+                "executionType": 0,  # SerialRealtime
+                "requests": requests,
+            },
+        }
+        try:
+            with self._request_lock:
+                ws = self.client.base_client.ws
+                ws.send(json.dumps(payload))
+                response = json.loads(ws.recv())
+
+            results = response["d"]["results"]
+            for result in results:
+                status = result.get("requestStatus", {})
+                if not status.get("result"):
+                    logger.error(f"Batched {result.get('requestType')} failed: "
+                                 f"{status.get('code')} {status.get('comment', '')}")
+            return results
+        except Exception as e:
+            logger.error(f"Failed to send request batch: {str(e)}")
+            return None
+
+    def reload_source(self, source_name):
+        """Refresh a browser source (without cache) or restart a media source."""
+        input_kind = get_input_kind(source_name)
+        if input_kind == "browser_source":
+            request = {"requestType": "PressInputPropertiesButton",
+                       "requestData": {"inputName": source_name, "propertyName": "refreshnocache"}}
+        elif input_kind == "ffmpeg_source":
+            return self.media_action(source_name, "restart")
+        else:
+            logger.warning(f"Source '{source_name}' is not a browser or media source")
+            return False
+
+        results = self.send_batch([request])
+        if not results or not results[0]["requestStatus"]["result"]:
+            return False
+        logger.info(f"Reloaded browser source '{source_name}'")
+        return True
+
+    def sent_settings(self):
+        """Return a copy of the last settings pushed to each input since connecting."""
+        return dict(self._sent_settings)
+
+    def forget_sent_settings(self, *source_names):
+        """Drop the last pushed settings of inputs, so the next update is always sent."""
+        for source_name in source_names:
+            self._sent_settings.pop(source_name, None)
+
+    def media_action(self, source_name, action):
+        """
+        Trigger a media input action.
+
+        Args:
+            action (str): "play", "pause", "stop", "restart", "next" or "previous"
+        """
+        results = self.send_batch([{
+            "requestType": "TriggerMediaInputAction",
+            "requestData": {
+                "inputName": source_name,
+                "mediaAction": f"OBS_WEBSOCKET_MEDIA_INPUT_ACTION_{action.upper()}",
+            },
+        }])
+        if not results or not results[0]["requestStatus"]["result"]:
+            return False
+        logger.info(f"Media action '{action}' on '{source_name}'")
+        return True
+
+    def send_prepared_settings(self, prepared, force=False):
+        """
+        Push pre-built input settings to OBS as a single batch.
+
+        Browser/media settings identical to the last ones pushed are left out so
+        OBS does not reload them, unless force is True.
+
+        Args:
+            prepared (list): SetInputSettings request dicts, see prepare_settings_requests()
+            force (bool): Send every request, even unchanged browser/media settings
+        """
+        requests = []
+        for request in prepared:
+            data = request["requestData"]
+            if not force and get_input_kind(data["inputName"]) in RELOADING_KINDS \
+                    and self._sent_settings.get(data["inputName"]) == data["inputSettings"]:
+                continue
+            requests.append(request)
+
+        results = self.send_batch(requests)
+        if results is None:
+            return False
+
+        for request, result in zip(requests, results):
+            data = request["requestData"]
+            if result["requestStatus"]["result"]:
+                self._sent_settings[data["inputName"]] = data["inputSettings"]
+        return all(result["requestStatus"]["result"] for result in results)
+
+    @staticmethod
+    def prepare_settings_requests(updates):
+        """
+        Convert source values into SetInputSettings batch requests.
+
+        Invalid values are logged and left out, so the result can be sent as-is.
+        """
+        requests = []
+        for source_name, value in updates.items():
+            settings = build_input_settings(source_name, value)
+            if settings is None:
+                continue
+            requests.append({
+                "requestType": "SetInputSettings",
+                "requestData": {"inputName": source_name, "inputSettings": settings, "overlay": True},
+            })
+        return requests
+
+    @staticmethod
+    def prepare_record_requests(records):
+        """
+        Convert source store records into SetInputSettings batch requests.
+
+        Uses each record's kind and processed value as they are, see prepare_settings_requests().
+        """
+        requests = []
+        for record in records:
+            settings = build_input_settings(record.name, record.value, record.kind)
+            if settings is None:
+                continue
+            requests.append({
+                "requestType": "SetInputSettings",
+                "requestData": {"inputName": record.name, "inputSettings": settings, "overlay": True},
+            })
+        return requests
+
+    def subscribe(self, *handlers):
+        """
+        Register OBS event handlers on a shared event connection.
+
+        Handlers are called from the event thread and are matched by name,
+        e.g. on_scene_item_created handles SceneItemCreated.
+        """
+        try:
+            if self.events is None:
+                self.events = obs.EventClient(host=self.host, port=self.port, password=self.password)
+            self.events.callback.register(list(handlers))
+            logger.debug(f"Subscribed to OBS events: {[fn.__name__ for fn in handlers]}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to subscribe to OBS events: {str(e)}")
+            return False
+
+    def _close_client(self):
+        """Close the request socket, if any."""
+        client, self.client = self.client, None
+        if client is not None:
+            try:
+                with self._request_lock:
+                    client.disconnect()
+            except Exception as e:
+                logger.debug(f"Error closing OBS request connection: {str(e)}")
+
     def disconnect(self):
         """Disconnect from OBS WebSocket server."""
+        if not self.client and not self.events:
+            return
         try:
-            if self.client:
-                self.client = None
+            events, self.events = self.events, None
+            if events:
+                events.disconnect()
+            self._close_client()
+            self._sent_settings.clear()
             logger.info("Disconnected from OBS WebSocket")
         except Exception as e:
             logger.error(f"Error disconnecting from OBS: {str(e)}")
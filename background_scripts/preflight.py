@@ -0,0 +1,252 @@
+"""Pre-flight validation of a whole update set before anything is pushed to OBS."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from background_scripts.logger import logger
+from background_scripts.config import PUSH_POLICY, PREFLIGHT_WORKERS
+from background_scripts.hex_converter import validate_hex_color
+from background_scripts.metrics import metrics
+from background_scripts.obs_controller import get_input_kind
+from background_scripts.source_store import SourceRecord
+
+POLICIES = ("best_effort", "all_or_nothing")
+PATH_KINDS = ("image_source", "ffmpeg_source")  # Kinds whose value is a file
+# OBS input kinds that take the same settings as the kind a source name maps to
+COMPATIBLE_KINDS = {
+    "text_ft2_source_v2": ("text_ft2_source_v2", "text_ft2_source", "text_gdiplus_v2", "text_gdiplus_v3"),
+    "color_source_v3": ("color_source_v3", "color_source_v2", "color_source"),
+    "image_source": ("image_source",),
+    "browser_source": ("browser_source",),
+    "ffmpeg_source": ("ffmpeg_source",),
+}
+VECTORIZE_MIN_COLORS = 32  # Below this, checking one by one is faster than building a Series
+
+
+def valid_colors(texts):
+    """
+    Check many color strings at once.
+
+    Vectorized version of validate_hex_color(): a list of booleans telling
+    which of the strings it would accept.
+    """
+    s = pd.Series(list(texts), dtype=object).astype(str).str.strip().str.strip("\"'")
+    digits = s.str.fullmatch(r"\d{9,}")
+    decimal = digits & (pd.to_numeric(s.where(digits, "0"), errors="coerce") <= 0xFFFFFFFF)
+    hex_digits = s.str.lstrip("#")
+    significant = hex_digits.str.lstrip("0").str.len()
+    hex_color = hex_digits.str.fullmatch(r"[0-9A-Fa-f]*") & ((significant <= 6) | (significant == 8))
+    return ((s != "") & ((s == "0") | decimal | hex_color)).tolist()
+
+
+def stat_file(path):
+    """Return why a media file cannot be shown, or None if it can."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "file not found"
+    except OSError as e:
+        return f"cannot read file: {e.strerror}"
+    if not os.path.isfile(path):
+        return "not a file"
+    if st.st_size == 0:
+        return "file is empty"
+    return None
+
+
+class PreflightReport:
+    """
+    Result of a pre-flight check.
+
+    Every problem is a dict with the source, its kind, the check that found
+    it ("path", "color" or "kind"), the value and a message. Errors would
+    fail (or show the wrong thing) in OBS; warnings do not stop a push.
+    """
+
+    def __init__(self, checked, errors, warnings, elapsed):
+        self.checked = checked
+        self.errors = errors
+        self.warnings = warnings
+        self.elapsed = elapsed
+        self.failed = {problem["source"] for problem in errors}
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def sendable(self, names, policy=PUSH_POLICY):
+        """
+        Return the source names to push under a policy.
+
+        "best_effort" sends every source that passed, "all_or_nothing" sends
+        nothing at all if any source failed.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown push policy '{policy}', expected one of {POLICIES}")
+        if policy == "all_or_nothing" and self.errors:
+            return []
+        return [name for name in names if name not in self.failed]
+
+    def summary(self):
+        """One line per problem, for logs and message boxes."""
+        return "\n".join(f"{problem['source']}: {problem['message']}" for problem in self.errors + self.warnings)
+
+    def to_dict(self):
+        return {"ok": self.ok, "checked": self.checked, "errors": self.errors, "warnings": self.warnings,
+                "elapsed_ms": round(self.elapsed * 1000, 3)}
+
+
+class Preflight:
+    """
+    Checks a pending update set as a whole before it is sent.
+
+    Media files are stat'ed in a thread pool (slow on network shares, and
+    independent of each other), colors are checked in one vectorized pass,
+    and source kinds are compared with the inputs OBS has, from one
+    GetInputList request kept up to date by input events.
+    """
+
+    def __init__(self, obs_controller, workers=PREFLIGHT_WORKERS):
+        """Initialize the checks for an OBS controller."""
+        self.obs_controller = obs_controller
+        self.workers = workers
+        self._executor = None
+        self._inputs = None  # input name -> input kind, None until read from OBS
+        self._lock = threading.Lock()
+        self.subscribed = False
+
+    def refresh_inputs(self) -> bool:
+        """Read the name and kind of every input from OBS."""
+        results = self.obs_controller.send_batch([{"requestType": "GetInputList"}])
+        if not results or not results[0]["requestStatus"]["result"]:
+            logger.warning("Could not read the OBS input list, skipping source kind checks")
+            return False
+        with self._lock:
+            self._inputs = {entry["inputName"]: entry["inputKind"] for entry in results[0]["responseData"]["inputs"]}
+        return True
+
+    def subscribe(self) -> bool:
+        """Keep the input list up to date from OBS input events."""
+        self.subscribed = self.obs_controller.subscribe(
+            self.on_input_created,
+            self.on_input_removed,
+            self.on_input_name_changed,
+            self.on_current_scene_collection_changed,
+        )
+        return self.subscribed
+
+    def check_values(self, values, raws=None, base_dir=None):
+        """Check a source name -> processed value dict, see check()."""
+        return self.check([SourceRecord(name, raws.get(name, value) if raws is not None else value, value,
+                                        get_input_kind(name)) for name, value in values.items()], base_dir)
+
+    def check(self, records, base_dir=None) -> PreflightReport:
+        """
+        Check every record of an update set.
+
+        Args:
+            records (list): SourceRecords, e.g. from a source store snapshot
+            base_dir (str): Folder relative paths in the raw cells are resolved against (the data file's)
+
+        Returns:
+            PreflightReport: The problems found
+        """
+        start = time.perf_counter()
+        records = list(records)
+        errors, warnings = [], []
+
+        def problem(record, check, message, value=None):
+            return {"source": record.name, "kind": record.kind, "check": check,
+                    "value": record.raw if value is None else value, "message": message}
+
+        # Source kinds, against what OBS has
+        with self._lock:
+            inputs = self._inputs
+        if inputs is not None:
+            for record in records:
+                obs_kind = inputs.get(record.name)
+                if obs_kind is None:
+                    warnings.append(problem(record, "kind", f"not in OBS yet, will be created as {record.kind}"))
+                elif obs_kind not in COMPATIBLE_KINDS.get(record.kind, (record.kind,)):
+                    errors.append(problem(record, "kind", f"is a {obs_kind} in OBS, expected {record.kind}"))
+
+        # Media files: the processed value is the resolved path, or empty if it was missing when read
+        paths = {}
+        unresolved = {}  # Raw path of a file that was missing when read -> records
+        for record in records:
+            if record.kind not in PATH_KINDS:
+                continue
+            if record.value:
+                paths.setdefault(str(record.value), []).append(record)
+            elif isinstance(record.raw, str) and record.raw.strip():
+                path = record.raw.strip()
+                if not os.path.isabs(path) and base_dir is not None:
+                    path = os.path.abspath(os.path.join(base_dir, path))
+                unresolved.setdefault(path, []).append(record)
+        to_stat = list(paths) + [path for path in unresolved if path not in paths]
+        if to_stat:
+            if len(to_stat) == 1:
+                outcomes = [stat_file(to_stat[0])]
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Preflight")
+                outcomes = self._executor.map(stat_file, to_stat)
+            for path, message in zip(to_stat, outcomes):
+                if message:
+                    errors.extend(problem(record, "path", message, path) for record in paths.get(path, ()))
+                # Nothing would be shown either way, but say whether reading the data again would fix it
+                errors.extend(problem(record, "path", message or "file was added after the data was read, "
+                                                                 "reload the data to send it", path)
+                              for record in unresolved.get(path, ()))
+
+        # Colors: ints were converted when read, so check the text they came from
+        colors = []
+        for record in records:
+            if record.kind != "color_source_v3":
+                continue
+            text = record.raw if isinstance(record.raw, str) else record.value
+            if isinstance(text, int) and not isinstance(text, bool):
+                if not 0 <= text <= 0xFFFFFFFF:
+                    errors.append(problem(record, "color", "color out of range"))
+            else:
+                colors.append((record, "" if text is None else str(text)))
+        if len(colors) >= VECTORIZE_MIN_COLORS:
+            valid = valid_colors(text for _, text in colors)
+        else:
+            valid = [validate_hex_color(text) is not None for _, text in colors]
+        errors.extend(problem(record, "color", "invalid color") for (record, _), ok in zip(colors, valid) if not ok)
+
+        report = PreflightReport(len(records), errors, warnings, time.perf_counter() - start)
+        metrics.observe("preflight_latency", report.elapsed)
+        if errors:
+            metrics.incr("preflight_errors", len(errors))
+            logger.warning(f"Pre-flight found {len(errors)} problems in {len(records)} updates:\n{report.summary()}")
+        return report
+
+    def close(self):
+        """Stop the stat threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    # Event handlers (called from the OBS event thread)
+
+    def on_input_created(self, data):
+        with self._lock:
+            if self._inputs is not None:
+                self._inputs[data.input_name] = data.input_kind
+
+    def on_input_removed(self, data):
+        with self._lock:
+            if self._inputs is not None:
+                self._inputs.pop(data.input_name, None)
+
+    def on_input_name_changed(self, data):
+        with self._lock:
+            if self._inputs is not None and data.old_input_name in self._inputs:
+                self._inputs[data.input_name] = self._inputs.pop(data.old_input_name)
+
+    def on_current_scene_collection_changed(self, data):
+        self.refresh_inputs()
@@ -0,0 +1,281 @@
+"""Named mapping profiles tied to OBS scenes."""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from background_scripts.logger import logger
+from background_scripts.config import PROFILES_FILE, PUSH_POLICY, SOURCES_SCENE
+from background_scripts.metrics import metrics
+
+
+class MappingProfile:
+    """A named source -> column mapping and the scenes that show its sources."""
+
+    def __init__(self, name, mapping, scenes=()):
+        self.name = name
+        self.mapping = dict(mapping)
+        self.scenes = [scene for scene in scenes if scene]
+
+    @property
+    def scene(self):
+        """Scene new sources of the profile are created in."""
+        return self.scenes[0] if self.scenes else SOURCES_SCENE
+
+    def to_dict(self):
+        return {"name": self.name, "scenes": self.scenes, "mapping": self.mapping}
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict) or not data.get("name") or not isinstance(data.get("mapping"), dict):
+            raise ValueError(f"Not a mapping profile: {data}")
+        return cls(str(data["name"]), {str(k): str(v) for k, v in data["mapping"].items()},
+                   [str(scene) for scene in data.get("scenes", [])])
+
+
+class ProfileManager:
+    """
+    Switches between mapping profiles (pre-game, in-game, post-game...).
+
+    Every profile is compiled ahead of time into a ready-to-send
+    SetInputSettings batch for the live row, and compiled again in the
+    background whenever the data changes (in any column, see
+    schedule_compile()), so a switch sends one batch with no parsing or
+    path/color processing. A profile is activated by hand or when OBS
+    switches its program scene to one of the profile's scenes: its batch is
+    sent (only its sources, not every mapped source) and its mapping becomes
+    the handler's column mapping, unless a scene change would replace
+    mapping edits that are not saved as a profile.
+    """
+
+    def __init__(self, get_csv_handler, obs_controller, path=PROFILES_FILE, preflight=None, policy=PUSH_POLICY):
+        """
+        Initialize the manager.
+
+        Args:
+            get_csv_handler (callable): Returns the current CSVHandler (it is replaced when another file is opened)
+            obs_controller (OBSController): Connected controller
+            path (str): JSON file the profiles are kept in
+            preflight (Preflight): Checks compiled batches, invalid values are left out (or the whole
+                batch, with the "all_or_nothing" policy)
+            policy (str): Push policy, see PreflightReport.sendable()
+        """
+        self.get_csv_handler = get_csv_handler
+        self.obs_controller = obs_controller
+        self.path = path
+        self.preflight = preflight
+        self.policy = policy
+        self.profiles = {}  # name -> MappingProfile, in the order they were added
+        self.active = None
+        self.held = None  # Profile a scene change switched to while the handler mapping had unsaved edits
+        self._compiled = {}  # name -> (data state, values, payload)
+        self._lock = threading.RLock()
+        self._compile_lock = threading.Lock()  # Taken by store listeners, never while waiting for another lock
+        self._compiler = None
+        self._compile_pending = False
+        self.subscribed = False
+
+    def load(self) -> bool:
+        """Load the profiles file, if there is one."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            profiles = [MappingProfile.from_dict(entry) for entry in data.get("profiles", [])]
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load mapping profiles from {self.path}: {str(e)}")
+            return False
+
+        with self._lock:
+            self.profiles = {profile.name: profile for profile in profiles}
+            self.active = data.get("active") if data.get("active") in self.profiles else None
+            self._compiled.clear()
+        logger.info(f"Loaded {len(profiles)} mapping profiles from {self.path}")
+        return True
+
+    def save(self) -> bool:
+        """Write the profiles (and the active one) to the profiles file."""
+        with self._lock:
+            data = {"active": self.active, "profiles": [profile.to_dict() for profile in self.profiles.values()]}
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+            return True
+        except OSError as e:
+            logger.error(f"Failed to save mapping profiles to {self.path}: {str(e)}")
+            return False
+
+    def set_profile(self, name, mapping, scenes=()):
+        """Add or replace a profile."""
+        with self._lock:
+            self.profiles[name] = MappingProfile(name, mapping, scenes)
+            self._compiled.pop(name, None)
+        logger.info(f"Saved mapping profile '{name}' for scenes {list(scenes)}")
+        self.schedule_compile()
+
+    def remove_profile(self, name):
+        with self._lock:
+            self.profiles.pop(name, None)
+            self._compiled.pop(name, None)
+            if self.active == name:
+                self.active = None
+
+    def is_saved_mapping(self, mapping) -> bool:
+        """Whether a column mapping is empty or saved as one of the profiles (switching away loses nothing)."""
+        with self._lock:
+            return not mapping or any(profile.mapping == mapping for profile in self.profiles.values())
+
+    def profile_for_scene(self, scene_name):
+        """Return the first profile tied to a scene, or None."""
+        with self._lock:
+            return next((profile for profile in self.profiles.values() if scene_name in profile.scenes), None)
+
+    def attach(self, csv_handler):
+        """Recompile the profiles whenever the handler's data changes."""
+        csv_handler.store.subscribe(self.on_store_changed)
+
+    def detach(self, csv_handler):
+        csv_handler.store.unsubscribe(self.on_store_changed)
+
+    def on_store_changed(self, names):
+        """Source store listener: the data was read again, so the batches may be out of date."""
+        self.schedule_compile()
+
+    def schedule_compile(self):
+        """
+        Compile the out-of-date profiles on the background thread.
+
+        Called when the store changes, and by the change watcher whenever the
+        data changes, also in columns only other profiles map.
+        """
+        with self._compile_lock:
+            if self._compile_pending or not self.profiles:
+                return
+            self._compile_pending = True
+            if self._compiler is None:
+                self._compiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ProfileCompiler")
+            self._compiler.submit(self.compile_all)
+
+    def compile_all(self):
+        with self._compile_lock:
+            self._compile_pending = False
+        with self._lock:
+            profiles = list(self.profiles.values())
+        for profile in profiles:
+            try:
+                self.compile(profile)
+            except Exception as e:
+                logger.error(f"Failed to compile mapping profile '{profile.name}': {str(e)}")
+
+    def _data_state(self, handler, profile):
+        """What a compiled batch depends on: the data version, the live row and the profile's mapping."""
+        return (handler.file_version(), handler.key_column, handler.selected_key,
+                handler.tail_reader.max_rows if handler.tail_reader is not None else None,
+                tuple(profile.mapping.items()))
+
+    def compile(self, profile):
+        """
+        Return (values, batch) for a profile, building them only if the data changed since the last time.
+
+        Returns:
+            tuple: (source values, SetInputSettings requests), or None if the data cannot be read
+        """
+        handler = self.get_csv_handler()
+        state = self._data_state(handler, profile)
+        with self._lock:
+            compiled = self._compiled.get(profile.name)
+        if compiled is not None and compiled[0] == state:
+            return compiled[1], compiled[2]
+
+        start = time.perf_counter()
+        result = handler.read_values(profile.mapping)
+        if result is None:
+            return None
+        values, raws = result
+        names = list(values)
+        if self.preflight is not None:
+            report = self.preflight.check_values(values, raws, os.path.dirname(handler.csv_path))
+            names = report.sendable(values, self.policy)
+        payload = self.obs_controller.prepare_settings_requests({name: values[name] for name in names})
+        with self._lock:
+            if profile.name in self.profiles:
+                self._compiled[profile.name] = (state, values, payload)
+        metrics.observe("profile_compile", time.perf_counter() - start)
+        logger.debug(f"Compiled mapping profile '{profile.name}': {len(payload)} sources")
+        return values, payload
+
+    def activate(self, name, push=True, keep_edits=False) -> bool:
+        """
+        Make a profile the active one.
+
+        The lock is only held to look the profile up: sending and reading run
+        outside it, so a slow OBS does not hold up the compiler.
+
+        Args:
+            name (str): Profile name
+            push (bool): Send the profile's sources to OBS
+            keep_edits (bool): Keep a handler mapping that is not saved as a profile (scene
+                changes); the batch is still sent, and the profile is noted in held
+        """
+        start = time.perf_counter()
+        with self._lock:
+            profile = self.profiles.get(name)
+        if profile is None:
+            logger.error(f"No mapping profile named '{name}'")
+            return False
+
+        success = True
+        if push:
+            compiled = self.compile(profile)  # Compiled in the background unless the data just changed
+            if compiled is None:
+                return False
+            values, payload = compiled
+            success = self.obs_controller.send_prepared_settings(payload) if payload else True
+            if not success:
+                # Usually sources that do not exist yet, created in the profile's scene
+                sent = {request["requestData"]["inputName"] for request in payload}
+                success = self.obs_controller.bulk_update_sources(
+                    {source_name: value for source_name, value in values.items() if source_name in sent},
+                    scene_name=profile.scene)
+
+        # The source list, control API and drift checks follow the active profile
+        held = None
+        handler = self.get_csv_handler()
+        if handler.column_mapping != profile.mapping:
+            if keep_edits and not self.is_saved_mapping(handler.column_mapping):
+                held = name
+                logger.warning(f"Sent mapping profile '{name}' but kept the edited mapping, "
+                               f"save it as a profile or pick '{name}' to switch")
+            else:
+                handler.set_column_mapping(dict(profile.mapping))
+                handler.read_csv()
+        with self._lock:
+            self.active = name
+            self.held = held
+
+        latency = time.perf_counter() - start
+        metrics.incr("profile_switches")
+        metrics.observe("profile_switch_latency", latency)
+        logger.info(f"Activated mapping profile '{name}' in {latency * 1000:.1f} ms")
+        return bool(success)
+
+    def subscribe(self) -> bool:
+        """Activate the profile of every scene OBS switches its program output to."""
+        self.subscribed = self.obs_controller.subscribe(self.on_current_program_scene_changed)
+        return self.subscribed
+
+    def close(self):
+        """Stop the compile thread."""
+        with self._compile_lock:
+            compiler, self._compiler = self._compiler, None
+        if compiler is not None:
+            compiler.shutdown(wait=False)
+
+    # Event handlers (called from the OBS event thread)
+
+    def on_current_program_scene_changed(self, data):
+        profile = self.profile_for_scene(data.scene_name)
+        if profile is not None:
+            self.activate(profile.name, keep_edits=True)
@@ -0,0 +1,189 @@
+"""Input readers for the OBS CSV Updater plugin.
+
+Every reader turns a data file into a pandas DataFrame (one row per record,
+one column per field) so that CSVHandler can stay format-agnostic.
+"""
+
+import io
+import json
+import os
+import pandas as pd
+from typing import Optional
+from background_scripts.logger import logger
+from background_scripts.config import CSV_ENCODING
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Arrow/Parquet support is optional
+    pa = None
+    pq = None
+
+
+class BaseReader:
+    """Base class for input readers."""
+
+    format_name = ""
+    extensions = ()
+    # Text formats are parsed from one in-memory read, which CSVHandler also hashes to skip
+    # re-parsing identical content. Memory-mapped formats are read straight from the path.
+    parse_from_bytes = True
+
+    def read(self, path: str) -> pd.DataFrame:
+        """Read the file at path into a DataFrame."""
+        raise NotImplementedError
+
+    def read_buffer(self, data: bytes) -> pd.DataFrame:
+        """Read an in-memory copy of a file into a DataFrame."""
+        raise NotImplementedError(f"{self.format_name} reader does not support in-memory buffers")
+
+
+class CSVReader(BaseReader):
+    """Reads comma separated files, keeping every value exactly as typed."""
+
+    format_name = "csv"
+    extensions = (".csv", ".txt")
+
+    def _read(self, source) -> pd.DataFrame:
+        # dtype=str stops pandas from re-coercing values ("007" stays "007")
+        # and keep_default_na=False turns empty cells into "" instead of NaN.
+        return pd.read_csv(source, encoding=CSV_ENCODING, dtype=str, keep_default_na=False)
+
+    def read(self, path: str) -> pd.DataFrame:
+        return self._read(path)
+
+    def read_buffer(self, data: bytes) -> pd.DataFrame:
+        return self._read(io.BytesIO(data))
+
+
+class JSONReader(BaseReader):
+    """Reads JSON (a list of records, a single record or a dict of columns) and NDJSON files."""
+
+    format_name = "json"
+    extensions = (".json",)
+
+    def __init__(self, lines: bool = False):
+        self.lines = lines
+        if lines:
+            self.format_name = "ndjson"
+            self.extensions = (".ndjson", ".jsonl")
+
+    def _parse(self, text: str) -> pd.DataFrame:
+        # dtype=object keeps the parsed JSON scalars as they are: without it a null
+        # next to integers turns the column into float64 and 3 is shown as "3.0"
+        if self.lines:
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+            return pd.DataFrame(records, dtype=object)
+
+        data = json.loads(text)
+        if isinstance(data, dict):
+            if all(isinstance(v, list) for v in data.values()):
+                return pd.DataFrame(data, dtype=object)  # Column oriented
+            data = [data]  # A single record
+        return pd.DataFrame(data, dtype=object)
+
+    def read(self, path: str) -> pd.DataFrame:
+        with open(path, 'r', encoding=CSV_ENCODING) as f:
+            return self._parse(f.read())
+
+    def read_buffer(self, data: bytes) -> pd.DataFrame:
+        return self._parse(data.decode(CSV_ENCODING))
+
+
+class ArrowReader(BaseReader):
+    """
+    Reads Arrow IPC (Feather v2) files through a memory map.
+
+    The table is copied out of the map once before the map is closed, so the
+    file is not kept mapped (on Windows a mapped file cannot be replaced by
+    its producer). Columns are wrapped with pd.ArrowDtype, so the DataFrame
+    points at those Arrow buffers instead of copying them into numpy arrays.
+    """
+
+    format_name = "arrow"
+    extensions = (".arrow", ".feather", ".ipc")
+    parse_from_bytes = False
+
+    def _require_pyarrow(self):
+        if pa is None:
+            raise ImportError(f"pyarrow is required to read {self.format_name} files (pip install pyarrow)")
+
+    def _to_pandas(self, table) -> pd.DataFrame:
+        if hasattr(pd, "ArrowDtype"):
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        return table.to_pandas()
+
+    def read(self, path: str) -> pd.DataFrame:
+        self._require_pyarrow()
+        with pa.memory_map(path, 'r') as source:
+            try:
+                table = pa.ipc.open_file(source).read_all()
+            except pa.ArrowInvalid:
+                # Not in the random access file format, fall back to the streaming format
+                source.seek(0)
+                table = pa.ipc.open_stream(source).read_all()
+            # The buffers read point into the map and would keep it open, take() copies them out
+            table = table.take(pa.array(range(table.num_rows), type=pa.int64()))
+        return self._to_pandas(table)
+
+    def read_buffer(self, data: bytes) -> pd.DataFrame:
+        self._require_pyarrow()
+        buffer = pa.py_buffer(data)
+        try:
+            table = pa.ipc.open_file(buffer).read_all()
+        except pa.ArrowInvalid:
+            table = pa.ipc.open_stream(buffer).read_all()
+        return self._to_pandas(table)
+
+
+class ParquetReader(ArrowReader):
+    """Reads Parquet files, memory-mapping the file while the pages are decoded."""
+
+    format_name = "parquet"
+    extensions = (".parquet", ".pq")
+
+    def read(self, path: str) -> pd.DataFrame:
+        self._require_pyarrow()
+        return self._to_pandas(pq.read_table(path, memory_map=True))
+
+    def read_buffer(self, data: bytes) -> pd.DataFrame:
+        self._require_pyarrow()
+        return self._to_pandas(pq.read_table(pa.BufferReader(data)))
+
+
+READERS = {
+    "csv": CSVReader,
+    "json": JSONReader,
+    "ndjson": lambda: JSONReader(lines=True),
+    "arrow": ArrowReader,
+    "parquet": ParquetReader,
+}
+
+SUPPORTED_EXTENSIONS = (
+    CSVReader.extensions + JSONReader.extensions + (".ndjson", ".jsonl")
+    + ArrowReader.extensions + ParquetReader.extensions
+)
+
+
+def detect_format(path: str) -> str:
+    """Guess the input format of a file from its extension (defaults to csv)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in JSONReader.extensions:
+        return "json"
+    if ext in (".ndjson", ".jsonl"):
+        return "ndjson"
+    if ext in ArrowReader.extensions:
+        return "arrow"
+    if ext in ParquetReader.extensions:
+        return "parquet"
+    if ext not in CSVReader.extensions:
+        logger.debug(f"Unknown extension '{ext}' for {path}, reading as CSV")
+    return "csv"
+
+
+def get_reader(path: str, input_format: Optional[str] = None) -> BaseReader:
+    """Return the reader for an explicit format name, or detect it from the file extension."""
+    input_format = (input_format or detect_format(path)).lower()
+    if input_format not in READERS:
+        raise ValueError(f"Unsupported input format: {input_format}")
+    return READERS[input_format]()
@@ -0,0 +1,140 @@
+"""Drift reconciliation between the settings the app last pushed and OBS."""
+
+import os
+import threading
+from background_scripts.logger import logger
+from background_scripts.config import RECONCILE_INTERVAL
+from background_scripts.metrics import metrics
+
+# Values OBS leaves out of GetInputSettings while a setting is at its default
+SETTING_DEFAULTS = {"color": 0xFFFFFFFF, "text": "", "file": "", "url": "", "local_file": ""}
+PATH_SETTINGS = ("file", "local_file")
+
+
+def normalize_setting(key, value):
+    """Normalize a setting value so equal values compare equal regardless of representation."""
+    if value is None:
+        value = SETTING_DEFAULTS.get(key, "")
+    if key == "color":
+        try:
+            return int(value) & 0xFFFFFFFF
+        except (TypeError, ValueError):
+            return value
+    if key in PATH_SETTINGS:
+        return os.path.normcase(os.path.normpath(str(value))) if value else ""
+    if key == "url":
+        return str(value).strip()
+    return value
+
+
+def settings_match(expected, actual):
+    """Check that every expected setting has the same normalized value in OBS."""
+    return all(
+        normalize_setting(key, value) == normalize_setting(key, actual.get(key))
+        for key, value in expected.items()
+    )
+
+
+class DriftReconciler:
+    """
+    Periodically checks that OBS still shows what the app last pushed.
+
+    Every input the app pushed settings to since connecting (see
+    OBSController.sent_settings()) is read back in one GetInputSettings
+    batch. Only the inputs whose settings differ (changed by hand, reset by
+    a scene collection switch) are pushed again. Inputs deleted in OBS are
+    not created again here, they are only dropped from the checks until the
+    app pushes them again.
+    """
+
+    def __init__(self, obs_controller, interval=RECONCILE_INTERVAL, paused=None):
+        """
+        Initialize the reconciler.
+
+        Args:
+            obs_controller (OBSController): Connected controller
+            interval (float): Seconds between checks
+            paused (callable): Returns True while checks should be skipped (e.g. while rows rotate)
+        """
+        self.obs_controller = obs_controller
+        self.interval = float(interval)
+        self.paused = paused
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self):
+        """
+        Compare OBS with the settings last pushed and re-send mismatched inputs.
+
+        Returns:
+            list: Names of the sources that had drifted, or None if OBS could not be read
+        """
+        if self.paused is not None and self.paused():
+            return []
+        expected = self.obs_controller.sent_settings()
+        if not expected:
+            return []
+
+        results = self.obs_controller.send_batch([
+            {"requestType": "GetInputSettings", "requestId": name, "requestData": {"inputName": name}}
+            for name in expected
+        ])
+        if results is None:
+            return None
+        metrics.incr("reconcile_checks")
+
+        drifted, missing = [], []
+        for result in results:
+            source_name = result.get("requestId")
+            if source_name not in expected:
+                continue
+            if not result["requestStatus"]["result"]:
+                missing.append(source_name)
+            elif not settings_match(expected[source_name], result["responseData"]["inputSettings"]):
+                drifted.append(source_name)
+
+        # Settings pushed while OBS was being read are newer than the ones compared
+        current = self.obs_controller.sent_settings()
+        drifted = [name for name in drifted if current.get(name) == expected[name]]
+        if drifted:
+            logger.warning(f"Sources drifted from the values last sent, re-sending: {drifted}")
+            self.obs_controller.send_prepared_settings([
+                {"requestType": "SetInputSettings",
+                 "requestData": {"inputName": name, "inputSettings": expected[name], "overlay": True}}
+                for name in drifted
+            ], force=True)
+        if missing:
+            logger.warning(f"Sources removed in OBS, no longer checking them until they are sent again: {missing}")
+            self.obs_controller.forget_sent_settings(*missing)
+
+        if drifted or missing:
+            metrics.incr("drift_events", len(drifted) + len(missing))
+        return drifted + missing
+
+    def start(self):
+        """Start checking in a background thread."""
+        if self.running or self.interval <= 0:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="DriftReconciler", daemon=True)
+        self._thread.start()
+        logger.info(f"Started drift reconciliation every {self.interval} seconds")
+
+    def stop(self):
+        """Stop the background checks."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        """Worker loop."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error reconciling OBS state: {str(e)}")
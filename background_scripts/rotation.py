@@ -0,0 +1,189 @@
+"""Timed row rotation for the OBS CSV Updater plugin."""
+
+import threading
+import time
+from background_scripts.logger import logger
+from background_scripts.config import ROTATION_INTERVAL
+from background_scripts.obs_controller import get_input_kind
+
+
+class RowRotator:
+    """
+    Cycles through the rows of the data file on a timer, pushing each row's
+    mapped values to OBS (lower-thirds, sponsor carousels).
+
+    Every row is turned into a ready-to-send SetInputSettings batch once per
+    file version, so a tick is a single batch send with no parsing. With a
+    BrowserPreloader, the browser pages of the next row are loaded in hidden
+    duplicates right after a tick and swapped in on the next one, so a new
+    page goes on air already rendered.
+    """
+
+    def __init__(self, csv_handler, obs_controller, interval=ROTATION_INTERVAL, preloader=None):
+        """Initialize the rotator for a CSV handler and OBS controller (and an optional BrowserPreloader)."""
+        self.csv_handler = csv_handler
+        self.obs_controller = obs_controller
+        self.interval = float(interval)
+        self.preloader = preloader
+        self._preloaded = {}  # Browser source -> settings loaded in its hidden duplicate
+        self._on_air = {}  # Browser source -> settings it shows
+
+        self.payloads = []  # One prepared batch per row
+        self.position = 0  # Row pushed on the next tick
+        self._version = None
+        self._created_sources = set()
+
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._paused = False
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    @property
+    def current_row(self):
+        """Offset of the row currently on air, or None before the first tick."""
+        if not self.payloads or self.position == 0:
+            return None
+        return (self.position - 1) % len(self.payloads)
+
+    def prepare(self) -> bool:
+        """Build the per-row payloads if the file changed since they were last built."""
+        version = self.csv_handler.file_version()
+        if version is not None and version == self._version and self.payloads:
+            return True
+
+        rows = self.csv_handler.read_rows()
+        if not rows:
+            logger.error("Rotation has no rows to show")
+            return False
+
+        # Make sure every source exists once, so ticks only have to update settings
+        for source_name, value in rows[0].items():
+            if source_name not in self._created_sources:
+                if not self.obs_controller.source_exists(source_name):
+                    # The processed value as is: a color is already an int, as text it would be parsed again
+                    self.obs_controller.create_text_source(source_name, value)
+                self._created_sources.add(source_name)
+
+        payloads = [self.obs_controller.prepare_settings_requests(row) for row in rows]
+        with self._lock:
+            self.payloads = payloads
+            self._version = version
+        logger.info(f"Prepared rotation payloads for {len(payloads)} rows")
+        return True
+
+    def start(self) -> bool:
+        """Start rotating rows in a background thread."""
+        if self.running:
+            return True
+        if not self.prepare():
+            return False
+
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._paused = False
+        self._thread = threading.Thread(target=self._run, name="RowRotator", daemon=True)
+        self._thread.start()
+        logger.info(f"Started row rotation every {self.interval} seconds")
+        return True
+
+    def stop(self):
+        """Stop rotating and wait for the worker thread to finish."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        logger.info("Stopped row rotation")
+
+    def pause(self):
+        """Keep the current row on air until resume() is called."""
+        self._paused = True
+        logger.info("Paused row rotation")
+
+    def resume(self):
+        """Continue rotating from the next row."""
+        self._paused = False
+        logger.info("Resumed row rotation")
+
+    def skip(self, steps=1):
+        """Show the row `steps` away from the one on air right now (negative goes back)."""
+        with self._lock:
+            self.position += steps - 1
+        self._wake_event.set()
+
+    def _tick(self):
+        """Push the next row's prepared batch to OBS."""
+        try:
+            self.prepare()  # A stat call unless the file changed
+        except Exception as e:
+            logger.error(f"Error refreshing rotation payloads: {str(e)}")
+
+        with self._lock:
+            if not self.payloads:
+                return
+            offset = self.position % len(self.payloads)
+            payload = self.payloads[offset]
+            next_payload = self.payloads[(offset + 1) % len(self.payloads)]
+            self.position = offset + 1
+
+        if self.preloader is not None:
+            payload = self._swap_preloaded(payload)
+        if not self.obs_controller.send_prepared_settings(payload):
+            logger.warning(f"Rotation failed to update some sources for row {offset}")
+        if self.preloader is not None:
+            self._preload(next_payload)
+
+    def _swap_preloaded(self, payload):
+        """Swap in the browser pages preloaded for this row, returning the requests still to send."""
+        remaining = []
+        for request in payload:
+            data = request["requestData"]
+            name = data["inputName"]
+            if name in self._preloaded and self._preloaded.pop(name) == data["inputSettings"] \
+                    and self.preloader.swap(name):
+                self._on_air[name] = data["inputSettings"]
+                continue
+            remaining.append(request)
+            if get_input_kind(name) == "browser_source":
+                self._on_air[name] = data["inputSettings"]
+        return remaining
+
+    def _preload(self, payload):
+        """Load the browser pages of the next row that differ from the ones on air."""
+        for request in payload:
+            data = request["requestData"]
+            name = data["inputName"]
+            if get_input_kind(name) != "browser_source" or self._on_air.get(name) == data["inputSettings"]:
+                continue
+            if self.preloader.preload(name, data["inputSettings"]["url"]):
+                self._preloaded[name] = data["inputSettings"]
+
+    def _run(self):
+        """Worker loop, ticking on a fixed schedule so late ticks do not push back later ones."""
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            if not self._paused:
+                self._tick()
+
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # Fell behind (slow OBS, suspended machine), skip the missed slots instead of bursting
+                next_tick += (-delay // self.interval + 1) * self.interval
+                delay = next_tick - time.monotonic()
+
+            if self._wake_event.wait(delay):
+                # Woken by skip() or stop(), restart the schedule from now
+                self._wake_event.clear()
+                next_tick = time.monotonic()
+                if self._paused and not self._stop_event.is_set():
+                    self._tick()  # A skip while paused still changes the row
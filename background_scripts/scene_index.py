@@ -0,0 +1,114 @@
+"""Index of where every input appears across OBS scenes."""
+
+import threading
+from typing import List, Tuple
+from background_scripts.logger import logger
+
+
+class SceneItemIndex:
+    """
+    Maps input names to every (scene, sceneItemId) that shows them.
+
+    The index is built with two request batches (scene list, then every
+    scene's item list) and kept fresh from scene-item events, so changes
+    that touch all scenes do not need a GetSceneItemList call per scene.
+    Items inside groups are indexed under the group name, which is what
+    the scene-item requests expect as sceneName for them.
+    """
+
+    def __init__(self, obs_controller):
+        """Initialize an empty index for an OBS controller."""
+        self.obs_controller = obs_controller
+        self._items = {}  # input name -> set of (scene name, scene item id)
+        self._lock = threading.Lock()
+        self.built = False
+        self.subscribed = False
+
+    def build(self) -> bool:
+        """(Re)build the whole index from OBS."""
+        results = self.obs_controller.send_batch([{"requestType": "GetSceneList"}])
+        if not results or not results[0]["requestStatus"]["result"]:
+            logger.error("Failed to read the scene list for the scene item index")
+            return False
+
+        scenes = [scene["sceneName"] for scene in results[0]["responseData"]["scenes"]]
+        items = {}
+        groups = set()
+        pending = [("GetSceneItemList", scene) for scene in scenes]
+        while pending:
+            results = self.obs_controller.send_batch([
+                {"requestType": request_type, "requestId": scene, "requestData": {"sceneName": scene}}
+                for request_type, scene in pending
+            ])
+            if results is None:
+                return False
+
+            pending = []
+            for result in results:
+                if not result["requestStatus"]["result"]:
+                    continue
+                scene = result["requestId"]
+                for item in result["responseData"]["sceneItems"]:
+                    items.setdefault(item["sourceName"], set()).add((scene, item["sceneItemId"]))
+                    if item.get("isGroup") and item["sourceName"] not in groups:
+                        groups.add(item["sourceName"])
+                        pending.append(("GetGroupSceneItemList", item["sourceName"]))
+
+        with self._lock:
+            self._items = items
+            self.built = True
+        logger.info(f"Indexed {sum(len(v) for v in items.values())} scene items across {len(scenes)} scenes")
+        return True
+
+    def subscribe(self) -> bool:
+        """Keep the index up to date from OBS scene and input events."""
+        self.subscribed = self.obs_controller.subscribe(
+            self.on_scene_item_created,
+            self.on_scene_item_removed,
+            self.on_scene_removed,
+            self.on_scene_name_changed,
+            self.on_input_name_changed,
+            self.on_input_removed,
+            self.on_current_scene_collection_changed,
+        )
+        return self.subscribed
+
+    def items_for(self, input_name) -> List[Tuple[str, int]]:
+        """Return every (scene, sceneItemId) showing the input."""
+        with self._lock:
+            return sorted(self._items.get(input_name, ()))
+
+    # Event handlers (called from the OBS event thread)
+
+    def on_scene_item_created(self, data):
+        with self._lock:
+            self._items.setdefault(data.source_name, set()).add((data.scene_name, data.scene_item_id))
+
+    def on_scene_item_removed(self, data):
+        with self._lock:
+            self._items.get(data.source_name, set()).discard((data.scene_name, data.scene_item_id))
+
+    def on_scene_removed(self, data):
+        with self._lock:
+            for entries in self._items.values():
+                entries.difference_update({entry for entry in entries if entry[0] == data.scene_name})
+
+    def on_scene_name_changed(self, data):
+        with self._lock:
+            for entries in self._items.values():
+                renamed = {entry for entry in entries if entry[0] == data.old_scene_name}
+                entries.difference_update(renamed)
+                entries.update((data.scene_name, item_id) for _, item_id in renamed)
+
+    def on_input_name_changed(self, data):
+        with self._lock:
+            if data.old_input_name in self._items:
+                self._items[data.input_name] = self._items.pop(data.old_input_name)
+
+    def on_input_removed(self, data):
+        with self._lock:
+            self._items.pop(data.input_name, None)
+
+    def on_current_scene_collection_changed(self, data):
+        logger.info("Scene collection changed, rebuilding the scene item index")
+        self.build()
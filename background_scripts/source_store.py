@@ -0,0 +1,159 @@
+"""Typed, versioned store of the source values shared by the GUI and the pipeline."""
+
+import threading
+from types import MappingProxyType
+from background_scripts.logger import logger
+from background_scripts.obs_controller import get_input_kind
+
+
+class SourceRecord:
+    """
+    One source's value: the raw cell as read, the processed value sent to
+    OBS (resolved path, BGRA color int, text), the OBS input kind and a
+    version that counts the source's changes. Records are never modified,
+    a change replaces the record.
+    """
+
+    __slots__ = ("name", "raw", "value", "kind", "version")
+
+    def __init__(self, name, raw, value, kind, version=1):
+        self.name = name
+        self.raw = raw
+        self.value = value
+        self.kind = kind
+        self.version = version
+
+    def __repr__(self):
+        return f"SourceRecord({self.name!r}, raw={self.raw!r}, value={self.value!r}, kind={self.kind!r}, " \
+               f"version={self.version})"
+
+
+class StoreSnapshot:
+    """
+    Read-only view of the store at one version.
+
+    records maps source name -> SourceRecord and values maps source name ->
+    processed value, both in insertion order.
+    """
+
+    __slots__ = ("version", "records", "values")
+
+    def __init__(self, version, records):
+        self.version = version
+        self.records = MappingProxyType(records)
+        self.values = MappingProxyType({name: record.value for name, record in records.items()})
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return name in self.records
+
+    def get(self, name):
+        return self.records.get(name)
+
+
+class SourceStore:
+    """
+    The current value of every source, as one copy-on-write mapping.
+
+    Writers build a new snapshot under a lock and swap it in; readers (the
+    GUI, worker threads) take the current snapshot with a plain attribute
+    read and never lock, since a snapshot never changes once published.
+    Listeners are told which sources changed after every write, on the
+    writer's thread, so they should only take note and return.
+    """
+
+    def __init__(self):
+        """Initialize an empty store."""
+        self._lock = threading.Lock()
+        self._snapshot = StoreSnapshot(0, {})
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Call listener(names) with the names of the changed (or removed) sources after every change."""
+        if listener not in self._listeners:
+            self._listeners = self._listeners + [listener]
+
+    def unsubscribe(self, listener):
+        self._listeners = [fn for fn in self._listeners if fn != listener]
+
+    def _publish(self, names):
+        for listener in self._listeners:
+            try:
+                listener(names)
+            except Exception as e:
+                logger.error(f"Source store listener failed: {str(e)}")
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def snapshot(self) -> StoreSnapshot:
+        """Return the current snapshot (safe to keep and read from any thread)."""
+        return self._snapshot
+
+    def get(self, name):
+        """Return the record of a source, or None."""
+        return self._snapshot.records.get(name)
+
+    def _write(self, values, raws, replace):
+        with self._lock:
+            current = self._snapshot.records
+            records = {} if replace else dict(current)
+            changed = []
+            for name, value in values.items():
+                raw = raws.get(name, value) if raws is not None else value
+                record = current.get(name)
+                if record is not None and record.value == value and record.raw == raw \
+                        and type(record.value) is type(value):
+                    records[name] = record
+                    continue
+                records[name] = SourceRecord(name, raw, value, record.kind if record else get_input_kind(name),
+                                             record.version + 1 if record else 1)
+                changed.append(name)
+            if replace:
+                changed.extend(name for name in current if name not in records)
+
+            if changed:
+                self._snapshot = StoreSnapshot(self._snapshot.version + 1, records)
+        if changed:
+            self._publish(changed)
+        return changed
+
+    def update(self, values, raws=None):
+        """
+        Set the values of some sources, leaving the others as they are.
+
+        Args:
+            values (dict): Source name -> processed value
+            raws (dict): Source name -> raw value as read (defaults to the processed value)
+
+        Returns:
+            list: Names of the sources whose value changed
+        """
+        return self._write(values, raws, False)
+
+    def replace(self, values, raws=None):
+        """Set the full set of sources (sources not in values are removed), see update()."""
+        return self._write(values, raws, True)
+
+    def remove(self, *names):
+        """Remove sources, returning the names that were in the store."""
+        with self._lock:
+            records = dict(self._snapshot.records)
+            removed = [name for name in names if records.pop(name, None) is not None]
+            if removed:
+                self._snapshot = StoreSnapshot(self._snapshot.version + 1, records)
+        if removed:
+            self._publish(removed)
+        return removed
+
+    def clear(self):
+        """Remove every source."""
+        with self._lock:
+            removed = list(self._snapshot.records)
+            if removed:
+                self._snapshot = StoreSnapshot(self._snapshot.version + 1, {})
+        if removed:
+            self._publish(removed)
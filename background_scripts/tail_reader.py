@@ -0,0 +1,128 @@
+"""Append-only tail reader for log-style CSV files."""
+
+import csv
+import io
+import os
+from collections import deque
+from typing import List, Optional
+from background_scripts.logger import logger
+from background_scripts.config import CSV_ENCODING
+
+
+class CSVTailReader:
+    """
+    Follows a CSV file that only ever grows (goal logs, chat highlights).
+
+    The reader remembers the header and the byte offset of the last complete
+    line it parsed, so a refresh only reads and parses the bytes appended
+    since then. If the file was truncated, replaced or rewritten, it falls
+    back to one full read.
+    """
+
+    FINGERPRINT_SIZE = 64  # Bytes before the offset re-checked to detect rewrites
+
+    def __init__(self, path, max_rows=1):
+        """Initialize the tail reader keeping the last max_rows rows."""
+        self.path = path
+        self.max_rows = max(1, int(max_rows))
+        self.header = None
+        self.rows = deque(maxlen=self.max_rows)
+        self.offset = 0
+        self._header_bytes = b""
+        self._fingerprint = b""
+        self._inode = None
+
+    def reset(self):
+        """Forget everything read so far, forcing a full read next time."""
+        self.header = None
+        self.rows.clear()
+        self.offset = 0
+        self._header_bytes = b""
+        self._fingerprint = b""
+        self._inode = None
+
+    def read(self) -> Optional[List[List[str]]]:
+        """
+        Return the newest rows (oldest first), reading only what was appended.
+
+        Returns:
+            list: Up to max_rows rows as lists of strings, or None if the file is missing
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            logger.error(f"CSV file not found: {self.path}")
+            return None
+
+        with open(self.path, 'rb') as f:
+            if self.header is None or not self._still_same_file(f, st):
+                self._full_read(f, st)
+            elif st.st_size > self.offset:
+                f.seek(self.offset)
+                self._consume(f.read(st.st_size - self.offset))
+
+        return list(self.rows)
+
+    def _still_same_file(self, f, st) -> bool:
+        """Check that the file was only appended to since the last read."""
+        if st.st_ino != self._inode or st.st_size < self.offset:
+            logger.info(f"{self.path} was replaced or truncated, re-reading it")
+            return False
+
+        f.seek(0)
+        if f.read(len(self._header_bytes)) != self._header_bytes:
+            logger.info(f"Header of {self.path} changed, re-reading it")
+            return False
+
+        if self._fingerprint:
+            f.seek(self.offset - len(self._fingerprint))
+            if f.read(len(self._fingerprint)) != self._fingerprint:
+                logger.info(f"{self.path} was rewritten, re-reading it")
+                return False
+        return True
+
+    def _full_read(self, f, st):
+        """Read the whole file once, keeping only the header and the newest rows."""
+        self.reset()
+        self._inode = st.st_ino
+        f.seek(0)
+        header_line = f.readline()
+        if not header_line.endswith(b"\n"):
+            return  # No complete header yet
+
+        self._header_bytes = header_line
+        self.header = next(csv.reader([header_line.decode(CSV_ENCODING).lstrip('\ufeff')]))
+        self.offset = len(header_line)
+        self._fingerprint = header_line[-self.FINGERPRINT_SIZE:]
+        self._consume(f.read())
+        logger.debug(f"Full read of {self.path}, {len(self.rows)} rows kept")
+
+    def _consume(self, data: bytes):
+        """Parse the complete lines in newly appended data and advance the offset."""
+        end = self._complete_length(data)
+        if not end:
+            return  # Only a partial line so far, pick it up on the next read
+
+        chunk = data[:end]
+        for row in csv.reader(io.StringIO(chunk.decode(CSV_ENCODING), newline='')):
+            if row:
+                self.rows.append(row)
+
+        self.offset += end
+        # Keep the fingerprint of the consumed bytes, including earlier ones for short chunks
+        self._fingerprint = (self._fingerprint + chunk)[-self.FINGERPRINT_SIZE:]
+
+    @staticmethod
+    def _complete_length(data: bytes) -> int:
+        """Length of the leading part of data made of complete CSV records."""
+        end = data.rfind(b"\n") + 1
+        # A newline inside an open quoted field does not end a record, back off to an earlier one
+        while end and data.count(b'"', 0, end) % 2:
+            end = data.rfind(b"\n", 0, end - 1) + 1
+        return end
+
+    def latest(self) -> List[dict]:
+        """Return the kept rows as column -> value dicts, newest first."""
+        if not self.header:
+            return []
+        return [dict(zip(self.header, row)) for row in reversed(self.rows)]
@@ -0,0 +1,153 @@
+"""Background thumbnail decoding with a size-bounded LRU cache."""
+
+import io
+import os
+import queue
+import threading
+from collections import OrderedDict
+from background_scripts.logger import logger
+from background_scripts.config import THUMBNAIL_SIZE, THUMBNAIL_CACHE_MB
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, Tk can still show PNG/GIF files itself
+    Image = None
+
+TK_FORMATS = (".png", ".gif")  # Formats Tk decodes without Pillow
+# Without Pillow, Tk decodes the whole file on the GUI thread: only small files (icons, logos) get a thumbnail
+MAX_RAW_BYTES = 64 * 1024
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by the total size of its values."""
+
+    def __init__(self, max_bytes):
+        """Initialize an empty cache holding at most max_bytes."""
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it as recently used."""
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key][0]
+
+    def put(self, key, value, size):
+        """Add a value, evicting the least recently used ones until it fits."""
+        with self._lock:
+            if key in self._items:
+                self.size -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes and len(self._items) > 1:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+
+def color_to_rgb(value):
+    """Convert an OBS color (ABGR decimal, as read from the CSV) to "#RRGGBB", or None."""
+    try:
+        color = int(value)
+    except (TypeError, ValueError):
+        return None
+    if not 0 <= color <= 0xFFFFFFFF:
+        return None
+    return f"#{color & 0xFF:02X}{(color >> 8) & 0xFF:02X}{(color >> 16) & 0xFF:02X}"
+
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE):
+    """
+    Decode an image file into a small thumbnail.
+
+    Returns:
+        tuple: ("ppm", bytes) scaled to fit size x size with Pillow, ("raw", bytes) of a
+            PNG/GIF of at most MAX_RAW_BYTES for Tk to decode and subsample without it,
+            or None if it cannot be shown
+    """
+    if Image is not None:
+        try:
+            with Image.open(path) as image:
+                image.draft("RGB", (size, size))  # Lets JPEG decode at reduced size
+                image.thumbnail((size, size))
+                buffer = io.BytesIO()
+                image.convert("RGB").save(buffer, "PPM")
+                return "ppm", buffer.getvalue()
+        except Exception as e:
+            logger.debug(f"Could not decode thumbnail for {path}: {str(e)}")
+            return None
+
+    if os.path.splitext(path)[1].lower() not in TK_FORMATS or os.path.getsize(path) > MAX_RAW_BYTES:
+        return None
+    with open(path, "rb") as f:
+        return "raw", f.read()
+
+
+class ThumbnailLoader:
+    """
+    Decodes image thumbnails on a background thread.
+
+    Thumbnails are cached by (path, mtime, size), so an edited image is
+    decoded again and an unchanged one never is. Only paths still wanted
+    (rows on screen) when the worker gets to them are decoded. Results are
+    put on the results queue for the GUI thread to pick up, as
+    (path, cache key, data).
+    """
+
+    def __init__(self, size=THUMBNAIL_SIZE, max_bytes=THUMBNAIL_CACHE_MB * 1024 * 1024):
+        """Initialize the loader; the worker thread starts with the first request."""
+        self.size = size
+        self.cache = LRUCache(max_bytes)
+        self.results = queue.Queue()
+        self._requests = queue.LifoQueue()  # Most recently scrolled-to rows first
+        self._wanted = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def want(self, paths):
+        """Request thumbnails for paths, dropping earlier requests for paths not in the list."""
+        paths = set(paths)
+        with self._lock:
+            new = paths - self._wanted
+            self._wanted = paths
+        for path in new:
+            self._requests.put(path)
+        if new and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="ThumbnailLoader", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Worker loop."""
+        while True:
+            path = self._requests.get()
+            with self._lock:
+                if path not in self._wanted:
+                    continue  # Scrolled away before its turn
+                self._wanted.discard(path)
+
+            try:
+                st = os.stat(path)
+                key = (path, st.st_mtime_ns, st.st_size)
+                if key in self.cache:
+                    data = self.cache.get(key)
+                else:
+                    data = decode_thumbnail(path, self.size)
+                    self.cache.put(key, data, len(data[1]) if data else 64)  # Failures are cached too
+            except OSError:
+                key, data = None, None
+            self.results.put((path, key, data))
@@ -0,0 +1,199 @@
+"""Recording and replaying of CSV change timelines."""
+
+import json
+import statistics
+import threading
+import time
+from background_scripts.logger import logger
+
+
+class TimelineRecorder:
+    """
+    Appends every detected CSV change to a timeline file.
+
+    The file is newline-delimited JSON. Each recording session starts with a
+    header line; every change is one line with its time since the session
+    start, the hash of the data file and only the values that changed
+    ("set") or disappeared ("del") since the previous change, which keeps
+    long sessions small.
+    """
+
+    def __init__(self, path, source=None):
+        """
+        Open (or continue) a timeline file.
+
+        Args:
+            path (str): Timeline file, appended to if it exists
+            source (str): Data file being recorded, stored in the session header
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self._start = time.monotonic()
+        self._last = {}
+        self.count = 0
+        self._write({"session": time.time(), "source": source})
+        logger.info(f"Recording CSV changes to: {path}")
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        self._file.flush()  # A crash loses at most the change being written
+
+    def record(self, values, file_hash=None):
+        """Append one change (the full set of source values after it)."""
+        with self._lock:
+            if self._file is None:
+                return
+            entry = {"t": round(time.monotonic() - self._start, 6), "hash": file_hash}
+            changed = {name: value for name, value in values.items()
+                       if name not in self._last or self._last[name] != value}
+            removed = [name for name in self._last if name not in values]
+            if changed:
+                entry["set"] = changed
+            if removed:
+                entry["del"] = removed
+            self._write(entry)
+            self._last = dict(values)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def load_timeline(path):
+    """
+    Read a timeline file into a list of events.
+
+    Sessions are played back to back. Every event is a dict with "t" (seconds
+    from the start of the timeline), "hash", "changes" (the values that
+    changed) and "values" (every value after the change).
+
+    Raises:
+        ValueError: If a line is not valid timeline JSON
+    """
+    events = []
+    values = {}
+    offset = 0.0  # Where the current session starts on the timeline
+    last_t = 0.0
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                raise ValueError(f"{path}:{line_number}: not a timeline entry")
+            if "session" in entry:
+                offset = last_t
+                values = {}
+                continue
+            values = dict(values)
+            for name in entry.get("del", ()):
+                values.pop(name, None)
+            changes = entry.get("set", {})
+            values.update(changes)
+            last_t = offset + float(entry["t"])
+            events.append({"t": last_t, "hash": entry.get("hash"), "changes": changes, "values": values})
+    return events
+
+
+def summarize(results):
+    """Push latency summary (ms) of replay results."""
+    latencies = sorted(result["push_latency_ms"] for result in results)
+    if not latencies:
+        return {"events": 0}
+    return {
+        "events": len(latencies),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "push_p50_ms": round(statistics.median(latencies), 3),
+        "push_p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        "push_max_ms": round(latencies[-1], 3),
+        "mean_lag_ms": round(statistics.mean(result["lag_ms"] for result in results), 3),
+    }
+
+
+class TimelineReplayer:
+    """
+    Plays a recorded timeline back against OBS (real or the stand-in).
+
+    Events are sent on their recorded schedule divided by speed, or as fast
+    as possible with speed 0. Each event pushes only the values that changed,
+    as one request batch, and is timed from its scheduled time to OBS's
+    answer, so scheduling lag and push time both show up in its latency.
+
+    The timeline holds the values as they were processed when recorded, and
+    they are sent as they are: reading, change detection, the source store
+    and path/color processing are not part of the replay, so the latency is
+    push latency only (bench_pipeline times the data path).
+    """
+
+    def __init__(self, events, obs_controller, speed=1.0):
+        """
+        Initialize the replayer.
+
+        Args:
+            events (list): Events from load_timeline()
+            obs_controller (OBSController): Connected controller
+            speed (float): Playback speed (2 = twice as fast), 0 for as fast as possible
+        """
+        self.events = events
+        self.obs_controller = obs_controller
+        self.speed = float(speed)
+        self._stop_event = threading.Event()
+
+    def prepare(self):
+        """Create every source the timeline touches, so the timed run only updates."""
+        first_values = {}
+        for event in self.events:
+            for name, value in event["changes"].items():
+                first_values.setdefault(name, value)
+        if first_values and not self.obs_controller.bulk_update_sources(first_values):
+            logger.warning("Some timeline sources could not be created")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self, on_event=None):
+        """
+        Replay the timeline.
+
+        Args:
+            on_event (callable): Called with each event's result as it completes
+
+        Returns:
+            list: Per event: index, t, sources, ok, lag_ms (start of the push after its
+                scheduled time), push_ms and push_latency_ms (scheduled time to OBS's answer)
+        """
+        self._stop_event.clear()
+        results = []
+        start = time.monotonic()
+        first = self.events[0]["t"] if self.events else 0.0  # Skip the idle time before the first change
+        for index, event in enumerate(self.events):
+            if self.speed > 0:
+                scheduled = start + (event["t"] - first) / self.speed
+                delay = scheduled - time.monotonic()
+                if delay > 0 and self._stop_event.wait(delay):
+                    break
+            else:
+                scheduled = time.monotonic()
+            if self._stop_event.is_set():
+                break
+
+            sending = time.monotonic()
+            prepared = self.obs_controller.prepare_settings_requests(event["changes"])
+            ok = self.obs_controller.send_prepared_settings(prepared, force=True) if prepared else True
+            done = time.monotonic()
+
+            result = {"index": index, "t": event["t"], "sources": len(prepared), "ok": bool(ok),
+                      "lag_ms": round((sending - scheduled) * 1000, 3),
+                      "push_ms": round((done - sending) * 1000, 3),
+                      "push_latency_ms": round((done - scheduled) * 1000, 3)}
+            results.append(result)
+            if on_event is not None:
+                on_event(result)
+        return results
+
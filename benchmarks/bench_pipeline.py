@@ -0,0 +1,258 @@
+"""Benchmarks for the CSV -> OBS pipeline hot paths.
+
+Results are written as JSON. Pass --baseline with an earlier result file
+to compare against it; the run exits with status 1 if any benchmark got
+slower than the allowed threshold.
+
+    python -m benchmarks.bench_pipeline --output bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json --output new.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from background_scripts.logger import logger
+from background_scripts.csv_handler import CSVHandler
+from background_scripts.hex_converter import validate_hex_color
+from background_scripts.padding_hex import format_hex
+from background_scripts.preflight import valid_colors
+from background_scripts.obs_controller import OBSController
+from benchmarks.obs_stub import OBSStubServer
+
+CSV_SHAPES = [(1, 10), (1, 500), (1000, 10), (1000, 500), (100000, 10), (100000, 500)]
+QUICK_CSV_SHAPES = [(1, 10), (1000, 10), (1000, 500)]
+
+
+def measure(func, repeat=5, number=1):
+    """Run func number times per sample, returning per-call timing stats in seconds."""
+    func()  # Warm up caches and imports
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    median = statistics.median(samples)
+    return {"median_s": median, "min_s": min(samples), "max_s": max(samples),
+            "ops_per_s": 1 / median if median else None, "repeat": repeat, "number": number}
+
+
+def write_csv(path, rows, columns, make_value):
+    """Write a CSV with the given shape, using make_value(row, column) for the cells."""
+    header = [f"group_{c // 10}_{'color' if c % 5 == 0 else 'picture' if c % 5 == 1 else 'text'}_{c}"
+              for c in range(columns)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        for r in range(rows):
+            f.write(",".join(make_value(r, c, name) for c, name in enumerate(header)) + "\n")
+    return header
+
+
+def bench_read_csv(workdir, shapes, repeat):
+    """CSVHandler.read_csv on fresh files (no cached parse) of each shape."""
+    results = {}
+    image = os.path.join(workdir, "logo.png")
+    open(image, "wb").close()
+
+    def value(r, c, name):
+        if "color" in name:
+            return f"{(r * 7919 + c) % 0xFFFFFF:06X}"
+        if "picture" in name:
+            return image
+        return f"value {r} {c}"
+
+    for rows, columns in shapes:
+        path = os.path.join(workdir, f"read_{rows}x{columns}.csv")
+        header = write_csv(path, rows, columns, value)
+        handler = CSVHandler(path)
+        handler.set_column_mapping({name: name for name in header})
+
+        def run():
+            # Measure the parse and processing, not the caches for an unchanged file
+            handler._frame = None
+            handler._pending = None
+            handler._cells = {}
+            handler.read_csv()
+
+        results[f"read_csv[{rows}x{columns}]"] = measure(run, repeat=repeat)
+        results[f"has_changes[{rows}x{columns}, idle]"] = measure(handler.has_changes, repeat=repeat, number=100)
+    return results
+
+
+def bench_hex(repeat):
+    """validate_hex_color, its vectorized pre-flight version and format_hex throughput over a mix of inputs."""
+    values = [f"{i * 2654435761 % 0xFFFFFF:06X}" for i in range(5000)]
+    values += [f"#{v}80" for v in values[:2000]] + ["0", "zzzzzz", "4278255360"] * 300
+    return {
+        "validate_hex_color[x%d]" % len(values): measure(lambda: [validate_hex_color(v) for v in values], repeat),
+        "valid_colors[x%d]" % len(values): measure(lambda: valid_colors(values), repeat),
+        "format_hex[x%d]" % len(values): measure(lambda: [format_hex(v.lstrip('#')) for v in values], repeat),
+    }
+
+
+def bench_special_columns(workdir, repeat):
+    """process_special_columns on a path-heavy sheet (mix of existing and missing files)."""
+    paths = []
+    for i in range(300):
+        path = os.path.join(workdir, f"logo_{i}.png")
+        if i % 3:
+            open(path, "wb").close()
+        paths.append(path if i % 2 else os.path.basename(path))  # Half relative to the CSV
+    handler = CSVHandler(os.path.join(workdir, "paths.csv"))
+    return {
+        "process_special_columns[300 paths]": measure(
+            lambda: [handler.process_special_columns(p, "team_picture") for p in paths], repeat),
+    }
+
+
+def bench_bulk_update(latency, repeat):
+    """OBSController.bulk_update_sources and batched sends against the stand-in."""
+    results = {}
+    server = OBSStubServer(latency=latency).start()
+    try:
+        controller = OBSController("127.0.0.1", server.port)
+        if not controller.connect():
+            raise RuntimeError("Could not connect to the OBS stand-in")
+
+        for count in (10, 100):
+            updates = {}
+            for i in range(count):
+                kind = ("name", "color", "picture")[i % 3]
+                updates[f"Player {i} {kind}"] = "00FF00" if kind == "color" else f"value {i}"
+            controller.bulk_update_sources(updates)  # Create the sources outside the timing
+            label = f"[{count} sources, {latency * 1000:g}ms latency]"
+            results[f"bulk_update_sources{label}"] = measure(
+                lambda: controller.bulk_update_sources(updates), repeat)
+            prepared = controller.prepare_settings_requests(updates)
+            results[f"send_prepared_settings{label}"] = measure(
+                lambda: controller.send_prepared_settings(prepared, force=True), repeat)
+        controller.disconnect()
+    finally:
+        server.stop()
+    return results
+
+
+def bench_treeview(workdir, repeat):
+    """
+    OBSUpdaterGUI.load_sources, needs a display (run under xvfb-run on headless machines).
+
+    Only the source list is built (create_source_view), not the whole window: no OBS
+    connection, change watcher, drift checks, profiles or control API run in the background.
+    """
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        root = tk.Tk()
+    except Exception as e:
+        return {"skipped": f"Treeview benchmark needs a display: {e}"}
+
+    try:
+        import gui
+        root.withdraw()
+        results = {}
+        for columns in (10, 300):
+            path = os.path.join(workdir, f"tree_{columns}.csv")
+            header = write_csv(path, 1, columns, lambda r, c, name: "00FF00" if "color" in name else f"v{c}")
+            app = gui.OBSUpdaterGUI.__new__(gui.OBSUpdaterGUI)
+            app.root = root
+            app.main_frame = ttk.Frame(root)
+            app.csv_handler = CSVHandler(path)
+            app.current_csv_path = path
+            app.csv_handler.set_column_mapping({name: name for name in header})
+            app.create_source_view()
+
+            def run():
+                app.load_sources()
+                root.update()
+
+            results[f"load_sources[{columns} sources]"] = measure(run, repeat)
+            app.main_frame.destroy()
+        return results
+    finally:
+        root.destroy()
+
+
+def compare(results, baseline, threshold):
+    """Return (name, baseline median, new median, ratio) for every benchmark slower than the threshold."""
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if not isinstance(stats, dict) or not isinstance(old, dict) or "median_s" not in old:
+            continue
+        ratio = stats["median_s"] / old["median_s"] if old["median_s"] else 1.0
+        stats["baseline_median_s"] = old["median_s"]
+        stats["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((name, old["median_s"], stats["median_s"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CSV -> OBS pipeline")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before a benchmark counts as a regression (0.25 = 25%%)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.002, help="OBS stand-in latency in seconds")
+    parser.add_argument("--quick", action="store_true", help="skip the 100k row CSVs")
+    parser.add_argument("--only", nargs="*", help="run only these groups: csv hex paths obs gui")
+    args = parser.parse_args(argv)
+
+    # Per-source logs (and obsws_python tracebacks for not-yet-created sources) would dominate the timings
+    logger.setLevel(logging.ERROR)
+    logging.getLogger("obsws_python").setLevel(logging.CRITICAL)
+    groups = set(args.only or ["csv", "hex", "paths", "obs", "gui"])
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        if "csv" in groups:
+            results.update(bench_read_csv(workdir, QUICK_CSV_SHAPES if args.quick else CSV_SHAPES,
+                                          max(1, args.repeat // 2)))
+        if "hex" in groups:
+            results.update(bench_hex(args.repeat))
+        if "paths" in groups:
+            results.update(bench_special_columns(workdir, args.repeat))
+        if "obs" in groups:
+            results.update(bench_bulk_update(args.latency, args.repeat))
+        if "gui" in groups:
+            results.update(bench_treeview(workdir, args.repeat))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform(), "baseline": args.baseline, "threshold": args.threshold},
+        "results": results,
+        "regressions": [name for name, *_ in regressions],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            line = f"{name:60s} {stats['median_s'] * 1000:10.3f} ms"
+            if "ratio" in stats:
+                line += f"  x{stats['ratio']:.2f} vs baseline"
+            print(line)
+        else:
+            print(f"{name:60s} {stats}")
+    for name, old, new, ratio in regressions:
+        print(f"REGRESSION {name}: {old * 1000:.3f} ms -> {new * 1000:.3f} ms (x{ratio:.2f})")
+    print(f"Results written to {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+"""Behaviour checks against the local stand-ins.
+
+Every check drives the real modules against the HTTP and OBS stand-ins
+(no mocks) and raises AssertionError with what it saw when the behaviour
+is wrong. Run them all, or only those whose name contains a word:
+
+    python -m benchmarks.checks
+    python -m benchmarks.checks http
+"""
+
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from background_scripts.logger import logger
+from background_scripts.browser_preload import BrowserPreloader
+from background_scripts.change_watcher import ChangeWatcher
+from background_scripts.control_api import ControlServer
+from background_scripts.csv_handler import CSVHandler
+from background_scripts.http_source import HTTPPullSource
+from background_scripts.obs_controller import OBSController
+from background_scripts.profiles import ProfileManager
+from background_scripts.readers import pa
+from background_scripts.reconciler import DriftReconciler
+from background_scripts.rotation import RowRotator
+from background_scripts.scene_index import SceneItemIndex
+from benchmarks.http_stub import HTTPStubServer
+from benchmarks.obs_stub import OBSStubServer
+
+
+def expect(condition, message):
+    if not condition:
+        raise AssertionError(message)
+
+
+def write_csv(path, text):
+    """Write a data file in one step, so a watcher never sees it half written."""
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+@contextlib.contextmanager
+def logged(level):
+    """Collect the messages the application logs at level or above while the block runs."""
+    messages = []
+    capture = logging.Handler(level)
+    capture.emit = lambda record: messages.append(record.getMessage())
+    previous = logger.level
+    logger.addHandler(capture)
+    logger.setLevel(level)
+    try:
+        yield messages
+    finally:
+        logger.removeHandler(capture)
+        logger.setLevel(previous)
+
+
+def obs_stand_in():
+    """Start the OBS stand-in and return (server, connected controller)."""
+    server = OBSStubServer().start()
+    controller = OBSController("127.0.0.1", server.port)
+    expect(controller.connect(), "could not connect to the OBS stand-in")
+    return server, controller
+
+
+def check_api_update_survives_watcher(workdir):
+    """A value pushed through the control API stays until the data file really changes."""
+    path = os.path.join(workdir, "data.csv")
+    write_csv(path, "Team,Score\nAAA,3\n")
+    server, controller = obs_stand_in()
+    control = None
+    try:
+        handler = CSVHandler(path)
+        handler.set_column_mapping({"Team": "Team", "Score": "Score"})
+        controller.bulk_update_sources(handler.read_csv())
+        watcher = ChangeWatcher(lambda: handler, interval=0)
+        control = ControlServer(lambda: handler, controller, port=0, write_back=False)
+        expect(control.start(), "control API did not start")
+
+        conn = http.client.HTTPConnection("127.0.0.1", control.port, timeout=5)
+        conn.request("PUT", "/sources/Score", body=json.dumps({"value": "7"}),
+                     headers={"Content-Type": "application/json"})
+        reply = json.loads(conn.getresponse().read())
+        conn.close()
+        expect(reply["ok"], f"update refused: {reply}")
+        expect(server.state.inputs["Score"]["inputSettings"]["text"] == "7", "update not sent to OBS")
+
+        for _ in range(3):
+            expect(not watcher.check_once(), "unchanged file reported as changed")
+        expect(handler.store.get("Score").value == "7", f"API value lost: {handler.store.get('Score')}")
+        handler.read_csv()  # Reload CSV / F5 with the file unchanged
+        expect(handler.store.get("Score").value == "7", f"API value lost on reload: {handler.store.get('Score')}")
+
+        write_csv(path, "Team,Score\nBBB,3\n")
+        os.utime(path, ns=(time.time_ns() + 10 ** 9,) * 2)  # A new mtime even on coarse filesystems
+        expect(watcher.check_once(), "changed file not picked up")
+        expect(handler.store.snapshot().values == {"Team": "BBB", "Score": "3"},
+               f"file change not applied: {dict(handler.store.snapshot().values)}")
+    finally:
+        if control is not None:
+            control.stop()
+        controller.disconnect()
+        server.stop()
+
+
+def check_arrow_file_not_kept_mapped(workdir):
+    """An Arrow file is unmapped once read, so its producer can replace it (Windows refuses while it is mapped)."""
+    if pa is None or not os.path.exists("/proc/self/maps"):
+        return  # Needs pyarrow, and Linux to list the mapped files
+    path = os.path.join(workdir, "data.arrow")
+    table = pa.table({"Name": ["A", "B"], "Score": [3, None]})
+    with pa.OSFile(path, "wb") as f, pa.ipc.new_file(f, table.schema) as writer:
+        writer.write_table(table)
+
+    handler = CSVHandler(path)
+    handler.set_column_mapping({"Name": "Name", "Score": "Score"})
+    rows = handler.read_rows()
+    expect(rows == [{"Name": "A", "Score": "3"}, {"Name": "B", "Score": ""}], f"unexpected rows {rows}")
+    with open("/proc/self/maps", encoding="utf-8") as f:
+        expect(path not in f.read(), "the Arrow file is still memory-mapped after reading it")
+
+
+def check_control_api_checks_host(workdir):
+    """Requests for another host name (DNS rebinding) are refused, local names and addresses are served."""
+    path = os.path.join(workdir, "data.csv")
+    write_csv(path, "Score\n3\n")
+    handler = CSVHandler(path)
+    control = ControlServer(lambda: handler, OBSController("127.0.0.1", 1), port=0, write_back=False)  # Never connected
+    expect(control.start(), "control API did not start")
+    try:
+        for host, status in (("evil.example", 403), (f"evil.example:{control.port}", 403),
+                             (f"127.0.0.1:{control.port}", 200), (f"localhost:{control.port}", 200)):
+            conn = http.client.HTTPConnection("127.0.0.1", control.port, timeout=5)
+            conn.request("GET", "/sources", headers={"Host": host})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            expect(response.status == status, f"Host {host}: {response.status}, expected {status}")
+    finally:
+        control.stop()
+
+
+def check_http_pull_conditional_requests(workdir):
+    """200 parses the data, 304 (ETag or Last-Modified) keeps it, a changed document is parsed again."""
+    server = HTTPStubServer(b"Name,Score\nAlice,1\n").start()
+    try:
+        source = HTTPPullSource(server.url, interval=0)
+        expect(source.poll() == 1, f"first fetch should parse version 1, got {source.version}")
+        expect(server.statuses == [200], f"expected one 200, got {server.statuses}")
+        expect(source.frame.iloc[0]["Score"] == "1", f"unexpected data {source.frame.to_dict()}")
+
+        expect(source.poll() == 1, "unchanged document should keep version 1")
+        expect(server.statuses[-1] == 304, f"expected 304 for an unchanged document, got {server.statuses}")
+        expect(server.requests[-1]["if_none_match"] == server.etag,
+               f"ETag not sent back: {server.requests[-1]}")
+
+        server.set_body(b"Name,Score\nAlice,2\n")
+        expect(source.poll() == 2, f"changed document should be version 2, got {source.version}")
+        expect(server.statuses[-1] == 200 and source.frame.iloc[0]["Score"] == "2",
+               f"changed document not parsed: {server.statuses}, {source.frame.to_dict()}")
+        source.close()
+    finally:
+        server.stop()
+
+    # Servers that only send Last-Modified are asked with If-Modified-Since
+    server = HTTPStubServer(b"Name,Score\nAlice,1\n", etags=False).start()
+    try:
+        source = HTTPPullSource(server.url, interval=0)
+        source.poll()
+        expect(source.poll() == 1 and server.statuses == [200, 304],
+               f"If-Modified-Since should get a 304, got {server.statuses}")
+        expect(server.requests[-1]["if_modified_since"] == server.last_modified,
+               f"Last-Modified not sent back: {server.requests[-1]}")
+        source.close()
+    finally:
+        server.stop()
+
+
+def check_http_pull_keeps_last_good_data(workdir):
+    """A failing fetch (error status or dropped connection) keeps the last data on air."""
+    server = HTTPStubServer(b"Name,Score\nAlice,1\n").start()
+    try:
+        handler = CSVHandler(os.path.join(workdir, "data.csv"))
+        handler.set_pull_source(HTTPPullSource(server.url, interval=0))
+        handler.set_column_mapping({"Score": "Score"})
+        watcher = ChangeWatcher(lambda: handler, interval=0)
+        expect(watcher.check_once() and handler.last_data == {"Score": "1"}, f"first read failed: {handler.last_data}")
+
+        for failure in (500, "close"):
+            server.fail = failure
+            server.set_body(b"Name,Score\nAlice,2\n")
+            expect(not watcher.check_once(), f"failed fetch ({failure}) reported a change")
+            expect(handler.read_csv() == {"Score": "1"},
+                   f"failed fetch ({failure}) lost the last data: {handler.last_data}")
+        expect(server.statuses[-1] is None, f"the stand-in did not drop the connection: {server.statuses}")
+
+        server.fail = None
+        expect(watcher.check_once(), "recovered fetch did not report the change")
+        expect(handler.last_data == {"Score": "2"}, f"recovered fetch not read: {handler.last_data}")
+        handler.close()
+    finally:
+        server.stop()
+
+
+def check_http_pull_fetches_on_watcher_only(workdir):
+    """Only fetch() sends requests, one at a time on the shared connection; readers see the last fetched data."""
+    server = HTTPStubServer(b"Name,Score\nAlice,1\n").start()
+    try:
+        handler = CSVHandler(os.path.join(workdir, "data.csv"))
+        handler.set_pull_source(HTTPPullSource(server.url, interval=0))
+        handler.set_column_mapping({"Score": "Score"})
+        expect(handler.file_version() is None and handler.read_csv() is None and server.statuses == [],
+               f"reading before the first fetch sent requests: {server.statuses}")
+        expect(handler.fetch() and handler.read_csv() == {"Score": "1"}, f"fetched data not read: {handler.last_data}")
+
+        server.set_body(b"Name,Score\nAlice,2\n")
+        for _ in range(3):
+            handler.file_version()
+            handler.read_rows()
+            handler.has_changes()
+        expect(len(server.statuses) == 1, f"readers sent requests: {server.statuses}")
+
+        def fetch():
+            try:
+                for _ in range(20):
+                    handler.fetch(force=True)
+                    handler.read_rows()
+            except Exception as e:
+                errors.append(repr(e))
+        threads = [threading.Thread(target=fetch) for _ in range(4)]
+        with logged(logging.ERROR) as errors:  # poll() logs request errors instead of raising them
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        expect(not errors, f"concurrent fetches failed: {errors[:3]}")
+        expect(len(server.statuses) == 81 and None not in server.statuses,
+               f"concurrent fetches got {len(server.statuses)} responses: {set(server.statuses)}")
+        expect(handler.pull_source.version == 2 and handler.read_csv() == {"Score": "2"},
+               f"version {handler.pull_source.version}, data {handler.last_data}")
+        handler.close()
+    finally:
+        server.stop()
+
+
+def check_json_keeps_values_as_sent(workdir):
+    """JSON numbers are shown as sent: a null next to integers does not turn 3 into "3.0"."""
+    documents = {
+        "data.ndjson": '{"Name": "A", "Score": 3}\n{"Name": "B", "Score": null}\n',
+        "data.json": '[{"Name": "A", "Score": 3}, {"Name": "B", "Score": null}]',
+        "columns.json": '{"Name": ["A", "B"], "Score": [3, null]}',
+    }
+    for name, text in documents.items():
+        path = os.path.join(workdir, name)
+        write_csv(path, text)
+        handler = CSVHandler(path)
+        handler.set_column_mapping({"Name": "Name", "Score": "Score"})
+        rows = handler.read_rows()
+        expect(rows == [{"Name": "A", "Score": "3"}, {"Name": "B", "Score": ""}], f"{name}: {rows}")
+
+
+def check_profile_switch_sends_precompiled(workdir):
+    """Profiles are compiled when any column changes, switches send without the lock, scene changes keep edits."""
+    path = os.path.join(workdir, "data.csv")
+    write_csv(path, "Team,Score\nAAA,1\n")
+    server, controller = obs_stand_in()
+    profiles = None
+    try:
+        handler = CSVHandler(path)
+        handler.set_column_mapping({"Team": "Team"})
+        profiles = ProfileManager(lambda: handler, controller, path=os.path.join(workdir, "profiles.json"))
+        profiles.set_profile("pre", {"Team": "Team"}, ["Pre"])
+        profiles.set_profile("game", {"Score": "Score"}, ["Game"])
+        profiles.attach(handler)
+        watcher = ChangeWatcher(lambda: handler, interval=0, on_data_changed=profiles.schedule_compile)
+        watcher.check_once()
+
+        def compiled(name, value):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                entry = profiles._compiled.get(name)
+                if entry is not None and entry[1].get("Score") == value:
+                    return True
+                time.sleep(0.01)
+            return False
+
+        # Only a column of another profile changes: the store does not, the watcher still recompiles
+        write_csv(path, "Team,Score\nAAA,2\n")
+        os.utime(path, ns=(time.time_ns() + 10 ** 9,) * 2)
+        expect(not watcher.check_once(), "a change outside the mapping changed the store")
+        expect(compiled("game", "2"), f"profile not compiled ahead of the switch: {profiles._compiled.get('game')}")
+
+        # The manager lock is free while the batch is sent
+        lock_free = []
+        sent = controller.send_batch
+
+        def send_batch(requests, **kwargs):
+            probe = threading.Thread(target=lambda: lock_free.append(profiles._lock.acquire(timeout=1)
+                                                                     and profiles._lock.release() is None))
+            probe.start()
+            probe.join()
+            return sent(requests, **kwargs)
+        controller.send_batch = send_batch
+
+        # A scene change sends the profile but keeps mapping edits that are not saved as a profile
+        handler.set_column_mapping({"Team": "Team", "Name": "Team"})
+        profiles.on_current_program_scene_changed(types.SimpleNamespace(scene_name="Game"))
+        expect(lock_free and all(lock_free), "the manager lock was held while sending")
+        expect(server.state.inputs["Score"]["inputSettings"]["text"] == "2", "scene change did not send the profile")
+        expect(handler.column_mapping == {"Team": "Team", "Name": "Team"} and profiles.held == "game",
+               f"scene change replaced the edited mapping: {handler.column_mapping}, held {profiles.held}")
+
+        # Picked by hand, or with a saved mapping, the profile's mapping is switched to
+        profiles.activate("pre")
+        expect(handler.column_mapping == {"Team": "Team"} and profiles.held is None, "profile not switched to")
+        profiles.on_current_program_scene_changed(types.SimpleNamespace(scene_name="Game"))
+        expect(handler.column_mapping == {"Score": "Score"} and handler.last_data == {"Score": "2"},
+               f"saved mapping not switched: {handler.column_mapping}, {handler.last_data}")
+    finally:
+        if profiles is not None:
+            profiles.close()
+        controller.disconnect()
+        server.stop()
+
+
+def check_reconciler_follows_last_pushed(workdir):
+    """Drift is measured against what was last sent: rotation is not undone, removed sources are not re-created."""
+    path = os.path.join(workdir, "data.csv")
+    write_csv(path, "Team,Score\nAAA,1\nBBB,2\n")
+    server, controller = obs_stand_in()
+    rotator = None
+    try:
+        handler = CSVHandler(path)
+        handler.set_column_mapping({"Team": "Team", "Score": "Score"})
+        controller.bulk_update_sources(handler.read_csv())
+        reconciler = DriftReconciler(controller, interval=0, paused=lambda: rotator is not None and rotator.running)
+        expect(reconciler.run_once() == [], "nothing changed, nothing should drift")
+
+        # Rotation pushes the next row: that is what should stay on air
+        rotator = RowRotator(handler, controller, interval=60)
+        rotator.prepare()
+        rotator._tick()
+        rotator._tick()
+        expect(server.state.inputs["Team"]["inputSettings"]["text"] == "BBB", "rotation did not push row 2")
+        expect(reconciler.run_once() == [], "rotated values reported as drift")
+        expect(server.state.inputs["Team"]["inputSettings"]["text"] == "BBB", "reconciler undid the rotation")
+
+        # Paused while rotation runs
+        rotator.start()
+        server.state.inputs["Score"]["inputSettings"]["text"] = "by hand"
+        expect(reconciler.run_once() == [], "reconciler ran during rotation")
+        rotator.stop()
+
+        # A change by hand is put back to the value last sent
+        server.state.inputs["Score"]["inputSettings"]["text"] = "by hand"
+        expect(reconciler.run_once() == ["Score"], "change by hand not detected")
+        expect(server.state.inputs["Score"]["inputSettings"]["text"] in ("1", "2"),
+               f"change by hand not undone: {server.state.inputs['Score']}")
+
+        # A source removed in OBS stays removed, and is no longer checked
+        controller.send_batch([{"requestType": "RemoveInput", "requestData": {"inputName": "Team"}}])
+        expect(reconciler.run_once() == ["Team"], "removed source not reported")
+        expect("Team" not in server.state.inputs, "reconciler re-created a removed source")
+        expect(reconciler.run_once() == [], "removed source still checked")
+
+        # Sources never sent are not checked or created
+        controller.send_batch([{"requestType": "CreateInput", "requestData": {
+            "sceneName": "Scene", "inputName": "Other", "inputKind": "text_ft2_source_v2",
+            "inputSettings": {"text": "x"}}}])
+        server.state.inputs["Other"]["inputSettings"]["text"] = "y"
+        expect(reconciler.run_once() == [], "a source the app never sent was checked")
+    finally:
+        if rotator is not None:
+            rotator.stop()
+        controller.disconnect()
+        server.stop()
+
+
+def check_tail_header_only_is_no_data(workdir):
+    """A followed log with only its header is no data yet, not an error, until its first row is appended."""
+    path = os.path.join(workdir, "log.csv")
+    write_csv(path, "Time,Event\n")
+    handler = CSVHandler(path)
+    handler.set_column_mapping({"Event": "Event"})
+    expect(handler.set_tail_mode(True), "tail mode refused")
+    watcher = ChangeWatcher(lambda: handler, interval=0)
+
+    with logged(logging.WARNING) as errors:
+        for _ in range(3):
+            expect(not watcher.check_once(), "a header without rows reported a change")
+    expect(not errors, f"a header without rows was logged as a problem: {errors}")
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("12:00,Goal\n")
+    expect(watcher.check_once() and handler.last_data == {"Event": "Goal"}, f"first row not read: {handler.last_data}")
+
+
+def check_rotation_swaps_preloaded_pages(workdir):
+    """With a preloader, rotation puts each browser page on air from the hidden duplicate it was loaded in."""
+    path = os.path.join(workdir, "data.csv")
+    write_csv(path, "Ad,Name\nhttp://a/,A\nhttp://b/,B\nhttp://c/,C\n")
+    server, controller = obs_stand_in()
+    try:
+        handler = CSVHandler(path)
+        handler.set_column_mapping({"Ad browser": "Ad", "Name": "Name"})
+        scene_index = SceneItemIndex(controller)
+        scene_index.build()
+        rotator = RowRotator(handler, controller, interval=60, preloader=BrowserPreloader(controller, scene_index))
+        expect(rotator.prepare(), "rotation could not prepare its rows")
+
+        url_sets = []
+        sent = controller.send_batch
+
+        def send_batch(requests, **kwargs):
+            url_sets.extend(request["requestData"]["inputName"] for request in requests
+                            if request["requestType"] == "SetInputSettings"
+                            and "url" in request["requestData"]["inputSettings"])
+            return sent(requests, **kwargs)
+        controller.send_batch = send_batch
+
+        for row, url in enumerate(("http://a/", "http://b/", "http://c/", "http://a/")):
+            rotator._tick()
+            inputs = server.state.inputs
+            expect(inputs["Ad browser"]["inputSettings"]["url"] == url,
+                   f"row {row}: {inputs['Ad browser']} on air, expected {url}")
+            expect(inputs["Ad browser (next)"]["inputSettings"]["url"] != url, f"row {row}: nothing preloaded")
+            visible = {item["sourceName"] for item in server.state.scenes["Sources"] if item["sceneItemEnabled"]}
+            expect(visible == {"Ad browser", "Name"}, f"row {row}: {visible} visible")
+        expect("Ad browser" not in url_sets, f"the live page was reloaded in place: {url_sets}")
+    finally:
+        controller.disconnect()
+        server.stop()
+
+
+CHECKS = [value for name, value in sorted(globals().items()) if name.startswith("check_")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Behaviour checks against the local stand-ins")
+    parser.add_argument("filter", nargs="?", default="", help="only run checks whose name contains this")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the application log")
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logger.setLevel(logging.CRITICAL)
+        logging.getLogger("obsws_python").setLevel(logging.CRITICAL)
+
+    failures = 0
+    for check in CHECKS:
+        name = check.__name__[len("check_"):]
+        if args.filter not in name:
+            continue
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                check(workdir)
+                print(f"ok    {name} ({(time.perf_counter() - start) * 1000:.0f} ms)")
+            except Exception:
+                failures += 1
+                print(f"FAIL  {name}\n{traceback.format_exc()}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""Local HTTP stand-in for the pull source (HTTPPullSource).
+
+Serves one document that the caller can replace at any time, with an ETag
+and a Last-Modified header, and answers conditional requests with 304 Not
+Modified when the document did not change. It can be told to fail, so the
+pull source can be checked to keep its last good data.
+
+    python -m benchmarks.http_stub --port 8080 data.csv
+"""
+
+import argparse
+import hashlib
+import http.server
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like a real server
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            body, etag, last_modified = server.body, server.etag, server.last_modified
+            fail = server.fail
+            server.requests.append({"path": self.path,
+                                    "if_none_match": self.headers.get("If-None-Match"),
+                                    "if_modified_since": self.headers.get("If-Modified-Since")})
+
+        if fail == "close":
+            self.close_connection = True  # Drop the connection without answering
+            return self._count(None)
+        if fail:
+            return self._send(int(fail), b"stand-in failure")
+
+        if_none_match = self.headers.get("If-None-Match") if server.etags else None
+        if_modified_since = self.headers.get("If-Modified-Since") if server.last_modified_dates else None
+        if if_none_match is not None or if_modified_since is not None:
+            if if_none_match is not None:
+                not_modified = if_none_match == etag
+            else:
+                try:
+                    not_modified = parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(last_modified)
+                except (TypeError, ValueError):
+                    not_modified = False
+            if not_modified:
+                return self._send(304, b"")
+        headers = {}
+        if server.etags:
+            headers["ETag"] = etag
+        if server.last_modified_dates:
+            headers["Last-Modified"] = last_modified
+        return self._send(200, body, headers)
+
+    def _send(self, status, body, headers=None):
+        self._count(status)  # Before answering, so the client never sees a response that is not counted yet
+        self.send_response(status)
+        self.send_header("Content-Type", self.server.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _count(self, status):
+        with self.server.lock:
+            self.server.statuses.append(status)
+
+    def log_message(self, format, *args):
+        pass  # Quiet, the checks print their own results
+
+
+class HTTPStubServer(http.server.ThreadingHTTPServer):
+    """
+    HTTP stand-in serving one document.
+
+    Args:
+        body (bytes): Document served at every path
+        content_type (str): Content-Type header of the document
+        etags (bool): Send an ETag and answer If-None-Match with 304 when it matches
+        last_modified_dates (bool): Send Last-Modified and answer If-Modified-Since with 304
+            when the document is not newer (only used without If-None-Match, as real servers do)
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, body=b"", host="127.0.0.1", port=0, content_type="text/csv", etags=True,
+                 last_modified_dates=True):
+        super().__init__((host, port), _Handler)
+        self.lock = threading.Lock()
+        self.content_type = content_type
+        self.etags = etags
+        self.last_modified_dates = last_modified_dates
+        self.fail = None  # An HTTP status to answer with, or "close" to drop the connection
+        self.requests = []  # Path and validators of every request
+        self.statuses = []  # Status of every response, None for dropped connections
+        self._thread = None
+        self.set_body(body)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}/data.csv"
+
+    def set_body(self, body):
+        """Replace the document; the ETag and Last-Modified change with it."""
+        with self.lock:
+            self.body = body
+            self.etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            # Last-Modified has a one second resolution, so a change always moves it forward
+            previous = getattr(self, "_modified", 0)
+            self._modified = max(int(time.time()), previous + 1)
+            self.last_modified = formatdate(self._modified, usegmt=True)
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="HTTPStub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP stand-in serving one file")
+    parser.add_argument("file", help="file to serve (checked for changes every second)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--content-type", default="text/csv")
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as f:
+        server = HTTPStubServer(f.read(), args.host, args.port, args.content_type)
+    print(f"HTTP stand-in serving {args.file} on http://{args.host}:{server.port}/")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+            with open(args.file, "rb") as f:
+                body = f.read()
+            if body != server.body:
+                server.set_body(body)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
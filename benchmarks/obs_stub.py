@@ -0,0 +1,380 @@
+"""Local stand-in for the OBS WebSocket (v5) server.
+
+Speaks enough of the protocol for obsws_python and the batch requests used by
+the pipeline (Hello/Identify, Request, RequestBatch) and keeps inputs and
+scenes in memory. Latency can be injected to model the network round trip
+and OBS's per-request processing time.
+
+Run it on its own to point the GUI at it:
+
+    python -m benchmarks.obs_stub --port 4455 --latency 0.002
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from background_scripts.websocket_frames import accept_key, recv_frame, send_frame
+
+
+class RequestError(Exception):
+    def __init__(self, code, comment):
+        super().__init__(comment)
+        self.code = code
+        self.comment = comment
+
+
+class OBSState:
+    """In-memory scenes and inputs, modelled after what OBS returns."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.inputs = {}  # name -> {"inputKind", "inputSettings", "filters"}
+        self.scenes = {"Scene": []}  # name -> list of scene item dicts
+        self.program_scene = "Scene"
+        self.next_item_id = 1
+        self.request_count = 0
+        self.message_count = 0
+        self.pending_events = []  # (eventType, eventData) emitted by the last requests
+
+    def _input(self, name):
+        if name not in self.inputs:
+            raise RequestError(600, f"No source was found by the name of `{name}`.")
+        return self.inputs[name]
+
+    def _scene(self, name):
+        if name not in self.scenes:
+            raise RequestError(600, f"No scene was found by the name of `{name}`.")
+        return self.scenes[name]
+
+    def _item(self, data):
+        for item in self._scene(data["sceneName"]):
+            if item["sceneItemId"] == data["sceneItemId"]:
+                return item
+        raise RequestError(600, "No scene items were found in the specified scene by that ID.")
+
+    def _emit(self, event_type, **data):
+        self.pending_events.append((event_type, data))
+
+    def _add_item(self, scene, source_name, enabled=True):
+        item = {
+            "sceneItemId": self.next_item_id,
+            "sourceName": source_name,
+            "sceneItemEnabled": enabled,
+            "isGroup": False,
+            "sceneItemTransform": {"positionX": 0.0, "positionY": 0.0, "rotation": 0.0,
+                                   "scaleX": 1.0, "scaleY": 1.0},
+        }
+        self.next_item_id += 1
+        self._scene(scene).append(item)
+        self._emit("SceneItemCreated", sceneName=scene, sourceName=source_name,
+                   sceneItemId=item["sceneItemId"], sceneItemIndex=len(self.scenes[scene]) - 1)
+        return item["sceneItemId"]
+
+    def handle(self, request_type, data):
+        """Execute one request, returning its responseData (or None)."""
+        with self.lock:
+            self.request_count += 1
+            handler = getattr(self, f"req_{request_type}", None)
+            return handler(data or {}) if handler else None
+
+    def req_GetVersion(self, data):
+        return {"obsVersion": "30.0.0-stub", "obsWebSocketVersion": "5.3.0", "rpcVersion": 1,
+                "availableRequests": [], "supportedImageFormats": [], "platform": "stub",
+                "platformDescription": "OBS stand-in"}
+
+    def req_GetSceneList(self, data):
+        return {"currentProgramSceneName": self.program_scene, "currentPreviewSceneName": None,
+                "scenes": [{"sceneName": name, "sceneIndex": index} for index, name in enumerate(self.scenes)]}
+
+    def req_GetCurrentProgramScene(self, data):
+        return {"currentProgramSceneName": self.program_scene, "sceneName": self.program_scene}
+
+    def req_SetCurrentProgramScene(self, data):
+        self._scene(data["sceneName"])
+        self.program_scene = data["sceneName"]
+        self._emit("CurrentProgramSceneChanged", sceneName=data["sceneName"])
+
+    def req_CreateScene(self, data):
+        if data["sceneName"] in self.scenes:
+            raise RequestError(601, "A source already exists by that scene name.")
+        self.scenes[data["sceneName"]] = []
+        self._emit("SceneCreated", sceneName=data["sceneName"], isGroup=False)
+
+    def req_GetInputList(self, data):
+        return {"inputs": [{"inputName": name, "inputKind": source["inputKind"], "unversionedInputKind": source["inputKind"]}
+                           for name, source in self.inputs.items()
+                           if not data.get("inputKind") or source["inputKind"] == data["inputKind"]]}
+
+    def req_GetInputSettings(self, data):
+        source = self._input(data["inputName"])
+        return {"inputSettings": dict(source["inputSettings"]), "inputKind": source["inputKind"]}
+
+    def req_SetInputSettings(self, data):
+        source = self._input(data["inputName"])
+        if data.get("overlay", True):
+            source["inputSettings"].update(data["inputSettings"])
+        else:
+            source["inputSettings"] = dict(data["inputSettings"])
+
+    def req_CreateInput(self, data):
+        if data["inputName"] in self.inputs:
+            raise RequestError(601, "A source already exists by that input name.")
+        self._scene(data["sceneName"])
+        self.inputs[data["inputName"]] = {"inputKind": data["inputKind"],
+                                          "inputSettings": dict(data.get("inputSettings") or {}),
+                                          "filters": {}}
+        self._emit("InputCreated", inputName=data["inputName"], inputKind=data["inputKind"],
+                   unversionedInputKind=data["inputKind"], inputSettings=dict(data.get("inputSettings") or {}),
+                   defaultInputSettings={})
+        return {"sceneItemId": self._add_item(data["sceneName"], data["inputName"],
+                                              data.get("sceneItemEnabled", True))}
+
+    def req_RemoveInput(self, data):
+        self._input(data["inputName"])
+        del self.inputs[data["inputName"]]
+        for items in self.scenes.values():
+            items[:] = [item for item in items if item["sourceName"] != data["inputName"]]
+        self._emit("InputRemoved", inputName=data["inputName"])
+
+    def req_SetInputName(self, data):
+        source = self._input(data["inputName"])
+        if data["newInputName"] in self.inputs:
+            raise RequestError(601, "A source already exists by that new input name.")
+        del self.inputs[data["inputName"]]
+        self.inputs[data["newInputName"]] = source
+        for items in self.scenes.values():
+            for item in items:
+                if item["sourceName"] == data["inputName"]:
+                    item["sourceName"] = data["newInputName"]
+        self._emit("InputNameChanged", oldInputName=data["inputName"], inputName=data["newInputName"])
+
+    def req_CreateSceneItem(self, data):
+        self._input(data["sourceName"])
+        return {"sceneItemId": self._add_item(data["sceneName"], data["sourceName"],
+                                              data.get("sceneItemEnabled", True))}
+
+    def req_GetSceneItemList(self, data):
+        return {"sceneItems": [dict(item, sceneItemIndex=index)
+                               for index, item in enumerate(self._scene(data["sceneName"]))]}
+
+    def req_GetSceneItemEnabled(self, data):
+        return {"sceneItemEnabled": self._item(data)["sceneItemEnabled"]}
+
+    def req_SetSceneItemEnabled(self, data):
+        self._item(data)["sceneItemEnabled"] = data["sceneItemEnabled"]
+
+    def req_GetSceneItemTransform(self, data):
+        return {"sceneItemTransform": dict(self._item(data)["sceneItemTransform"])}
+
+    def req_SetSceneItemTransform(self, data):
+        self._item(data)["sceneItemTransform"].update(data["sceneItemTransform"])
+
+    def req_GetSceneItemIndex(self, data):
+        return {"sceneItemIndex": self._scene(data["sceneName"]).index(self._item(data))}
+
+    def req_SetSceneItemIndex(self, data):
+        items = self._scene(data["sceneName"])
+        item = self._item(data)
+        items.remove(item)
+        items.insert(min(data["sceneItemIndex"], len(items)), item)
+
+    def req_CreateSourceFilter(self, data):
+        filters = self._input(data["sourceName"])["filters"]
+        if data["filterName"] in filters:
+            raise RequestError(601, "A filter already exists by that name.")
+        filters[data["filterName"]] = dict(data.get("filterSettings") or {})
+
+    def req_GetSourceFilterList(self, data):
+        filters = self._input(data["sourceName"])["filters"]
+        return {"filters": [{"filterName": name, "filterKind": "color_filter_v2", "filterEnabled": True,
+                             "filterIndex": index, "filterSettings": dict(settings)}
+                            for index, (name, settings) in enumerate(filters.items())]}
+
+    def req_SetSourceFilterSettings(self, data):
+        filters = self._input(data["sourceName"])["filters"]
+        if data["filterName"] not in filters:
+            raise RequestError(600, "No filter was found by that name.")
+        filters[data["filterName"]].update(data["filterSettings"])
+
+    def req_PressInputPropertiesButton(self, data):
+        self._input(data["inputName"])
+
+    def req_TriggerMediaInputAction(self, data):
+        self._input(data["inputName"])
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        # HTTP upgrade handshake
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                return
+            request += chunk
+        headers = {}
+        for line in request.decode("latin-1").split("\r\n")[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        accept = accept_key(headers["sec-websocket-key"]).encode()
+        sock.sendall(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     b"Sec-WebSocket-Protocol: obswebsocket.json\r\n"
+                     b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+
+        send_lock = threading.Lock()
+
+        def send(message):
+            with send_lock:
+                send_frame(sock, json.dumps(message).encode())
+
+        send({"op": 0, "d": {"obsWebSocketVersion": "5.3.0", "rpcVersion": 1}})
+
+        with server.clients_lock:
+            server.clients[sock] = (0, send)
+        try:
+            while True:
+                opcode, payload = recv_frame(sock)
+                if opcode == 0x8:  # Close
+                    send_frame(sock, payload[:2], 0x8)
+                    return
+                if opcode == 0x9:  # Ping
+                    send_frame(sock, payload, 0xA)
+                    continue
+                if opcode != 0x1:
+                    continue
+
+                message = json.loads(payload)
+                server.state.message_count += 1
+                if message["op"] == 1:
+                    with server.clients_lock:
+                        server.clients[sock] = (message["d"].get("eventSubscriptions", 0), send)
+                    send({"op": 2, "d": {"negotiatedRpcVersion": 1}})
+                elif message["op"] == 6:
+                    server.delay(1)
+                    send({"op": 7, "d": server.execute(message["d"])})
+                elif message["op"] == 8:
+                    requests = message["d"].get("requests", [])
+                    server.delay(len(requests))
+                    results = []
+                    for request in requests:
+                        result = server.execute(request)
+                        results.append(result)
+                        if not result["requestStatus"]["result"] and message["d"].get("haltOnFailure"):
+                            break
+                    send({"op": 9, "d": {"requestId": message["d"].get("requestId"), "results": results}})
+                server.broadcast_events()
+        except (ConnectionError, OSError, ValueError):
+            return
+        finally:
+            with server.clients_lock:
+                server.clients.pop(sock, None)
+
+
+class OBSStubServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    OBS WebSocket stand-in.
+
+    Args:
+        latency (float): Seconds added to every request message (network round trip)
+        request_cost (float): Seconds added per request, also for each request in a batch
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, request_cost=0.0):
+        super().__init__((host, port), _Handler)
+        self.state = OBSState()
+        self.latency = latency
+        self.request_cost = request_cost
+        self.clients = {}  # socket -> (event subscriptions, send function)
+        self.clients_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def delay(self, request_count):
+        wait = self.latency + self.request_cost * request_count
+        if wait > 0:
+            time.sleep(wait)
+
+    def execute(self, request):
+        status = {"result": True, "code": 100}
+        response = {"requestType": request["requestType"], "requestId": request.get("requestId"),
+                    "requestStatus": status}
+        try:
+            data = self.state.handle(request["requestType"], request.get("requestData"))
+            if data is not None:
+                response["responseData"] = data
+        except RequestError as e:
+            status.update(result=False, code=e.code, comment=e.comment)
+        except (KeyError, TypeError) as e:
+            status.update(result=False, code=300, comment=f"Missing request field: {e}")
+        return response
+
+    def broadcast_events(self):
+        """Send the events emitted by the last requests to every subscribed client."""
+        with self.state.lock:
+            events, self.state.pending_events = self.state.pending_events, []
+        if not events:
+            return
+        with self.clients_lock:
+            subscribers = [send for subs, send in self.clients.values() if subs]
+        for send in subscribers:
+            for event_type, data in events:
+                try:
+                    send({"op": 5, "d": {"eventType": event_type, "eventIntent": 1, "eventData": data}})
+                except OSError:
+                    pass
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="OBSStub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close every client connection."""
+        self.shutdown()
+        with self.clients_lock:
+            for sock in list(self.clients):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OBS WebSocket stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request message")
+    parser.add_argument("--request-cost", type=float, default=0.0, help="seconds per request")
+    args = parser.parse_args()
+
+    server = OBSStubServer(args.host, args.port, args.latency, args.request_cost)
+    print(f"OBS stand-in listening on ws://{args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
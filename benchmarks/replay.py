@@ -0,0 +1,134 @@
+"""Record a CSV change timeline, or replay one against OBS and report push latency.
+
+Recording polls a CSV (every UPDATE_INTERVAL seconds) and appends each
+detected change to a timeline file; the GUI records the same way when
+TIMELINE_FILE is set in config.py. Replaying sends the recorded values to
+OBS on their recorded schedule, N times faster, or as fast as possible,
+and reports the push latency of every event: the values are sent as they
+were processed when recorded, without reading or processing the data
+again (bench_pipeline times that part).
+
+    python -m benchmarks.replay record data.csv timeline.ndjson --mapping mapping.json
+    python -m benchmarks.replay play timeline.ndjson --speed 4 --stub --latency 0.002
+    python -m benchmarks.replay play timeline.ndjson --speed 0 --host 127.0.0.1 --port 4455
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from background_scripts.logger import logger
+from background_scripts.config import OBS_HOST, OBS_PORT, OBS_PASSWORD, UPDATE_INTERVAL
+from background_scripts.csv_handler import CSVHandler
+from background_scripts.obs_controller import OBSController
+from background_scripts.timeline import TimelineRecorder, TimelineReplayer, load_timeline, summarize
+from benchmarks.obs_stub import OBSStubServer
+
+
+def record(args):
+    handler = CSVHandler(os.path.abspath(args.data))
+    if args.mapping:
+        with open(args.mapping, encoding="utf-8") as f:
+            handler.set_column_mapping(json.load(f))
+    else:
+        handler.set_column_mapping({column: column for column in handler.get_available_columns()})
+    if not handler.column_mapping:
+        print(f"No columns found in {args.data}")
+        return 1
+
+    recorder = TimelineRecorder(args.timeline, handler.csv_path)
+    handler.set_recorder(recorder)
+    print(f"Recording changes of {args.data} to {args.timeline}, Ctrl+C to stop")
+    try:
+        while True:
+            handler.read_csv()  # Records the change, if there is one
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.close()
+    print(f"Recorded {recorder.count} changes")
+    return 0
+
+
+def play(args):
+    events = load_timeline(args.timeline)
+    if not events:
+        print(f"No changes in {args.timeline}")
+        return 1
+
+    server = None
+    if args.stub:
+        server = OBSStubServer(latency=args.latency).start()
+        controller = OBSController("127.0.0.1", server.port)
+    else:
+        controller = OBSController(args.host, args.port, args.password)
+    try:
+        if not controller.connect():
+            print("Could not connect to OBS")
+            return 1
+        replayer = TimelineReplayer(events, controller, args.speed)
+        replayer.prepare()
+
+        speed = f"{args.speed:g}x" if args.speed > 0 else "as fast as possible"
+        print(f"Replaying {len(events)} changes over {events[-1]['t'] - events[0]['t']:.1f}s of recording ({speed})")
+
+        def report(result):
+            if args.verbose:
+                print(f"  #{result['index']:<5d} t={result['t']:9.3f}s {result['sources']:4d} sources  "
+                      f"push latency {result['push_latency_ms']:8.3f} ms (lag {result['lag_ms']:.3f}, "
+                      f"push {result['push_ms']:.3f}){'' if result['ok'] else '  FAILED'}")
+
+        try:
+            results = replayer.run(report)
+        except KeyboardInterrupt:
+            replayer.stop()
+            results = []
+        controller.disconnect()
+    finally:
+        if server is not None:
+            server.stop()
+
+    summary = summarize(results)
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timeline": args.timeline, "speed": args.speed, "summary": summary, "events": results}, f,
+                      indent=2)
+    return 1 if summary.get("failed") else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or replay CSV change timelines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="record the changes of a CSV file")
+    rec.add_argument("data", help="CSV (or other supported data file) to watch")
+    rec.add_argument("timeline", help="timeline file to append to")
+    rec.add_argument("--mapping", help="JSON file of source name -> column (default: every column as its own source)")
+    rec.add_argument("--interval", type=float, default=UPDATE_INTERVAL, help="seconds between checks")
+
+    rep = commands.add_parser("play", help="replay a timeline against OBS")
+    rep.add_argument("timeline")
+    rep.add_argument("--speed", type=float, default=1.0, help="playback speed, 0 for as fast as possible")
+    rep.add_argument("--stub", action="store_true", help="replay against the local OBS stand-in")
+    rep.add_argument("--latency", type=float, default=0.0, help="stand-in latency in seconds")
+    rep.add_argument("--host", default=OBS_HOST)
+    rep.add_argument("--port", type=int, default=OBS_PORT)
+    rep.add_argument("--password", default=OBS_PASSWORD)
+    rep.add_argument("--output", help="write per-event results as JSON")
+    rep.add_argument("-v", "--verbose", action="store_true", help="print every event")
+    args = parser.parse_args(argv)
+
+    logger.setLevel(logging.WARNING)
+    logging.getLogger("obsws_python").setLevel(logging.CRITICAL)
+    return record(args) if args.command == "record" else play(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Long-running soak test for memory and handle leaks.
+
+Drives thousands of simulated CSV changes and pushes against the local OBS
+stand-in, with the object churn of a long live session: CSV handlers
+replaced as on Browse, OBS clients replaced on every Connect, Treeview cell
+editors opened and saved, and a log file that keeps rotating. Python heap
+(tracemalloc), RSS, open file descriptors and thread count are sampled as
+it runs; the test fails if any of them grew past its threshold after the
+warm-up, and prints the call sites that allocated the most.
+
+    python -m benchmarks.soak --iterations 5000
+    xvfb-run python -m benchmarks.soak --gui
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from logging.handlers import RotatingFileHandler
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from background_scripts.logger import logger
+from background_scripts.csv_handler import CSVHandler
+from background_scripts.obs_controller import OBSController
+from benchmarks.obs_stub import OBSStubServer
+
+
+def rss_bytes():
+    """Resident set size of this process, or None if it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS, but it still shows steady growth
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def open_fds():
+    """Number of open file descriptors, or None where /proc (or /dev/fd) is not available."""
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+
+def take_sample(iteration):
+    gc.collect()  # DataFrames sit in reference cycles, count what is still reachable
+    traced, _ = tracemalloc.get_traced_memory()
+    return {"iteration": iteration, "time": time.monotonic(), "traced_bytes": traced,
+            "rss_bytes": rss_bytes(), "fds": open_fds(), "threads": threading.active_count()}
+
+
+class Soak:
+    """One soak run: a CSV file, the OBS stand-in and the objects that churn in a live session."""
+
+    def __init__(self, workdir, columns, latency):
+        self.workdir = workdir
+        self.csv_path = os.path.join(workdir, "soak.csv")
+        self.header = [f"player_{c}_{'color' if c % 4 == 0 else 'name'}" for c in range(columns)]
+        self.mapping = {name: name for name in self.header}
+        self.server = OBSStubServer(latency=latency).start()
+        self.controller = OBSController("127.0.0.1", self.server.port)
+        self.handler = None
+        self.app = None
+        self.root = None
+        self.pushes = 0
+
+    def write_csv(self, iteration):
+        """Rewrite the CSV with values that differ from the previous iteration."""
+        row = [f"{(iteration * 2654435761 + c) % 0xFFFFFF:06X}" if "color" in name else f"Player {iteration} {c}"
+               for c, name in enumerate(self.header)]
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(",".join(self.header) + "\n" + ",".join(row) + "\n")
+
+    def new_handler(self):
+        """Replace the CSV handler, the way browse_csv does."""
+        if self.handler is not None:
+            self.handler.close()
+        self.handler = CSVHandler(self.csv_path)
+        self.handler.set_column_mapping(dict(self.mapping))
+        if self.app is not None:
+            self.app.csv_handler = self.handler
+
+    def reconnect(self):
+        """Replace the OBS clients, the way the Connect button does."""
+        if not self.controller.connect():
+            raise RuntimeError("Could not connect to the OBS stand-in")
+        self.controller.subscribe(self.on_input_name_changed)
+
+    def on_input_name_changed(self, data):
+        pass
+
+    def start_gui(self):
+        """Open the real window (hidden) so Treeview reloads and cell editors are part of the churn."""
+        import tkinter as tk
+        import gui
+        self.root = tk.Tk()
+        self.root.withdraw()
+        gui.OBS_HOST, gui.OBS_PORT = "127.0.0.1", self.server.port
+        self.app = gui.OBSUpdaterGUI(self.root)
+        self.app.reconciler.stop()  # Its timer would make the thread count noisy
+        self.app.current_csv_path = self.csv_path
+        self.app.csv_handler = self.handler
+
+    def edit_cell(self):
+        """Open a cell editor on the first row's value and save it with Return (plus the FocusOut that follows)."""
+        tree = self.app.tree
+        rows = tree.get_children()
+        if not rows:
+            return
+        tree.selection_set(rows[0])
+        self.root.update()
+        x, _, width, _ = tree.bbox(rows[0], "#2") or (200, 0, 200, 0)
+        self.app.edit_item(SimpleNamespace(x=x + width // 2))
+        entry = self.app.edit_entry
+        if entry is not None:
+            entry.event_generate("<Return>")
+            entry.event_generate("<FocusOut>")
+        self.root.update()
+
+    def step(self, iteration, args):
+        """One simulated CSV change and its push."""
+        self.write_csv(iteration)
+        if iteration % args.browse_every == 0:
+            self.new_handler()
+        if iteration % args.reconnect_every == 0:
+            self.reconnect()
+
+        if self.handler.has_changes():
+            data = self.handler.read_csv()
+            prepared = self.controller.prepare_settings_requests(data)
+            if self.controller.send_prepared_settings(prepared):
+                self.pushes += 1
+
+        if self.app is not None:
+            self.app.load_sources()
+            if iteration % args.edit_every == 0:
+                self.edit_cell()
+            self.root.update()
+
+    def close(self):
+        if self.app is not None:
+            self.app.stop_rotation()
+            self.root.destroy()
+        if self.handler is not None:
+            self.handler.close()
+        self.controller.disconnect()
+        self.server.stop()
+
+
+def check_growth(baseline, final, args):
+    """Return a message for every metric that grew past its threshold."""
+    limits = [
+        ("traced_bytes", args.max_heap_growth * 1024 * 1024, "Python heap", lambda v: f"{v / 1024 / 1024:.2f} MB"),
+        ("rss_bytes", args.max_rss_growth * 1024 * 1024, "RSS", lambda v: f"{v / 1024 / 1024:.2f} MB"),
+        ("fds", args.max_fd_growth, "open file descriptors", str),
+        ("threads", args.max_thread_growth, "threads", str),
+    ]
+    failures = []
+    for key, limit, label, fmt in limits:
+        if baseline[key] is None or final[key] is None:
+            continue
+        growth = final[key] - baseline[key]
+        if growth > limit:
+            failures.append(f"{label} grew by {fmt(growth)} (limit {fmt(limit)}): "
+                            f"{fmt(baseline[key])} -> {fmt(final[key])}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test the CSV -> OBS pipeline for leaks")
+    parser.add_argument("--iterations", type=int, default=5000, help="simulated CSV changes")
+    parser.add_argument("--warmup", type=int, default=200, help="iterations before the baseline sample")
+    parser.add_argument("--sample-every", type=int, default=250)
+    parser.add_argument("--columns", type=int, default=20, help="mapped columns (sources) in the CSV")
+    parser.add_argument("--browse-every", type=int, default=50, help="replace the CSV handler every N changes")
+    parser.add_argument("--reconnect-every", type=int, default=100, help="reconnect to OBS every N changes")
+    parser.add_argument("--edit-every", type=int, default=10, help="edit a Treeview cell every N changes (--gui)")
+    parser.add_argument("--latency", type=float, default=0.0, help="OBS stand-in latency in seconds")
+    parser.add_argument("--gui", action="store_true", help="include the Tk window (needs a display)")
+    parser.add_argument("--max-heap-growth", type=float, default=4.0, help="MB")
+    parser.add_argument("--max-rss-growth", type=float, default=40.0, help="MB")
+    parser.add_argument("--max-fd-growth", type=int, default=4)
+    parser.add_argument("--max-thread-growth", type=int, default=2)
+    parser.add_argument("--top", type=int, default=10, help="allocation sites to report")
+    parser.add_argument("--output", help="write the samples and result as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Log to a small rotating file so rollover happens many times during the run
+        saved_handlers = logger.handlers[:]
+        for handler in saved_handlers:
+            logger.removeHandler(handler)
+        log_handler = RotatingFileHandler(os.path.join(workdir, "soak.log"), maxBytes=64 * 1024, backupCount=3)
+        logger.addHandler(log_handler)
+        logger.setLevel(logging.INFO)
+        logging.getLogger("obsws_python").setLevel(logging.CRITICAL)
+
+        soak = Soak(workdir, args.columns, args.latency)
+        samples = []
+        baseline_snapshot = None
+        start = time.monotonic()
+        try:
+            soak.write_csv(0)
+            soak.new_handler()
+            soak.reconnect()
+            soak.controller.bulk_update_sources(soak.handler.read_csv())  # Create the sources
+            if args.gui:
+                try:
+                    soak.start_gui()
+                except Exception as e:
+                    print(f"--gui needs a display (run under xvfb-run on headless machines): {e}")
+                    return 2
+
+            tracemalloc.start()
+            for iteration in range(1, args.iterations + 1):
+                soak.step(iteration, args)
+                if iteration % args.sample_every == 0 or iteration in (args.warmup, args.iterations):
+                    samples.append(take_sample(iteration))
+                if iteration == args.warmup:
+                    baseline_snapshot = tracemalloc.take_snapshot()
+                    s = samples[-1]
+                    print(f"[{iteration:6d}] heap {s['traced_bytes'] / 1024:9.1f} KB  "
+                          f"rss {(s['rss_bytes'] or 0) / 1024 / 1024:7.1f} MB  "
+                          f"fds {s['fds']}  threads {s['threads']}")
+            final_snapshot = tracemalloc.take_snapshot()
+        finally:
+            soak.close()
+            tracemalloc.stop()
+            logger.removeHandler(log_handler)
+            log_handler.close()
+            for handler in saved_handlers:
+                logger.addHandler(handler)
+
+    elapsed = time.monotonic() - start
+    baseline = next(s for s in samples if s["iteration"] >= args.warmup)
+    final = samples[-1]
+    failures = check_growth(baseline, final, args)
+
+    print(f"\n{args.iterations} changes, {soak.pushes} pushes in {elapsed:.1f}s")
+    print(f"\nTop {args.top} allocation sites by growth since iteration {baseline['iteration']}:")
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    top = []
+    if baseline_snapshot is not None:
+        stats = final_snapshot.filter_traces(ignore).compare_to(baseline_snapshot.filter_traces(ignore), "lineno")
+        for stat in stats[:args.top]:
+            frame = stat.traceback[0]
+            top.append({"site": f"{frame.filename}:{frame.lineno}", "size_diff": stat.size_diff,
+                        "count_diff": stat.count_diff})
+            print(f"  {stat.size_diff / 1024:+9.1f} KB {stat.count_diff:+7d} blocks  {frame.filename}:{frame.lineno}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"samples": samples, "failures": failures, "top_allocations": top,
+                       "pushes": soak.pushes, "elapsed_s": elapsed}, f, indent=2)
+
+    for failure in failures:
+        print(f"LEAK {failure}")
+    if not failures:
+        print("\nNo growth past the thresholds")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
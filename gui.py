@@ -1,13 +1,32 @@
 """GUI interface for the OBS CSV Updater plugin."""
 
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import csv
+from tkinter import ttk, messagebox, filedialog, simpledialog
+import base64
+import math
 import os
 import platform
-from background_scripts.config import DEFAULT_CSV_PATH, OBS_HOST, OBS_PORT, BASE_DIR
+import queue
+import threading
+import time
+from background_scripts.config import DEFAULT_CSV_PATH, OBS_HOST, OBS_PORT, BASE_DIR, TAIL_ROWS, PULL_URL, CONTROL_PORT, \
+    TIMELINE_FILE, THUMBNAIL_SIZE, THUMBNAIL_CACHE_MB, PUSH_POLICY, GUI_FRAME_MS, GUI_FRAME_BUDGET_MS, HIGHLIGHT_MS, \
+    HIGHLIGHT_COLOR, BROWSER_PRELOAD
+from background_scripts.browser_preload import BrowserPreloader
+from background_scripts.change_watcher import ChangeWatcher
+from background_scripts.control_api import ControlServer
 from background_scripts.csv_handler import CSVHandler
-from background_scripts.obs_controller import OBSController
+from background_scripts.http_source import HTTPPullSource
+from background_scripts.obs_controller import OBSController, RELOADING_KINDS, get_input_kind
+from background_scripts.modifiers import GlobalModifiers
+from background_scripts.preflight import Preflight
+from background_scripts.profiles import ProfileManager
+from background_scripts.readers import SUPPORTED_EXTENSIONS
+from background_scripts.reconciler import DriftReconciler
+from background_scripts.rotation import RowRotator
+from background_scripts.scene_index import SceneItemIndex
+from background_scripts.thumbnails import LRUCache, ThumbnailLoader, color_to_rgb
+from background_scripts.timeline import TimelineRecorder
 from background_scripts.logger import logger
 
 
@@ -198,12 +217,201 @@ class CreateSourceDialog(tk.Toplevel):
         """Cancel the dialog."""
         self.destroy()
 
+class SelectRowDialog(tk.Toplevel):
+    def __init__(self, parent, csv_handler):
+        """Initialize the row selection dialog."""
+        super().__init__(parent)
+        self.title("Select Row")
+        self.geometry("350x160")
+        self.resizable(False, False)
+        self.csv_handler = csv_handler
+
+        # Center the dialog on parent
+        self.transient(parent)
+        self.grab_set()
+
+        # Key column selection
+        column_frame = ttk.Frame(self, padding="5")
+        column_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(column_frame, text="Key Column:", width=12).pack(side=tk.LEFT)
+        self.column_box = ttk.Combobox(column_frame, state="readonly",
+                                       values=["(first row)"] + self.csv_handler.get_available_columns())
+        self.column_box.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        self.column_box.set(self.csv_handler.key_column or "(first row)")
+        self.column_box.bind("<<ComboboxSelected>>", self.load_keys)
+
+        # Key value selection (type to jump straight to a key)
+        key_frame = ttk.Frame(self, padding="5")
+        key_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(key_frame, text="Row Key:", width=12).pack(side=tk.LEFT)
+        self.key_box = ttk.Combobox(key_frame)
+        self.key_box.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        if self.csv_handler.selected_key is not None:
+            self.key_box.set(self.csv_handler.selected_key)
+        self.load_keys()
+
+        # Buttons
+        button_frame = ttk.Frame(self, padding="5")
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Select", command=self.select).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.destroy).pack(side=tk.LEFT)
+
+        self.key_box.bind('<Return>', lambda e: self.select())
+        self.result = False
+
+    def selected_column(self):
+        """Return the chosen key column, or None for the first row."""
+        column = self.column_box.get()
+        return None if column == "(first row)" else column
+
+    def load_keys(self, event=None):
+        """Fill the key list from the chosen column; the live row only changes on Select."""
+        column = self.selected_column()
+        if event is not None:
+            self.key_box.set("")  # A key of the previous column
+        self.key_box.configure(values=self.csv_handler.get_row_keys(column) if column else [])
+        self.key_box.configure(state="normal" if column else "disabled")
+
+    def select(self):
+        """Make the chosen column and row the live ones and close the dialog."""
+        column, key = self.selected_column(), self.key_box.get().strip()
+        if column is not None and key not in self.key_box.cget("values"):
+            messagebox.showerror("Error", f"No row found for '{key}'")
+            return
+
+        previous = (self.csv_handler.key_column, self.csv_handler.selected_key)
+        if column != previous[0]:
+            self.csv_handler.set_key_column(column)
+        if not self.csv_handler.select_row(key if column is not None else None):
+            # The file changed since the keys were listed, keep the row on air as it was
+            self.csv_handler.set_key_column(previous[0])
+            self.csv_handler.select_row(previous[1])
+            messagebox.showerror("Error", f"No row found for '{key}'")
+            return
+
+        self.result = True
+        self.destroy()
+
+
+class ModifiersDialog(tk.Toplevel):
+    DEFAULT_STATE = {"visible": True, "opacity": 1.0, "rotation": 0.0}
+
+    def __init__(self, parent, modifiers, source_names, source_name=None):
+        """Initialize the global modifiers dialog, showing the current state of source_name if given."""
+        super().__init__(parent)
+        self.title("Global Modifiers")
+        self.geometry("350x220")
+        self.resizable(False, False)
+        self.modifiers = modifiers
+
+        # Center the dialog on parent
+        self.transient(parent)
+        self.grab_set()
+
+        # Source selection
+        source_frame = ttk.Frame(self, padding="5")
+        source_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(source_frame, text="Source:", width=10).pack(side=tk.LEFT)
+        self.source_box = ttk.Combobox(source_frame, values=source_names)
+        self.source_box.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+        self.source_box.bind("<<ComboboxSelected>>", self.load_state)
+        self.source_box.bind("<Return>", self.load_state)
+        self.source_box.bind("<FocusOut>", self.load_state)
+
+        # Opacity
+        opacity_frame = ttk.Frame(self, padding="5")
+        opacity_frame.pack(fill=tk.X, padx=5)
+        ttk.Label(opacity_frame, text="Opacity:", width=10).pack(side=tk.LEFT)
+        self.opacity_var = tk.DoubleVar(value=100.0)
+        ttk.Scale(opacity_frame, from_=0, to=100, variable=self.opacity_var).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+
+        # Rotation
+        rotation_frame = ttk.Frame(self, padding="5")
+        rotation_frame.pack(fill=tk.X, padx=5)
+        ttk.Label(rotation_frame, text="Rotation:", width=10).pack(side=tk.LEFT)
+        self.rotation_entry = ttk.Entry(rotation_frame)
+        self.rotation_entry.insert(0, "0")
+        self.rotation_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 0))
+
+        # Visibility
+        self.visible_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self, text="Visible", variable=self.visible_var).pack(anchor=tk.W, padx=10, pady=5)
+
+        # Buttons
+        button_frame = ttk.Frame(self, padding="5")
+        button_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(button_frame, text="Apply to All Scenes", command=self.apply).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Close", command=self.destroy).pack(side=tk.LEFT)
+
+        self.state_source = None  # Source the controls were last filled from
+        self.state = dict(self.DEFAULT_STATE)
+        if source_name:
+            self.source_box.set(source_name)
+            self.load_state()
+
+    def show_state(self, state):
+        """Fill the controls from a state dict."""
+        self.state = dict(state)
+        self.visible_var.set(state["visible"])
+        self.opacity_var.set(round(state["opacity"] * 100, 1))
+        self.rotation_entry.delete(0, tk.END)
+        self.rotation_entry.insert(0, f"{state['rotation']:g}")
+
+    def load_state(self, event=None):
+        """Read the selected source's current modifiers from OBS into the controls."""
+        source_name = self.source_box.get().strip()
+        if not source_name or source_name == self.state_source:
+            return
+        self.state_source = source_name
+        state = self.modifiers.read_state(source_name)
+        if state is None:
+            logger.warning(f"Could not read the modifiers of '{source_name}', showing the defaults")
+        self.show_state(state or self.DEFAULT_STATE)
+
+    def apply(self):
+        """Apply the modifiers the user changed to every scene showing the source."""
+        source_name = self.source_box.get().strip()
+        if not source_name:
+            messagebox.showerror("Error", "Source name is required")
+            return
+        if source_name != self.state_source:
+            # Typed without leaving the box: compare the controls with its state, keeping what was set
+            self.state_source = source_name
+            self.state = self.modifiers.read_state(source_name) or dict(self.DEFAULT_STATE)
+
+        try:
+            rotation = float(self.rotation_entry.get() or 0)
+        except ValueError:
+            messagebox.showerror("Error", "Rotation must be a number")
+            return
+
+        visible = bool(self.visible_var.get())
+        opacity = round(self.opacity_var.get() / 100, 3)
+        results = []
+        if visible != self.state["visible"]:
+            results.append(self.modifiers.set_visible(source_name, visible))
+        if abs(opacity - self.state["opacity"]) >= 0.001:
+            results.append(self.modifiers.set_opacity(source_name, opacity))
+        if abs(rotation - self.state["rotation"]) >= 0.001:
+            results.append(self.modifiers.apply_transform(source_name, rotation=rotation))
+        if not results:
+            return  # Nothing changed
+
+        if all(results):
+            self.state = {"visible": visible, "opacity": opacity, "rotation": rotation}
+        else:
+            messagebox.showwarning("Warning", f"Failed to apply some modifiers to '{source_name}'")
+            self.state_source = None
+            self.load_state()  # Show what OBS has now
+
+
 class OBSUpdaterGUI:
     def __init__(self, root):
         """Initialize the GUI."""
         self.root = root
         self.root.title("OBS CSV Updater")
-        self.root.geometry("700x350")
+        self.root.geometry("900x400")
 
         # Initialize current CSV path
         self.current_csv_path = DEFAULT_CSV_PATH
@@ -213,6 +421,13 @@ class OBSUpdaterGUI:
         self.csv_handler = CSVHandler(self.current_csv_path)
         self.obs_controller = OBSController(OBS_HOST, OBS_PORT)
         self.column_mapping = self.csv_handler.column_mapping
+        if PULL_URL:
+            self.csv_handler.set_pull_source(HTTPPullSource(PULL_URL))
+            self.csv_handler.fetch()  # First data before the window opens, the change watcher fetches from then on
+
+        # Records every detected change for later replay
+        self.recorder = TimelineRecorder(TIMELINE_FILE, PULL_URL or self.current_csv_path) if TIMELINE_FILE else None
+        self.csv_handler.set_recorder(self.recorder)
 
         # Create main frame
         self.main_frame = ttk.Frame(self.root, padding="10")
@@ -226,11 +441,45 @@ class OBSUpdaterGUI:
         self.status_label = ttk.Label(self.main_frame, textvariable=self.status_var)
         self.status_label.grid(row=1, column=0, columnspan=2, sticky="w")
 
-        # Create treeview for sources
-        self.create_source_tree()
+        # Source list with its previews
+        self.create_source_view()
+        self.csv_handler.store.subscribe(self.on_store_changed)
+        self.root.after(GUI_FRAME_MS, self.apply_changes)
 
         # Buttons
         self.create_buttons()
+        self.rotator = None
+        self.create_rotation_controls()
+        self.edit_entry = None  # Entry widget of the cell being edited
+
+        # Where every source appears across scenes, for global modifiers
+        self.scene_index = SceneItemIndex(self.obs_controller)
+        self.modifiers = GlobalModifiers(self.obs_controller, self.scene_index)
+        self.preloader = BrowserPreloader(self.obs_controller, self.scene_index)
+
+        # Re-sends sources changed by hand in OBS, checked against the values last sent (idle while rows rotate)
+        self.reconciler = DriftReconciler(self.obs_controller,
+                                          paused=lambda: self.rotator is not None and self.rotator.running)
+
+        # Checks every update set before it is pushed (media files, colors, source kinds)
+        self.preflight = Preflight(self.obs_controller)
+
+        # Local HTTP/WebSocket API for other tools to push values
+        self.control_server = ControlServer(lambda: self.csv_handler, self.obs_controller, preflight=self.preflight)
+        if CONTROL_PORT:
+            self.control_server.start()
+
+        # Named mappings tied to scenes, switched by hand or when OBS changes its program scene
+        self.profiles = ProfileManager(lambda: self.csv_handler, self.obs_controller, preflight=self.preflight)
+        self.profiles.attach(self.csv_handler)
+        self.create_profile_controls()
+        if self.profiles.load() and self.profiles.active:
+            self.profiles.activate(self.profiles.active, push=False)
+        self.update_profile_status()
+
+        # Reads the data file when it changes, the list follows through the source store
+        self.watcher = ChangeWatcher(lambda: self.csv_handler, on_data_changed=self.profiles.schedule_compile)
+        self.watcher.start()
 
         # Initial load
         self.connect_to_obs()
@@ -241,7 +490,7 @@ class OBSUpdaterGUI:
         file_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
 
         # CSV Path Label
-        self.path_var = tk.StringVar(value=self.current_csv_path)
+        self.path_var = tk.StringVar(value=PULL_URL or self.current_csv_path)
         path_label = ttk.Label(file_frame, textvariable=self.path_var, wraplength=450)
         path_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 5))
 
@@ -249,6 +498,14 @@ class OBSUpdaterGUI:
         browse_btn = ttk.Button(file_frame, text="Browse", command=self.browse_csv)
         browse_btn.pack(side=tk.RIGHT)
 
+        # Pull the data straight from a URL instead of a local file
+        ttk.Button(file_frame, text="Use URL", command=self.use_url).pack(side=tk.RIGHT, padx=(0, 5))
+
+        # Tail mode for append-only CSVs (goal logs, chat highlights)
+        self.tail_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(file_frame, text="Follow new rows", variable=self.tail_var,
+                        command=self.toggle_tail_mode).pack(side=tk.RIGHT, padx=5)
+
     def browse_csv(self):
         """Open file dialog to select a CSV file."""
         try:
@@ -256,7 +513,9 @@ class OBSUpdaterGUI:
             filepath = filedialog.askopenfilename(
                 title="Select CSV File",
                 initialdir=initial_dir,
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+                filetypes=[("CSV files", "*.csv"),
+                           ("Data files", " ".join(f"*{ext}" for ext in SUPPORTED_EXTENSIONS)),
+                           ("All files", "*.*")]
             )
 
             if filepath:
@@ -265,7 +524,16 @@ class OBSUpdaterGUI:
                 logger.info(f"Selected CSV file path: {filepath}")
 
                 # Create new CSV handler instance with the new file
+                self.stop_rotation()
+                self.csv_handler.store.unsubscribe(self.on_store_changed)
+                self.profiles.detach(self.csv_handler)
+                self.csv_handler.close()  # Drop the old handler's connection and cached frame
                 self.csv_handler = CSVHandler(filepath)
+                self.csv_handler.set_recorder(self.recorder)
+                self.csv_handler.store.subscribe(self.on_store_changed)
+                self.profiles.attach(self.csv_handler)
+                if self.tail_var.get():
+                    self.csv_handler.set_tail_mode(True, TAIL_ROWS)
 
                 # Update current path and display
                 self.current_csv_path = filepath
@@ -291,10 +559,61 @@ class OBSUpdaterGUI:
             logger.error(f"Error loading CSV file: {str(e)}")
             messagebox.showerror("Error", f"Failed to load CSV file: {str(e)}")
 
+    def use_url(self):
+        """Ask for a CSV/JSON URL and pull the data from it."""
+        url = simpledialog.askstring("Use URL", "CSV/JSON URL to pull data from:", parent=self.root)
+        if not url:
+            return
+
+        try:
+            self.csv_handler.set_pull_source(HTTPPullSource(url.strip()))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        self.tail_var.set(False)
+        self.path_var.set(url.strip())
+        self.csv_handler.fetch()  # The columns are needed now, later fetches run on the change watcher
+        if self.csv_handler.get_available_columns():
+            self.open_mapping_dialog()
+        else:
+            messagebox.showerror("Error", f"No columns found at {url}")
+
+    def toggle_tail_mode(self):
+        """Switch between reading the selected row and following newly appended rows."""
+        if self.csv_handler.set_tail_mode(self.tail_var.get(), TAIL_ROWS):
+            self.load_sources()
+        else:
+            self.tail_var.set(False)
+            messagebox.showerror("Error", "Following new rows only works with CSV files")
+
+    def create_source_view(self):
+        """Create the source list and the state behind it (no background services)."""
+        # Previews (color swatches, image thumbnails) for the rows on screen
+        self.thumbnails = ThumbnailLoader()
+        self.preview_images = LRUCache(THUMBNAIL_CACHE_MB * 1024 * 1024)  # Cache key -> PhotoImage
+        self.preview_keys = {}  # Image path -> cache key of its last decoded thumbnail
+        self.preview_requested = set()
+        self.preview_scheduled = False
+        self.preview_polling = False
+
+        # Rows changed in the source store (by the file watcher, the control API, edits) wait here for the next frame
+        self.dirty = set()
+        self.dirty_lock = threading.Lock()
+        self.highlights = {}  # Source name -> when its highlight ends
+
+        # Create treeview for sources
+        self.create_source_tree()
+
     def create_source_tree(self):
         """Create the treeview for displaying sources."""
         columns = ("Source Name", "Value")
-        self.tree = ttk.Treeview(self.main_frame, columns=columns, show="headings")
+        self.tree = ttk.Treeview(self.main_frame, columns=columns, show="tree headings")
+        ttk.Style().configure("Treeview", rowheight=max(20, THUMBNAIL_SIZE + 4))
+
+        # Preview column: swatch/thumbnail with the short hex or file name
+        self.tree.heading("#0", text="Preview")
+        self.tree.column("#0", width=140, stretch=False)
 
         # Set column headings
         for col in columns:
@@ -303,7 +622,16 @@ class OBSUpdaterGUI:
 
         # Add scrollbar
         scrollbar = ttk.Scrollbar(self.main_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        def on_scroll(*args):
+            scrollbar.set(*args)
+            self.schedule_previews()  # Rows scrolled into view need their previews
+
+        self.tree.configure(yscrollcommand=on_scroll)
+        self.tree.bind("<Configure>", lambda e: self.schedule_previews())
+
+        # Rows that just changed
+        self.tree.tag_configure("changed", background=HIGHLIGHT_COLOR)
 
         # Grid layout
         self.tree.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -336,28 +664,371 @@ class OBSUpdaterGUI:
                   command=self.create_new_source).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Configure CSV Mapping",
                   command=self.open_mapping_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Modifiers",
+                  command=self.open_modifiers_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Select Row",
+                  command=self.open_row_dialog).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Reload CSV",
                   command=self.load_sources).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Refresh Browser/Media",
+                  command=self.refresh_sources).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Save & Send to OBS",
                   command=self.save_changes).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Connect to Websocket",
                   command=self.connect_to_obs).pack(side=tk.LEFT, padx=5)
 
+    def create_rotation_controls(self):
+        """Create the controls for cycling through CSV rows on a timer."""
+        rotation_frame = ttk.Frame(self.main_frame)
+        rotation_frame.grid(row=4, column=0, columnspan=2, pady=(0, 10))
+
+        ttk.Label(rotation_frame, text="Row Rotation:").pack(side=tk.LEFT, padx=5)
+        ttk.Button(rotation_frame, text="Start",
+                  command=self.start_rotation).pack(side=tk.LEFT, padx=5)
+        self.pause_btn = ttk.Button(rotation_frame, text="Pause", command=self.toggle_rotation_pause)
+        self.pause_btn.pack(side=tk.LEFT, padx=5)
+        ttk.Button(rotation_frame, text="Skip",
+                  command=lambda: self.rotator and self.rotator.skip()).pack(side=tk.LEFT, padx=5)
+        ttk.Button(rotation_frame, text="Stop",
+                  command=self.stop_rotation).pack(side=tk.LEFT, padx=5)
+
+        self.rotation_var = tk.StringVar(value="")
+        ttk.Label(rotation_frame, textvariable=self.rotation_var).pack(side=tk.LEFT, padx=5)
+
+    def start_rotation(self):
+        """Start cycling through the CSV rows."""
+        self.stop_rotation()
+        self.rotator = RowRotator(self.csv_handler, self.obs_controller,
+                                  preloader=self.preloader if BROWSER_PRELOAD else None)
+        if self.rotator.start():
+            self.pause_btn.configure(text="Pause")
+            self.update_rotation_status()
+        else:
+            self.rotator = None
+            messagebox.showerror("Error", "Failed to start row rotation, check the CSV mapping")
+
+    def toggle_rotation_pause(self):
+        """Pause or resume the row rotation."""
+        if not self.rotator:
+            return
+        if self.rotator.paused:
+            self.rotator.resume()
+            self.pause_btn.configure(text="Pause")
+        else:
+            self.rotator.pause()
+            self.pause_btn.configure(text="Resume")
+
+    def stop_rotation(self):
+        """Stop the row rotation."""
+        if self.rotator:
+            self.rotator.stop()
+            self.rotator = None
+        self.rotation_var.set("")
+
+    def create_profile_controls(self):
+        """Create the controls for switching between mapping profiles."""
+        profile_frame = ttk.Frame(self.main_frame)
+        profile_frame.grid(row=5, column=0, columnspan=2, pady=(0, 10))
+
+        ttk.Label(profile_frame, text="Mapping Profile:").pack(side=tk.LEFT, padx=5)
+        self.profile_box = ttk.Combobox(profile_frame, state="readonly", width=20)
+        self.profile_box.pack(side=tk.LEFT, padx=5)
+        self.profile_box.bind("<<ComboboxSelected>>", self.activate_profile)
+        ttk.Button(profile_frame, text="Save Mapping as Profile",
+                  command=self.save_profile).pack(side=tk.LEFT, padx=5)
+        ttk.Button(profile_frame, text="Delete Profile",
+                  command=self.delete_profile).pack(side=tk.LEFT, padx=5)
+        # Shown when a scene change sent a profile but kept the unsaved mapping edits
+        self.profile_note_var = tk.StringVar()
+        ttk.Label(profile_frame, textvariable=self.profile_note_var).pack(side=tk.LEFT, padx=5)
+
+    def activate_profile(self, event=None):
+        """Switch to the profile picked in the list and send its sources."""
+        name = self.profile_box.get()
+        if (not self.profiles.is_saved_mapping(self.csv_handler.column_mapping)
+                and not messagebox.askyesno("Switch Profile", f"Replace the unsaved mapping with profile '{name}'?")):
+            self.profile_box.set(self.profiles.active or "")
+            return
+        if not self.profiles.activate(name):
+            messagebox.showwarning("Warning", f"Failed to update some sources of profile '{name}'")
+        self.profiles.save()  # Remember the active profile
+
+    def save_profile(self):
+        """Save the current mapping as a profile, tied to the scenes that show it."""
+        if not self.csv_handler.column_mapping:
+            messagebox.showerror("Error", "Configure the CSV mapping first")
+            return
+        active = self.profiles.profiles.get(self.profiles.active)
+        name = simpledialog.askstring("Save Profile", "Profile name:", parent=self.root,
+                                      initialvalue=active.name if active else "")
+        if not name or not name.strip():
+            return
+        scenes = simpledialog.askstring("Save Profile", "Scenes that show this profile (comma separated):",
+                                        parent=self.root, initialvalue=", ".join(active.scenes) if active else "")
+        if scenes is None:
+            return
+
+        name = name.strip()
+        self.profiles.set_profile(name, self.csv_handler.column_mapping,
+                                  [scene.strip() for scene in scenes.split(",") if scene.strip()])
+        self.profiles.active = name
+        if not self.profiles.save():
+            messagebox.showerror("Error", f"Failed to save the profiles to {self.profiles.path}")
+
+    def delete_profile(self):
+        """Delete the profile shown in the list."""
+        name = self.profile_box.get()
+        if name and messagebox.askyesno("Delete Profile", f"Delete mapping profile '{name}'?"):
+            self.profiles.remove_profile(name)
+            self.profiles.save()
+
+    def update_profile_status(self):
+        """Keep the profile list in step with the profiles (scene changes switch them from the event thread)."""
+        names = list(self.profiles.profiles)
+        if list(self.profile_box.cget("values") or ()) != names:
+            self.profile_box.configure(values=names)
+        active = self.profiles.active or ""
+        if self.profile_box.get() != active:
+            self.profile_box.set(active)
+        held = self.profiles.held
+        if held and self.profiles.is_saved_mapping(self.csv_handler.column_mapping):
+            held = None  # Saved or replaced since
+        note = f"Sent '{held}' for the scene, kept the unsaved mapping" if held else ""
+        if self.profile_note_var.get() != note:
+            self.profile_note_var.set(note)
+        self.root.after(250, self.update_profile_status)
+
+    def update_rotation_status(self):
+        """Show which row is on air while the rotation runs."""
+        if not self.rotator or not self.rotator.running:
+            return
+        row = self.rotator.current_row
+        if row is not None:
+            state = "paused" if self.rotator.paused else "on air"
+            self.rotation_var.set(f"Row {row + 1}/{len(self.rotator.payloads)} {state}")
+        self.root.after(250, self.update_rotation_status)
+
     def load_sources(self, event= None):
         """Load sources from CSV file."""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Load new data
+        # Load new data (rows are keyed by source name and shown from the source store)
         data = self.csv_handler.read_csv()
         if data:
-            for source_name, value in data.items():
-                self.tree.insert("", tk.END, values=(source_name, value))
+            with self.dirty_lock:
+                self.dirty.clear()  # Redrawn below, from a snapshot at least as new as these changes
+            self.show_snapshot(self.csv_handler.store.snapshot())
             logger.info("Sources loaded successfully")
         else:
+            for item in self.tree.get_children():
+                self.tree.delete(item)
             messagebox.showerror("Error", f"Failed to load sources from {self.current_csv_path}")
-    
+
+    def show_snapshot(self, snapshot):
+        """Redraw every row from a source store snapshot."""
+        items = self.tree.get_children()
+        if items:
+            self.tree.delete(*items)
+        for source_name, record in snapshot.records.items():
+            self.tree.insert("", tk.END, iid=source_name, text=self.preview_text(source_name, record.value),
+                             values=(source_name, record.value))
+        self.highlights.clear()
+        self.preview_keys.clear()  # Check the image files again
+        self.schedule_previews()
+
+    def on_store_changed(self, names):
+        """Source store listener, called on the writing thread: only note the rows for the next frame."""
+        with self.dirty_lock:
+            self.dirty.update(names)
+
+    def apply_changes(self):
+        """
+        Frame tick: bring the changed rows up to date and fade old highlights.
+
+        However often a source changes between two frames, its row is
+        redrawn once, from the latest snapshot. Rows added or removed go
+        first, then the changed rows on screen (highlighted), then rows
+        off screen until the frame's time budget is used up; the rest wait
+        for the next frame, so a flood of changes never blocks Tk.
+        """
+        try:
+            with self.dirty_lock:
+                dirty, self.dirty = self.dirty, set()
+            if dirty:
+                leftover = self.update_rows(dirty, time.perf_counter() + GUI_FRAME_BUDGET_MS / 1000)
+                if leftover:
+                    with self.dirty_lock:
+                        self.dirty.update(leftover)
+            if self.highlights:
+                now = time.monotonic()
+                for source_name in [name for name, until in self.highlights.items() if until <= now]:
+                    del self.highlights[source_name]
+                    if self.tree.exists(source_name):
+                        self.tree.item(source_name, tags=())
+        except Exception as e:
+            logger.error(f"Error updating the source list: {str(e)}")
+        finally:
+            self.root.after(GUI_FRAME_MS, self.apply_changes)
+
+    def update_rows(self, dirty, deadline):
+        """Update the rows of changed sources, returning the names left for the next frame."""
+        snapshot = self.csv_handler.store.snapshot()
+        removed = [name for name in dirty if name not in snapshot and self.tree.exists(name)]
+        added = [name for name in dirty if name in snapshot and not self.tree.exists(name)]
+        if len(removed) + len(added) > max(50, len(snapshot) // 2):
+            self.show_snapshot(snapshot)  # Mostly a different set of sources, one redraw is cheaper
+            return set()
+
+        for source_name in removed:
+            self.tree.delete(source_name)
+            self.highlights.pop(source_name, None)
+        if added:
+            order = {name: index for index, name in enumerate(snapshot.records)}
+            for source_name in sorted(added, key=order.get):
+                value = snapshot.records[source_name].value
+                self.tree.insert("", order[source_name], iid=source_name,
+                                 text=self.preview_text(source_name, value), values=(source_name, value))
+
+        visible = set(self.visible_items())
+        changed = [name for name in dirty if name in snapshot and name not in added]
+        on_screen = [name for name in changed if name in visible]
+        off_screen = [name for name in changed if name not in visible]
+        until = time.monotonic() + HIGHLIGHT_MS / 1000
+        for source_name in on_screen + [name for name in added if name in visible]:
+            self.refresh_row(snapshot.records[source_name], highlight=True)
+            self.highlights[source_name] = until
+        for index, source_name in enumerate(off_screen):
+            if time.perf_counter() > deadline:
+                return set(off_screen[index:])
+            self.refresh_row(snapshot.records[source_name])
+
+        if on_screen or added:
+            self.schedule_previews()
+        return set()
+
+    def refresh_row(self, record, highlight=False):
+        """Show a record's value in its row (a color swatch right away, thumbnails on the next preview update)."""
+        options = {"values": (record.name, record.value), "text": self.preview_text(record.name, record.value)}
+        kind = self.preview_kind(record.name)
+        if kind == "color":
+            rgb = color_to_rgb(record.value)
+            options["image"] = self.color_swatch(rgb) if rgb else ""
+        elif kind == "image":
+            options["image"] = ""
+        if highlight:
+            options["tags"] = ("changed",)
+        self.tree.item(record.name, **options)
+
+    def visible_items(self):
+        """Return the rows currently on screen."""
+        items = self.tree.get_children()
+        if not items:
+            return ()
+        first, last = self.tree.yview()
+        start = int(first * len(items))
+        end = min(len(items), int(math.ceil(last * len(items))) + 1)
+        return items[start:end]
+
+    def preview_kind(self, source_name):
+        """Return "color", "image" or None for a source, from its mapped column (or its own name)."""
+        column = str(self.csv_handler.column_mapping.get(source_name, source_name)).lower()
+        if '_picture' in column or '_image' in column:
+            return "image"
+        if '_hex' in column or '_color' in column:
+            return "color"
+        return {"image_source": "image", "color_source_v3": "color"}.get(get_input_kind(str(source_name)))
+
+    def preview_text(self, source_name, value):
+        """Short form of a value for the preview column: #RRGGBB for colors, the file name for images."""
+        kind = self.preview_kind(source_name)
+        if kind == "color":
+            return color_to_rgb(value) or ""
+        if kind == "image":
+            return os.path.basename(str(value))
+        return ""
+
+    def schedule_previews(self):
+        """Update the previews once the GUI is idle (scrolling fires many events)."""
+        if not self.preview_scheduled:
+            self.preview_scheduled = True
+            self.root.after_idle(self.update_previews)
+
+    def color_swatch(self, rgb):
+        """Return a (cached) swatch image for a #RRGGBB color."""
+        key = ("color", rgb)
+        image = self.preview_images.get(key)
+        if image is None:
+            size = THUMBNAIL_SIZE
+            image = tk.PhotoImage(width=size, height=size)
+            image.put("#808080", to=(0, 0, size, size))  # Border, so white and black stay visible
+            image.put(rgb, to=(1, 1, size - 1, size - 1))
+            self.preview_images.put(key, image, size * size * 4)
+        return image
+
+    def update_previews(self):
+        """Show previews for the rows on screen, requesting thumbnails that are not decoded yet."""
+        self.preview_scheduled = False
+        wanted = set()
+        snapshot = self.csv_handler.store.snapshot()
+        for item in self.visible_items():
+            record = snapshot.get(item)
+            if record is None:
+                continue
+            value = record.value
+            kind = self.preview_kind(record.name)
+            if kind == "color":
+                rgb = color_to_rgb(value)
+                self.tree.item(item, image=self.color_swatch(rgb) if rgb else "")
+            elif kind == "image" and str(value):
+                key = self.preview_keys.get(str(value))
+                image = self.preview_images.get(key) if key else None
+                if image is None:
+                    wanted.add(str(value))
+                else:
+                    self.tree.item(item, image=image)
+
+        self.preview_requested = wanted
+        self.thumbnails.want(wanted)
+        if wanted and not self.preview_polling:
+            self.preview_polling = True
+            self.root.after(50, self.poll_previews)
+
+    def poll_previews(self):
+        """Turn thumbnails decoded by the loader thread into images (Tk objects are made on this thread)."""
+        self.preview_polling = False
+        received = False
+        while True:
+            try:
+                path, key, data = self.thumbnails.results.get_nowait()
+            except queue.Empty:
+                break
+            received = True
+            self.preview_requested.discard(path)
+            if key is None:
+                continue  # File is gone
+            self.preview_keys[path] = key
+            if key in self.preview_images:
+                continue
+
+            image, size = "", 64  # Not an image Tk can show, remembered so it is not decoded again
+            try:
+                if data and data[0] == "ppm":
+                    image = tk.PhotoImage(data=data[1], format="ppm")
+                elif data:
+                    image = tk.PhotoImage(data=base64.b64encode(data[1]))
+                    factor = math.ceil(max(image.width(), image.height()) / THUMBNAIL_SIZE)
+                    if factor > 1:
+                        image = image.subsample(factor)
+                if image:
+                    size = image.width() * image.height() * 4
+            except tk.TclError as e:
+                logger.debug(f"Could not show thumbnail for {path}: {str(e)}")
+            self.preview_images.put(key, image, size)
+
+        if received:
+            self.update_previews()  # Shows them, and keeps polling while rows still wait
+        elif self.preview_requested:
+            self.preview_polling = True
+            self.root.after(50, self.poll_previews)
+
     def edit_item(self, event):
         """Handle double-click to edit item in Treeview and update CSV."""
         item = self.tree.selection()[0]  # Get selected row
@@ -368,8 +1039,13 @@ class OBSUpdaterGUI:
             x, y, w, h = self.tree.bbox(item, column)
 
             # Get current value and create an Entry widget
-            current_value = self.tree.item(item)['values'][col_index]
-            entry = ttk.Entry(self.tree)
+            record = self.csv_handler.store.get(item)
+            if record is None:
+                return
+            current_value = record.name if col_index == 0 else record.raw
+            if self.edit_entry is not None:
+                self.edit_entry.destroy()  # Only one cell editor at a time
+            entry = self.edit_entry = ttk.Entry(self.tree)
             entry.place(x=x, y=y, width=w, height=h)
             entry.insert(0, current_value)
             entry.select_range(0, tk.END)
@@ -377,72 +1053,79 @@ class OBSUpdaterGUI:
 
             def save_edit(event):
                 """Save edited value and update CSV."""
+                if self.edit_entry is not entry:
+                    return  # Already saved or cancelled (Return is followed by FocusOut)
+                self.edit_entry = None
                 new_value = entry.get().strip()  # Strip whitespace
-                row_values = self.tree.item(item)['values'][:]  # Copy row data
-                old_source_name = row_values[0]  # Store old source name before updating
-
-                # Update the Treeview UI
-                row_values[col_index] = new_value
-                self.tree.item(item, values=row_values)
                 entry.destroy()
+                store = self.csv_handler.store
+                old_record = store.get(item)
+                if old_record is None:
+                    return  # Reloaded while editing
+
+                if col_index == 0:
+                    # Renamed: move the record, the CSV is not touched
+                    if not new_value or new_value == item or self.tree.exists(new_value):
+                        return
+                    index = self.tree.index(item)
+                    store.remove(item)
+                    store.update({new_value: old_record.value}, {new_value: old_record.raw})
+                    self.tree.delete(item)
+                    self.tree.insert("", index, iid=new_value, text=self.preview_text(new_value, old_record.value),
+                                     values=(new_value, old_record.value))
+                    self.schedule_previews()
+                    return
+
+                # Process the value like the CSV column it is mapped to and keep it in the store
+                column_name = self.csv_handler.column_mapping.get(item)
+                value = self.csv_handler.process_special_columns(new_value, column_name or item)
+                store.update({item: value}, {item: new_value})
 
-                logger.info(f"Updating CSV: Old Row - {row_values}")
+                # Update the Treeview UI
+                self.tree.item(item, values=(item, value), text=self.preview_text(item, value), image="")
+                self.schedule_previews()
 
-                # Find the corresponding column in the CSV using column_mapping
-                column_name = self.csv_handler.column_mapping.get(old_source_name)
+                logger.info(f"Updating CSV: {item} = {new_value}")
 
                 if column_name:
-                    try:
-                        # Read CSV into a list
-                        updated_data = []
-                        with open(self.current_csv_path, 'r', newline='', encoding='utf-8') as f:
-                            reader = csv.reader(f)
-                            header = next(reader)  # Read header row
-                            updated_data.append(header)  # Preserve header
-
-                            # Read the row (since only one row in your CSV)
-                            row = next(reader)
-                            logger.info(f"Original row from CSV: {row}")
-
-                            # Update the specific column in the CSV
-                            if column_name in header:
-                                column_index = header.index(column_name)
-                                row[column_index] = new_value
-                                logger.info(f"Updated column {column_name} with new value: {new_value}")
-                            else:
-                                logger.warning(f"Column '{column_name}' not found in CSV header!")
-
-                            updated_data.append(row)
-
-                        # Write the updated data back to the CSV
-                        with open(self.current_csv_path, 'w', newline='', encoding='utf-8') as f:
-                            writer = csv.writer(f)
-                            writer.writerows(updated_data)  # Write all updated rows
-
+                    if self.csv_handler.write_value(column_name, new_value):
                         logger.info(f"CSV & OBS successfully updated: {self.current_csv_path}")
-
-                    except Exception as e:
-                        logger.error(f"Error updating CSV: {str(e)}")
                 else:
-                    logger.warning(f"Source name '{old_source_name}' not found in column_mapping!")
+                    logger.warning(f"Source name '{item}' not found in column_mapping!")
+
+            def cancel_edit(event):
+                self.edit_entry = None
+                entry.destroy()
 
             entry.bind('<Return>', save_edit)  # Save on Enter key
             entry.bind('<FocusOut>', save_edit)  # Save on focus out
-            entry.bind('<Escape>', lambda e: entry.destroy()) #Destory on Escape  
+            entry.bind('<Escape>', cancel_edit) #Destory on Escape
 
     def save_changes(self, event=None):
         """Save changes to CSV and update OBS."""
         try:
-            # Get all items from treeview
-            sources = {}
-            for item in self.tree.get_children():
-                source_name, value = self.tree.item(item)['values']
-                sources[source_name] = value
-
-            # Update OBS
-            if self.obs_controller.bulk_update_sources(sources):
+            # Update OBS from the source store, whose values are already processed for it
+            records = self.csv_handler.store.snapshot().records
+            report = self.preflight.check(records.values(), os.path.dirname(self.csv_handler.csv_path))
+            sendable = [records[name] for name in report.sendable(records, PUSH_POLICY)]
+            if not sendable and not report.ok:
+                messagebox.showerror("Error", f"Nothing was sent to OBS, some values are invalid:\n{report.summary()}")
+                return
+
+            prepared = self.obs_controller.prepare_record_requests(sendable)  # Leaves out invalid values
+            success = self.obs_controller.send_prepared_settings(prepared) if prepared else True
+            if not success:
+                # Usually sources that do not exist yet, update_source creates them
+                sent = {request["requestData"]["inputName"] for request in prepared}
+                success = self.obs_controller.bulk_update_sources(
+                    {record.name: record.value for record in sendable if record.name in sent})
+
+            if success and report.ok and len(prepared) == len(records):
                 messagebox.showinfo("Success", "Changes to CSV & OBS saved and sources updated")
                 logger.info("Changes to CSV & OBS saved and sources updated successfully")
+            elif not report.ok:
+                messagebox.showwarning("Warning", f"Changes saved but some values are invalid and were not sent:\n"
+                                                  f"{report.summary()}")
             else:
                 messagebox.showwarning("Warning", "Changes saved but failed to update some sources")
 
@@ -453,10 +1136,31 @@ class OBSUpdaterGUI:
             messagebox.showerror("Error", f"Failed to save changes: {str(e)}")
             logger.error(f"Failed to save changes: {str(e)}")
 
+    def refresh_sources(self):
+        """Reload the selected browser/media source in OBS (every one if none is selected)."""
+        records = self.csv_handler.store.snapshot().records
+        names = [name for name in (self.tree.selection() or records)
+                 if name in records and records[name].kind in RELOADING_KINDS]
+        if not names:
+            messagebox.showinfo("Refresh", "No browser or media source to refresh")
+            return
+
+        # Sets the URL/file if it changed, otherwise refreshes the page or restarts the media
+        failed = [name for name in names
+                  if not self.obs_controller.update_source(name, records[name].value, reload=True)]
+        if failed:
+            messagebox.showwarning("Warning", f"Failed to refresh: {', '.join(failed)}")
+
     def connect_to_obs(self):
         """Connect to OBS."""
         if self.obs_controller.connect():
             self.status_var.set("Status: Connected to OBS")
+            self.reconciler.start()
+            if self.scene_index.build():
+                self.scene_index.subscribe()
+            if self.preflight.refresh_inputs():
+                self.preflight.subscribe()
+            self.profiles.subscribe()
             logger.info("Connected to OBS successfully")
         else:
             self.status_var.set("Status: Connection Failed")
@@ -473,8 +1177,12 @@ class OBSUpdaterGUI:
             try:
                 # First create the source in OBS
                 if self.obs_controller.create_text_source(source_name, str(value)):
-                    # Add to tree
-                    self.tree.insert("", tk.END, values=(source_name, value))
+                    # Add to the store and the tree
+                    self.csv_handler.store.update({source_name: value})
+                    if self.tree.exists(source_name):
+                        self.tree.item(source_name, values=(source_name, value))
+                    else:
+                        self.tree.insert("", tk.END, iid=source_name, values=(source_name, value))
 
                     # Save changes immediately
                     self.save_changes()
@@ -485,6 +1193,21 @@ class OBSUpdaterGUI:
                 messagebox.showerror("Error", f"Failed to create source: {str(e)}")
                 logger.error(f"Failed to create source: {str(e)}")
 
+    def open_modifiers_dialog(self):
+        """Open the dialog to change a source across all scenes."""
+        source_names = list(self.csv_handler.store.snapshot().records)
+        selected = self.tree.selection()
+        dialog = ModifiersDialog(self.root, self.modifiers, source_names, selected[0] if selected else None)
+        self.root.wait_window(dialog)
+
+    def open_row_dialog(self):
+        """Open the dialog to pick which CSV row is live."""
+        dialog = SelectRowDialog(self.root, self.csv_handler)
+        self.root.wait_window(dialog)
+
+        if dialog.result:
+            self.load_sources()
+
     def open_mapping_dialog(self):
         """Open the CSV mapping configuration dialog."""
         try: